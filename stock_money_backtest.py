@@ -0,0 +1,210 @@
+import heapq
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from stock_money_engine import plan_position
+from stock_money_journal import COLUMNS
+
+# ===================== OHLC replay backtest =====================
+# ทดสอบ Entry / Stop Loss / Target กับราคาจริงแทนการเลือก "ชนะ/แพ้" เอง
+# - แท่งราคา (CSV หรือ Parquet) แปลงครั้งแรกเป็นไฟล์ .npy รายคอลัมน์ (อ่านทีละก้อน ไม่โหลดทั้งไฟล์)
+#   แล้วเปิดแบบ memory-map: อ่านจริงเฉพาะช่วงแท่งที่ใช้ตรวจแต่ละเทรด
+# - หาแท่งแรกที่แตะ stop หรือ target แบบ vectorized ทีละ block (block ขยายเท่าตัวจนเจอ)
+#   แท่งเดียวแตะทั้งสองฝั่งนับเป็นแพ้ (ไม่รู้ลำดับภายในแท่ง จึงเลือกกรณีแย่กว่า)
+# - ขนาดการซื้อใช้ plan_position เดียวกับฟอร์ม โดยใช้ทุนที่ปิดกำไร/ขาดทุนแล้ว ณ เวลาเข้าเทรด
+# - ผลลัพธ์เป็นตารางคอลัมน์เดียวกับ trade journal (stock_money_journal.COLUMNS) เรียงตามเวลาออก
+
+OHLC_FIELDS = ["ts", "open", "high", "low", "close"]
+SIGNAL_COLUMNS = ["Symbol", "เวลาเข้า", "Entry", "Stop Loss", "Target"]
+CONVERT_CHUNKSIZE = 1_000_000
+FIRST_BLOCK = 1_024
+
+
+@dataclass(frozen=True)
+class Bars:
+    ts: np.ndarray  # int64 nanoseconds (เรียงจากเก่าไปใหม่)
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def __len__(self):
+        return len(self.ts)
+
+
+def _cache_dir(path):
+    head, name = os.path.split(os.path.abspath(path))
+    return os.path.join(head, f".{name}.ohlc")
+
+
+def _normalize(frame):
+    frame = frame.rename(columns=str.lower)
+    time_column = next((c for c in ("ts", "time", "datetime", "date", "timestamp") if c in frame), None)
+    missing = [c for c in OHLC_FIELDS[1:] if c not in frame]
+    if time_column is None or missing:
+        raise ValueError("ไฟล์ราคาต้องมีคอลัมน์ time, open, high, low, close")
+    ts = pd.to_datetime(frame[time_column]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    return [ts] + [frame[c].to_numpy(dtype=float) for c in OHLC_FIELDS[1:]]
+
+
+def _iter_chunks(path):
+    if path.lower().endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("อ่านไฟล์ Parquet ต้องติดตั้ง pyarrow") from e
+        parquet = pq.ParquetFile(path, memory_map=True)
+        yield parquet.metadata.num_rows
+        for batch in parquet.iter_batches(batch_size=CONVERT_CHUNKSIZE):
+            yield _normalize(batch.to_pandas())
+    else:
+        with open(path, "rb") as f:
+            yield max(0, sum(1 for _ in f) - 1)
+        for chunk in pd.read_csv(path, chunksize=CONVERT_CHUNKSIZE):
+            yield _normalize(chunk)
+
+
+def _convert(path, cache_dir):
+    """เขียนแท่งราคาเป็น .npy รายคอลัมน์ทีละก้อน (ใช้หน่วยความจำเท่าขนาดก้อน ไม่ใช่ทั้งไฟล์)"""
+    chunks = _iter_chunks(path)
+    rows = next(chunks)
+    tmp_dir = cache_dir + ".tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    arrays = [
+        np.lib.format.open_memmap(os.path.join(tmp_dir, f"{name}.npy"), mode="w+",
+                                  dtype=np.int64 if name == "ts" else np.float64, shape=(rows,))
+        for name in OHLC_FIELDS
+    ]
+    pos = 0
+    for columns in chunks:
+        for array, values in zip(arrays, columns):
+            array[pos:pos + len(values)] = values
+        pos += len(columns[0])
+    for array in arrays:
+        array.flush()
+    del arrays
+    if pos != rows:
+        raise ValueError(f"{path}: จำนวนแถวไม่ตรง ({pos} จาก {rows})")
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, name))
+        os.rmdir(cache_dir)
+    os.replace(tmp_dir, cache_dir)
+
+
+@lru_cache(maxsize=64)
+def _load_bars(path, mtime):
+    cache_dir = _cache_dir(path)
+    stamp = os.path.join(cache_dir, "close.npy")
+    if not os.path.exists(stamp) or os.path.getmtime(stamp) < mtime:
+        _convert(path, cache_dir)
+    bars = Bars(*(np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r") for name in OHLC_FIELDS))
+    if len(bars) > 1 and np.any(bars.ts[1:] < bars.ts[:-1]):
+        raise ValueError(f"{path}: แท่งราคาต้องเรียงตามเวลา")
+    return bars
+
+
+def load_bars(path):
+    """เปิดไฟล์ OHLC (CSV / Parquet) แบบ memory-map (แปลงเป็น .npy ครั้งแรก / เมื่อไฟล์ต้นทางเปลี่ยน)"""
+    return _load_bars(os.path.abspath(path), os.path.getmtime(path))
+
+
+def find_bars_file(directory, symbol):
+    for ext in (".parquet", ".csv"):
+        path = os.path.join(directory, f"{symbol}{ext}")
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"ไม่พบไฟล์ราคา {symbol}.csv / {symbol}.parquet ใน {directory}")
+
+
+def first_hit(bars, start, stop_loss, target):
+    """หาแท่งแรกตั้งแต่ start ที่แตะ stop หรือ target คืน (index, "ชนะ"/"แพ้"/"-")
+
+    long เมื่อ stop < target, short เมื่อ stop > target; ไม่แตะเลยจนข้อมูลหมด -> (แท่งสุดท้าย, "-")
+    """
+    long = stop_loss < target
+    pos, block, n = start, FIRST_BLOCK, len(bars)
+    while pos < n:
+        end = min(n, pos + block)
+        high, low = bars.high[pos:end], bars.low[pos:end]
+        stop_hit = low <= stop_loss if long else high >= stop_loss
+        target_hit = high >= target if long else low <= target
+        hit = stop_hit | target_hit
+        if hit.any():
+            j = int(hit.argmax())
+            return pos + j, "แพ้" if stop_hit[j] else "ชนะ"
+        pos, block = end, block * 2
+    return n - 1, "-"
+
+
+def resolve_signals(signals, bars_for):
+    """หาแท่งเข้า/ออกของทุกสัญญาณ (ยังไม่คิดขนาด) bars_for(symbol) -> Bars"""
+    exits = []
+    for symbol, group in signals.groupby("Symbol", sort=False):
+        bars = bars_for(symbol)
+        times = pd.to_datetime(group["เวลาเข้า"]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        starts = np.searchsorted(bars.ts, times, side="left")
+        for row, start, entry, stop_loss, target in zip(
+            group.index, starts, group["Entry"], group["Stop Loss"], group["Target"],
+        ):
+            if start >= len(bars) or entry == stop_loss:
+                continue
+            end, result = first_hit(bars, int(start), stop_loss, target)
+            exit_price = {"ชนะ": target, "แพ้": stop_loss}.get(result, float(bars.close[end]))
+            exits.append((int(bars.ts[start]), int(bars.ts[end]), row, symbol, result, exit_price))
+    return exits
+
+
+def backtest(signals, bars_for, capital, risk_percent, board_lot=1):
+    """replay สัญญาณกับแท่งราคา คืน DataFrame คอลัมน์เดียวกับ trade journal
+
+    signals: DataFrame คอลัมน์ Symbol, เวลาเข้า, Entry, Stop Loss, Target
+    เทรดที่ถือพร้อมกันได้; ขนาดของแต่ละเทรดคิดจากทุนที่ปิดเทรดแล้ว ณ เวลาเข้า
+    """
+    missing = [c for c in SIGNAL_COLUMNS if c not in signals]
+    if missing:
+        raise ValueError("ไฟล์สัญญาณต้องมีคอลัมน์: " + ", ".join(missing))
+    exits = resolve_signals(signals, bars_for)
+    exits.sort()  # ตามเวลาเข้า
+
+    realized = capital
+    open_trades = []  # heap (เวลาออก, ลำดับ, ข้อมูลเทรด)
+    trades = []
+
+    def close_until(ts):
+        nonlocal realized
+        while open_trades and open_trades[0][0] <= ts:
+            exit_ts, _, (row, symbol, result, exit_price, size, rr) = heapq.heappop(open_trades)
+            entry = signals.at[row, "Entry"]
+            direction = 1 if signals.at[row, "Target"] > entry else -1
+            profit_loss = direction * (exit_price - entry) * size
+            trades.append({
+                "วันที่-เวลา": pd.Timestamp(exit_ts).strftime("%Y-%m-%d %H:%M:%S"),
+                "ทุนก่อนหน้า": realized,
+                "Entry": entry,
+                "Stop Loss": signals.at[row, "Stop Loss"],
+                "Target": signals.at[row, "Target"],
+                "ขนาดซื้อ": size,
+                "R:R": rr,
+                "ผลลัพธ์": result,
+                "กำไร/ขาดทุน": profit_loss,
+                "ทุนหลังเทรด": realized + profit_loss,
+                "หมายเหตุ": f"{symbol} " + {"ชนะ": "ถึงเป้า", "แพ้": "โดน Stop"}.get(result, "ปิดที่ราคาสุดท้าย"),
+            })
+            realized += profit_loss
+
+    for seq, (entry_ts, exit_ts, row, symbol, result, exit_price) in enumerate(exits):
+        close_until(entry_ts - 1)  # เทรดที่ออกก่อนเวลาเข้านี้ถูกนับเป็นทุนแล้ว
+        plan = plan_position(
+            realized, risk_percent,
+            signals.at[row, "Entry"], signals.at[row, "Stop Loss"], signals.at[row, "Target"],
+        )
+        size = np.floor(plan.position_size / board_lot + 1e-9) * board_lot if board_lot > 1 else plan.position_size
+        heapq.heappush(open_trades, (exit_ts, seq, (row, symbol, result, exit_price, size, plan.rr_ratio)))
+    close_until(np.iinfo(np.int64).max)
+
+    return pd.DataFrame(trades, columns=[name for name, _, _ in COLUMNS])
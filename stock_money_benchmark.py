@@ -0,0 +1,256 @@
+import argparse
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from stock_money_bootstrap import bootstrap_paths
+from stock_money_compare import (
+    anti_martingale_policy,
+    compare_simulated,
+    fixed_fractional_policy,
+    kelly_policy,
+    recovery_policy,
+)
+from stock_money_engine import plan_positions, replay_results
+from stock_money_import import PARQUET_AVAILABLE, export_results, import_results, import_results_csv
+from stock_money_ladder import bet_ladder
+from stock_money_montecarlo import simulate_recovery_paths
+from stock_money_streaks import streak_probability
+
+# ===================== Throughput benchmark =====================
+# วัดความเร็วของ core engine โดยไม่ต้องเปิด Streamlit (ค่าที่ได้คือจำนวนต่อวินาที ยิ่งมากยิ่งดี)
+#   python stock_money_benchmark.py                       # แสดงผล
+#   python stock_money_benchmark.py --save bench.json     # เก็บเป็น baseline
+#   python stock_money_benchmark.py --compare bench.json  # exit 1 ถ้าช้ากว่า baseline เกิน --tolerance
+#   python stock_money_benchmark.py --startup             # เพิ่มเวลาเปิดแอปจนแสดงผลครั้งแรก (วินาที ยิ่งน้อยยิ่งดี)
+# ใช้ seed ตายตัว ข้อมูลชุดเดิมทุกครั้ง และรายงานรอบที่เร็วที่สุดจาก --repeat รอบ
+
+PARAMS = (1000.0, 30.0, 1.0, 1.0)  # capital, first_bet, target_profit, odds
+
+
+def _results(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"ไม้": i, "Pattern": rng.choice(["พุธ", "คอ"]), "ผลลัพธ์": rng.choice(["-", "ชนะ", "แพ้"])}
+        for i in range(1, n + 1)
+    ]
+
+
+def _best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_replay(scale, repeat):
+    results = _results(200_000 // scale)
+    return len(results) / _best_time(lambda: replay_results(results, *PARAMS), repeat)
+
+
+def bench_max_trades(scale, repeat):
+    rng = random.Random(1)
+    cases = [
+        (rng.uniform(100, 1_000_000), rng.uniform(1, 100), rng.uniform(0.1, 10), rng.uniform(0.5, 3))
+        for _ in range(5_000 // scale)
+    ]
+    build = bet_ladder.__wrapped__  # ไม่ผ่าน lru_cache เพื่อวัดเวลาคำนวณจริง
+    return len(cases) / _best_time(lambda: [build(*case).max_streak() for case in cases], repeat)
+
+
+def bench_monte_carlo(scale, repeat):
+    num_paths = 20_000 // scale
+    return num_paths / _best_time(lambda: simulate_recovery_paths(*PARAMS, 200, num_paths=num_paths, seed=0), repeat)
+
+
+def bench_compare(scale, repeat):
+    capital, first_bet, target_profit, odds = PARAMS
+    policies = [
+        recovery_policy(first_bet, target_profit),
+        fixed_fractional_policy(2),
+        kelly_policy(0.55, odds),
+        anti_martingale_policy(first_bet),
+    ]
+    num_paths = 20_000 // scale
+
+    def run():
+        compare_simulated(policies, capital, odds, 200, num_paths=num_paths, win_prob=0.55, seed=0)
+
+    return num_paths * len(policies) / _best_time(run, repeat)
+
+
+def bench_bootstrap(scale, repeat):
+    samples = np.random.default_rng(0).normal(0.002, 0.02, 200)  # ผลตอบแทนต่อเทรดจำลองแทน journal จริง
+    num_paths = 20_000 // scale
+    return num_paths / _best_time(lambda: bootstrap_paths(samples, 100_000, 250, num_paths), repeat)
+
+
+def bench_import(scale, repeat):
+    data = pd.DataFrame(_results(100_000 // scale)).to_csv(index=False).encode("utf-8-sig")
+
+    def run():
+        import_results_csv(
+            io.BytesIO(data),
+            lambda results, start: replay_results(results, *PARAMS, start),
+            (PARAMS[0], PARAMS[1], 0),
+        )
+
+    return (100_000 // scale) / _best_time(run, repeat)
+
+
+def bench_export(scale, repeat):
+    _, _, _, rows, _ = replay_results(_results(100_000 // scale), *PARAMS)
+    return len(rows) / _best_time(lambda: pd.DataFrame(rows).to_csv(index=False).encode("utf-8-sig"), repeat)
+
+
+def bench_batch_sizing(scale, repeat):
+    rng = np.random.default_rng(2)
+    n = 10_000 // scale
+    entry = rng.uniform(1, 500, n).round(2)
+    watchlist = pd.DataFrame({
+        "Symbol": [f"S{i}" for i in range(n)],
+        "Entry": entry,
+        "Stop Loss": (entry * rng.uniform(0.85, 0.99, n)).round(2),
+        "Target": (entry * rng.uniform(1.02, 1.3, n)).round(2),
+    })
+    return n / _best_time(lambda: plan_positions(watchlist, 1_000_000, 1.0, max_total_risk_percent=20), repeat)
+
+
+def bench_streak_probability(scale, repeat):
+    depths = np.arange(1, 5_001 // scale)
+    return len(depths) / _best_time(lambda: streak_probability(depths, 1_000_000, 0.5), repeat)
+
+
+def bench_export_parquet(scale, repeat):
+    _, _, _, rows, _ = replay_results(_results(100_000 // scale), *PARAMS)
+    return len(rows) / _best_time(lambda: export_results(pd.DataFrame(rows), "Parquet"), repeat)
+
+
+def bench_import_parquet(scale, repeat):
+    n = 100_000 // scale
+    data = export_results(pd.DataFrame(_results(n)), "Parquet")
+
+    def run():
+        import_results(
+            io.BytesIO(data), "results.parquet",
+            lambda results, start: replay_results(results, *PARAMS, start),
+            (PARAMS[0], PARAMS[1], 0),
+        )
+
+    return n / _best_time(run, repeat)
+
+
+BENCHMARKS = {
+    "replay (ไม้/วินาที)": bench_replay,
+    "max trades (ชุดพารามิเตอร์/วินาที)": bench_max_trades,
+    "monte carlo (เส้นทาง/วินาที, 200 ไม้)": bench_monte_carlo,
+    "strategy compare (เส้นทาง x กลยุทธ์/วินาที, 200 ไม้)": bench_compare,
+    "journal bootstrap (เส้นทาง/วินาที, 250 เทรด)": bench_bootstrap,
+    "import CSV (แถว/วินาที)": bench_import,
+    "export CSV (แถว/วินาที)": bench_export,
+    "batch sizing (หุ้น/วินาที)": bench_batch_sizing,
+    "streak probability (ความลึก/วินาที, 1e6 ไม้)": bench_streak_probability,
+}
+if PARQUET_AVAILABLE:
+    BENCHMARKS["import Parquet (แถว/วินาที)"] = bench_import_parquet
+    BENCHMARKS["export Parquet (แถว/วินาที)"] = bench_export_parquet
+
+
+def run_benchmarks(scale=1, repeat=3):
+    return {name: fn(scale, repeat) for name, fn in BENCHMARKS.items()}
+
+
+# ===================== Startup (time-to-first-render) =====================
+# เปิดแต่ละแอปใน process ใหม่ (import ทุกอย่างจากศูนย์เหมือน container เพิ่งเริ่ม) แล้ว render หน้าแรกด้วย AppTest
+# จับเวลาตั้งแต่ก่อน import streamlit จนสคริปต์รันจบ; รันใน directory ชั่วคราวไม่ให้ไฟล์ SQLite ไปปนกับ repo
+
+APPS = [
+    "stock_money_management.py",
+    "stock_money_manual_sim.py",
+    "stock_money_manual_sim_session_plus.py",
+    "stock_money_manual_sim_session_plus_nextbet.py",
+    "stock_money_recovery_target.py",
+]
+_STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300).run()
+if at.exception:
+    sys.exit(at.exception[0].value)
+print(time.perf_counter() - start)
+"""
+
+
+def startup_time(app, repeat):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), app)
+    best = float("inf")
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(repeat):
+            done = subprocess.run(
+                [sys.executable, "-c", _STARTUP_SCRIPT, path],
+                cwd=workdir, capture_output=True, text=True, check=True,
+            )
+            best = min(best, float(done.stdout.strip().splitlines()[-1]))
+    return best
+
+
+def run_startup(repeat=3):
+    return {f"startup {app} (วินาที)": startup_time(app, repeat) for app in APPS}
+
+
+def _higher_is_better(name):
+    return not name.endswith("(วินาที)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="วัด throughput ของ core engine")
+    parser.add_argument("--quick", action="store_true", help="ลดขนาดข้อมูลลง 10 เท่า")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="บันทึกผลเป็น JSON (baseline)")
+    parser.add_argument("--compare", help="เทียบกับ baseline JSON")
+    parser.add_argument("--startup", action="store_true", help="วัดเวลาเปิดแอปจนแสดงผลครั้งแรกด้วย")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="ยอมให้ช้าลงได้กี่ส่วน (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(scale=10 if args.quick else 1, repeat=args.repeat)
+    if args.startup:
+        results.update(run_startup(repeat=args.repeat))
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    regressions = []
+    for name, value in results.items():
+        higher = _higher_is_better(name)
+        line = f"{name:<40} {value:>14,.0f}" if higher else f"{name:<40} {value:>14.3f}"
+        if name in baseline:
+            # ratio > 1 = ดีกว่า baseline เสมอ (เวลาใช้ baseline / ค่าปัจจุบัน)
+            ratio = value / baseline[name] if higher else baseline[name] / value
+            line += f"  ({ratio:.2f}x baseline)"
+            if ratio < 1 - args.tolerance:
+                regressions.append(name)
+        print(line)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if regressions:
+        print("ช้าลงเกินเกณฑ์: " + ", ".join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
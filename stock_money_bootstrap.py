@@ -0,0 +1,192 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from stock_money_montecarlo import DEFAULT_PERCENTILES
+from stock_money_rng import RandomStreams
+
+# ===================== Block bootstrap จาก journal จริง =====================
+# สุ่มอนาคตหลายพันเส้นทางจากเทรดที่บันทึกไว้จริง (stock_money_journal.py) แทนการสมมติโอกาสชนะ / odds
+# - ตัวอย่างที่สุ่มได้ 3 แบบ (MODES): ผลตอบแทน % ของทุน (ทบต้น), R-multiple x ความเสี่ยงต่อเทรด (ทบต้น), กำไร/ขาดทุนเป็นบาท
+# - circular block bootstrap: หยิบช่วงติดกันยาว block_length เทรดจากจุดเริ่มสุ่ม (วนกลับต้นเมื่อเกินท้าย)
+#   แพ้ติด / ชนะติดที่เกิดจริงจึงยังอยู่ในเส้นทางที่สุ่ม ไม่ถูกสลับจนกระจายเกินจริงแบบสุ่มทีละเทรด
+# - จุดเริ่มของ block ที่ b ของเส้นทาง p มาจาก stream "bootstrap" ตำแหน่ง (b, p) ของ stock_money_rng.py
+#   แบ่งเส้นทางเป็นช่วงให้หลาย thread คำนวณพร้อมกัน (NumPy ปล่อย GIL ระหว่างคำนวณ) ผลตรงกับรันรวดเดียวทุกบิต
+# - วัดต่อเส้นทาง: พอร์ตสุดท้าย, Max Drawdown, ช่วงติดลบจากจุดสูงสุดนานสุด (เทรดจนกลับจุดสูงสุดเดิม) และเทรดแรกที่แตะพื้นทุน
+
+MODES = {
+    "return": "ผลตอบแทน % ของทุน (ทบต้น)",
+    "r_multiple": "R-multiple x ความเสี่ยงต่อเทรด (ทบต้น)",
+    "pnl": "กำไร/ขาดทุนเป็นบาท (ไม่ทบต้น)",
+}
+JOURNAL_COLUMNS = ["result", "profit_loss", "capital_before", "position_size", "entry", "stop_loss"]
+MIN_TRADES = 5
+DEFAULT_SEED = 20240101  # seed ตายตัว: เพิ่มเทรดใหม่แล้วเทียบผลก่อน/หลังได้ตรง ๆ
+CHUNK_PATHS = 2_000  # เส้นทางต่อชิ้นงานของแต่ละ thread
+
+
+def auto_block_length(num_trades):
+    """ความยาว block ตามกฎ n^(1/3) (อย่างน้อย 1)"""
+    return max(1, round(num_trades ** (1 / 3)))
+
+
+def journal_samples(columns, mode="return", risk_percent=1.0):
+    """ตัวอย่างต่อเทรดจากคอลัมน์ของ journal (dict ชื่อคอลัมน์ SQLite -> list) เฉพาะเทรดที่ชนะ / แพ้
+
+    return: กำไร/ขาดทุน ÷ ทุนก่อนหน้า, r_multiple: (กำไร/ขาดทุน ÷ เงินที่เสี่ยง) x risk_percent %, pnl: บาท
+    """
+    if mode not in MODES:
+        raise ValueError(f"ไม่รู้จักแบบการสุ่ม {mode!r}")
+
+    def array(name):
+        return np.array([np.nan if v is None else v for v in columns[name]], dtype=float)
+
+    decided = np.isin(np.array(columns["result"], dtype=object), ["ชนะ", "แพ้"])
+    pnl = array("profit_loss")
+    if mode == "pnl":
+        values = pnl
+    elif mode == "return":
+        capital_before = array("capital_before")
+        values = np.divide(pnl, capital_before, out=np.full(len(pnl), np.nan), where=capital_before > 0)
+    else:
+        risk = array("position_size") * np.abs(array("entry") - array("stop_loss"))
+        values = np.divide(pnl, risk, out=np.full(len(pnl), np.nan), where=risk > 0) * risk_percent / 100
+    values = values[decided & np.isfinite(values)]
+    if len(values) < MIN_TRADES:
+        raise ValueError(f"ต้องมีเทรดที่ชนะ/แพ้ (ข้อมูลครบ) อย่างน้อย {MIN_TRADES} รายการ ตอนนี้มี {len(values)}")
+    return values
+
+
+@dataclass
+class BootstrapResult:
+    final_balances: np.ndarray   # พอร์ตสุดท้าย (num_paths,)
+    max_drawdowns: np.ndarray    # drawdown สูงสุดจากจุดสูงสุดเดิม เป็นสัดส่วน 0..1 (num_paths,)
+    underwater: np.ndarray       # ช่วงติดลบจากจุดสูงสุดนานสุด (เทรด) รวมช่วงที่ยังไม่กลับขึ้นตอนจบ (num_paths,)
+    recovered: np.ndarray        # จบที่จุดสูงสุดใหม่หรือกลับถึงจุดสูงสุดเดิมแล้ว (num_paths,)
+    floor_at: np.ndarray         # เทรดแรกที่พอร์ต <= พื้นทุน (-1 = ไม่แตะ) (num_paths,)
+    band_trades: np.ndarray      # เทรดที่เก็บ percentile band (num_points,)
+    bands: np.ndarray            # มูลค่าพอร์ตตาม percentile (len(percentiles), num_points)
+    percentiles: tuple
+    capital: float
+    floor: float
+    sample_size: int             # จำนวนเทรดจริงที่ใช้สุ่ม
+    block_length: int
+    seed: Optional[int] = None
+
+    @property
+    def floor_probability(self):
+        return float(np.mean(self.floor_at >= 0))
+
+    def summary(self):
+        """ตาราง quantile ของแต่ละตัววัด (แถวละตัววัด คอลัมน์ละ percentile)"""
+        import pandas as pd
+
+        metrics = {
+            "พอร์ตสุดท้าย (บาท)": self.final_balances,
+            "Max Drawdown (%)": self.max_drawdowns * 100,
+            "ติดลบจากจุดสูงสุดนานสุด (เทรด)": self.underwater,
+        }
+        table = pd.DataFrame(
+            [np.percentile(values, self.percentiles) for values in metrics.values()],
+            columns=[f"P{p:g}" for p in self.percentiles],
+        )
+        table.insert(0, "ตัววัด", list(metrics))
+        return table
+
+
+def _simulate_chunk(samples, compounding, capital, floor, horizon, block_length, streams, first_path, num_paths, band_trades):
+    """จำลองเส้นทาง first_path .. first_path+num_paths-1 คืนค่าต่อเส้นทาง + พอร์ต ณ band_trades"""
+    n = len(samples)
+    blocks = -(-horizon // block_length)
+    starts = np.empty((num_paths, blocks), dtype=np.int64)
+    for block in range(blocks):
+        draws = streams.uniforms("bootstrap", block, first_path, num_paths)
+        starts[:, block] = np.minimum((draws * n).astype(np.int64), n - 1)
+    index = (starts[:, :, None] + np.arange(block_length)) % n
+    steps = samples[index.reshape(num_paths, -1)[:, :horizon]]
+
+    equity = np.empty((num_paths, horizon + 1))
+    equity[:, 0] = capital
+    if compounding:
+        np.cumprod(np.maximum(1 + steps, 0.0), axis=1, out=equity[:, 1:])
+        equity[:, 1:] *= capital
+    else:
+        np.cumsum(steps, axis=1, out=equity[:, 1:])
+        equity[:, 1:] += capital
+    np.maximum(equity, 0.0, out=equity)  # พอร์ตไม่ติดลบ (หมดตัวแล้วหยุดที่ 0)
+
+    peak = np.maximum.accumulate(equity, axis=1)  # >= capital > 0
+    max_drawdowns = (1 - equity / peak).max(axis=1)
+    # ช่วงติดลบ: นับเทรดจากครั้งล่าสุดที่อยู่ที่จุดสูงสุด
+    trades = np.arange(horizon + 1)
+    at_peak = equity >= peak
+    last_peak = np.maximum.accumulate(np.where(at_peak, trades, 0), axis=1)
+    underwater = (trades - last_peak).max(axis=1)
+    hit = equity[:, 1:] <= floor
+    floor_at = np.where(hit.any(axis=1), hit.argmax(axis=1) + 1, -1)
+    return equity[:, -1].copy(), max_drawdowns, underwater, at_peak[:, -1].copy(), floor_at, equity[:, band_trades]
+
+
+def bootstrap_paths(
+    samples,
+    capital,
+    horizon,
+    num_paths=10_000,
+    mode="return",
+    block_length=None,
+    floor_percent=80.0,
+    percentiles=DEFAULT_PERCENTILES,
+    max_band_points=200,
+    seed=DEFAULT_SEED,
+    max_workers=None,
+):
+    """สุ่ม num_paths อนาคต x horizon เทรดจาก samples (ผลจาก journal_samples ด้วย mode เดียวกัน)
+
+    block_length=None ใช้ auto_block_length, พื้นทุน = floor_percent % ของ capital
+    """
+    samples = np.asarray(samples, dtype=float)
+    if len(samples) < MIN_TRADES:
+        raise ValueError(f"ต้องมีเทรดอย่างน้อย {MIN_TRADES} รายการ")
+    horizon, num_paths = int(horizon), int(num_paths)
+    if horizon < 1 or num_paths < 1:
+        raise ValueError("จำนวนเทรดข้างหน้าและจำนวนเส้นทางต้องมากกว่า 0")
+    if capital <= 0:
+        raise ValueError("ทุนเริ่มต้นต้องมากกว่า 0")
+    block_length = int(block_length) if block_length else auto_block_length(len(samples))
+    block_length = min(block_length, len(samples))
+    streams = seed if isinstance(seed, RandomStreams) else RandomStreams(seed)
+    floor = capital * floor_percent / 100
+
+    num_points = min(horizon + 1, max(2, int(max_band_points)))
+    band_trades = np.unique(np.linspace(0, horizon, num_points).round().astype(np.int64))
+    chunks = [(start, min(CHUNK_PATHS, num_paths - start)) for start in range(0, num_paths, CHUNK_PATHS)]
+
+    def run(chunk):
+        return _simulate_chunk(samples, mode != "pnl", capital, floor, horizon, block_length, streams, *chunk, band_trades)
+
+    workers = min(len(chunks), max_workers or os.cpu_count() or 1)
+    if workers == 1:
+        parts = list(map(run, chunks))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(run, chunks))
+    final, drawdowns, underwater, recovered, floor_at, band_values = (np.concatenate(values) for values in zip(*parts))
+
+    return BootstrapResult(
+        final_balances=final,
+        max_drawdowns=drawdowns,
+        underwater=underwater,
+        recovered=recovered,
+        floor_at=floor_at,
+        band_trades=band_trades,
+        bands=np.percentile(band_values, percentiles, axis=0),
+        percentiles=tuple(percentiles),
+        capital=float(capital),
+        floor=floor,
+        sample_size=len(samples),
+        block_length=block_length,
+        seed=streams.seed,
+    )
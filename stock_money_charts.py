@@ -0,0 +1,129 @@
+import io
+
+import numpy as np
+
+# ===================== Equity curve rendering =====================
+# วาดกราฟด้วย matplotlib.figure.Figure โดยตรง (ไม่ผ่าน pyplot) จึงไม่มี state ค้างข้าม rerun
+# แล้วคืนเป็น PNG bytes ให้แอปเก็บใน st.cache_data ตาม "เวอร์ชัน" ของประวัติ
+# matplotlib (~0.5 วินาที) ถูก import ตอนวาดกราฟแรกเท่านั้น แอปที่ยังไม่มีอะไรให้วาดจึงเปิดเร็วขึ้น
+# เส้นที่ยาวเกิน max_points จะถูกย่อแบบ min/max ต่อ bucket (จุดต่ำสุด/สูงสุดยังอยู่ครบ เห็น drawdown ถูกต้อง)
+# เวลาวาดจึงคงที่ไม่ว่าประวัติจะยาว 100 หรือ 100k ไม้
+
+DEFAULT_MAX_POINTS = 2_000
+MARKER_LIMIT = 200  # จุดน้อยกว่านี้ถึงจะแสดง marker
+DPI = 200  # เท่ากับค่าเริ่มต้นของ st.pyplot
+
+
+def minmax_downsample(x, y, max_points=DEFAULT_MAX_POINTS):
+    """ย่อเส้นให้เหลือไม่เกิน max_points จุด: เก็บจุดแรก/สุดท้าย + จุดต่ำสุดและสูงสุดของแต่ละ bucket ตามลำดับเวลา"""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points or n < 3:
+        return x, y
+    inner = y[1:-1]
+    size = -(-len(inner) // max(1, (max_points - 2) // 2))
+    buckets = -(-len(inner) // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:len(inner)] = inner
+    grid = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size + 1
+    lo = offsets + np.nanargmin(grid, axis=1)
+    hi = offsets + np.nanargmax(grid, axis=1)
+    idx = np.concatenate(([0], np.sort(np.stack([lo, hi], axis=1), axis=1).ravel(), [n - 1]))
+    idx = idx[np.r_[True, np.diff(idx) != 0]]
+    return x[idx], y[idx]
+
+
+def _figure(**kwargs):
+    from matplotlib.figure import Figure
+
+    return Figure(**kwargs)
+
+
+def _to_png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=DPI, bbox_inches="tight")
+    fig.clear()
+    return buf.getvalue()
+
+
+def equity_curve_png(x, y, title="การเติบโตของพอร์ต", xlabel="ไม้ที่", ylabel="มูลค่าพอร์ต (บาท)",
+                     max_points=DEFAULT_MAX_POINTS):
+    x, y = minmax_downsample(x, y, max_points)
+    fig = _figure()
+    ax = fig.subplots()
+    ax.plot(x, y, marker="o" if len(y) <= MARKER_LIMIT else None)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if title:
+        ax.set_title(title)
+    ax.grid(True)
+    return _to_png(fig)
+
+
+def fan_chart_png(trades, bands, baseline, title):
+    """กราฟช่วงเปอร์เซ็นไทล์ของ Monte Carlo: bands = (p5, p25, p50, p75, p95)"""
+    p5, p25, p50, p75, p95 = bands
+    fig = _figure()
+    ax = fig.subplots()
+    ax.fill_between(trades, p5, p95, alpha=0.2, label="5%-95%")
+    ax.fill_between(trades, p25, p75, alpha=0.4, label="25%-75%")
+    ax.plot(trades, p50, label="มัธยฐาน")
+    ax.axhline(baseline, color="gray", linestyle="--", linewidth=1)
+    ax.set_xlabel("ไม้ที่")
+    ax.set_ylabel("มูลค่าพอร์ต (บาท)")
+    ax.set_title(title)
+    ax.legend()
+    ax.grid(True)
+    return _to_png(fig)
+
+
+def strategy_bands_png(trades, bands, names, baseline, title):
+    """มัธยฐาน + ช่วง 25%-75% ของหลายกลยุทธ์บนกราฟเดียว: bands[i] = (p5, p25, p50, p75, p95) ของกลยุทธ์ i
+
+    แกน y เป็น symlog (เส้นตรงต่ำกว่า baseline, log เหนือกว่า) กลยุทธ์ที่โตหลายเท่าจะไม่บังเส้นอื่น
+    """
+    fig = _figure()
+    ax = fig.subplots()
+    for name, (_, p25, p50, p75, _) in zip(names, bands):
+        line, = ax.plot(trades, p50, label=name)
+        ax.fill_between(trades, p25, p75, color=line.get_color(), alpha=0.15)
+    ax.axhline(baseline, color="gray", linestyle="--", linewidth=1)
+    ax.set_yscale("symlog", linthresh=baseline)
+    ax.set_ylim(bottom=0)  # พอร์ตไม่ติดลบ (เส้นทางหยุดเมื่อทุนไม่พอวางเดิมพัน)
+    ax.set_xlabel("ไม้ที่")
+    ax.set_ylabel("มูลค่าพอร์ต (บาท)")
+    ax.set_title(title)
+    ax.legend()
+    ax.grid(True)
+    return _to_png(fig)
+
+
+def terminal_wealth_png(final_balances, names, baseline, title):
+    """การกระจายพอร์ตสุดท้ายของแต่ละกลยุทธ์ (กล่อง 25%-75%, หนวด 5%-95%)"""
+    fig = _figure()
+    ax = fig.subplots()
+    ax.boxplot(list(final_balances), whis=(5, 95), showfliers=False, showmeans=True)
+    ax.set_xticks(range(1, len(names) + 1), names, rotation=20, ha="right")
+    ax.axhline(baseline, color="gray", linestyle="--", linewidth=1)
+    ax.set_yscale("symlog", linthresh=baseline)
+    ax.set_ylim(bottom=0)  # พอร์ตไม่ติดลบ (เส้นทางหยุดเมื่อทุนไม่พอวางเดิมพัน)
+    ax.set_ylabel("พอร์ตสุดท้าย (บาท)")
+    ax.set_title(title)
+    ax.grid(True, axis="y")
+    return _to_png(fig)
+
+
+def heatmap_png(matrix, x_values, y_values, xlabel, ylabel, title, cmap="viridis"):
+    """matrix[i, j] = ค่าที่ y_values[i], x_values[j]"""
+    fig = _figure(figsize=(max(6.4, 0.45 * len(x_values)), max(4.8, 0.3 * len(y_values))))
+    ax = fig.subplots()
+    image = ax.imshow(np.asarray(matrix, dtype=float), origin="lower", aspect="auto", cmap=cmap)
+    fig.colorbar(image, ax=ax)
+    ax.set_xticks(range(len(x_values)), [f"{v:g}" for v in x_values], rotation=90)
+    ax.set_yticks(range(len(y_values)), [f"{v:g}" for v in y_values])
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    return _to_png(fig)
@@ -0,0 +1,265 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from stock_money_montecarlo import DEFAULT_PERCENTILES
+from stock_money_rng import RandomStreams
+
+# ===================== เปรียบเทียบกลยุทธ์เดินเงิน =====================
+# รันหลายกติกาการวางเงินกับผลลัพธ์ชุดเดียวกัน (common random numbers) ในรอบเดียว
+# สถานะทุกกลยุทธ์ x ทุกเส้นทางเป็นเมทริกซ์ (num_policies, num_paths) วนตามไม้ครั้งเดียว แต่ละไม้คำนวณทุกช่องพร้อมกัน
+# - ชดทุน + เป้ากำไร: กติกาเดียวกับ stock_money_montecarlo.py (ผลตรงกับ simulate_recovery_paths ที่ seed เดียวกัน)
+# - fixed fractional: เดิมพัน = % ของพอร์ตปัจจุบัน (แนวเดียวกับ stock_money_management.py)
+# - fractional Kelly: fixed fractional ที่สัดส่วน = scale * (p - (1 - p) / odds) (ถ้า <= 0 ไม่เข้าเทรดเลย)
+# - anti-martingale: ชนะแล้วคูณเดิมพัน, แพ้หรือชนะติดครบ max_steps ไม้กลับไปเดิมพันไม้แรก
+# เส้นทาง "ทุนหมด" เมื่อพอร์ตไม่พอวางเดิมพันไม้ถัดไป หรือเดิมพันต่ำกว่า min_bet (ส่งคำสั่งขั้นต่ำไม่ได้) แล้วหยุดเทรด
+# ผลลัพธ์มาจาก stream "monte_carlo" (สุ่ม) หรือรหัสผลลัพธ์จริงหลายชุด (0 = -, 1 = ชนะ, 2 = แพ้ ไม้ "-" ไม่เปลี่ยนอะไร)
+
+RECOVERY, FRACTIONAL, ANTI_MARTINGALE = 0, 1, 2
+
+
+@dataclass(frozen=True)
+class Policy:
+    name: str
+    kind: int
+    base_bet: float = 0.0       # เดิมพันไม้แรก (ชดทุน / anti-martingale)
+    target_profit: float = 0.0  # กำไรต่อรอบ (ชดทุน)
+    fraction: float = 0.0       # สัดส่วนของพอร์ตต่อไม้ (fixed fractional / Kelly)
+    multiplier: float = 1.0     # ตัวคูณเดิมพันหลังชนะ (anti-martingale)
+    max_steps: int = 0          # ชนะติดครบกี่ไม้แล้วเก็บกำไร กลับไปเดิมพันไม้แรก (anti-martingale)
+
+
+def recovery_policy(first_bet, target_profit, name="ชดทุน + เป้ากำไร"):
+    return Policy(name, RECOVERY, base_bet=float(first_bet), target_profit=float(target_profit))
+
+
+def fixed_fractional_policy(risk_percent, name=None):
+    return Policy(name or f"Fixed {risk_percent:g}%", FRACTIONAL, fraction=risk_percent / 100)
+
+
+def kelly_fraction(win_prob, odds):
+    """สัดส่วน Kelly เต็มของเกมที่ชนะได้ odds เท่าของเดิมพัน (ติดลบ = ไม่ควรเข้าเทรด)"""
+    return win_prob - (1 - win_prob) / odds
+
+
+def kelly_policy(win_prob, odds, scale=0.5, name=None):
+    fraction = max(0.0, scale * kelly_fraction(win_prob, odds))
+    return Policy(name or f"Kelly x{scale:g} ({fraction * 100:.2f}%)", FRACTIONAL, fraction=fraction)
+
+
+def anti_martingale_policy(first_bet, multiplier=2.0, max_steps=3, name=None):
+    return Policy(
+        name or f"Anti-martingale x{multiplier:g} ({max_steps} ไม้)", ANTI_MARTINGALE,
+        base_bet=float(first_bet), multiplier=float(multiplier), max_steps=int(max_steps),
+    )
+
+
+@dataclass
+class ComparisonResult:
+    names: tuple
+    final_balances: np.ndarray  # พอร์ตสุดท้าย (num_policies, num_paths)
+    ruined_at: np.ndarray       # ไม้ที่ทุนหมด (-1 = ไม่หมด) (num_policies, num_paths)
+    max_drawdowns: np.ndarray   # drawdown สูงสุดจากจุดสูงสุดเดิม เป็นสัดส่วน 0..1 (num_policies, num_paths)
+    band_trades: np.ndarray     # ไม้ที่เก็บ percentile band (num_points,)
+    bands: np.ndarray           # มูลค่าพอร์ตตาม percentile (num_policies, len(percentiles), num_points)
+    percentiles: tuple
+    capital: float
+    seed: Optional[int] = None  # seed ที่ใช้จริง (None = ผลลัพธ์จริงที่ส่งเข้ามา)
+
+    @property
+    def ruin_probabilities(self):
+        return (self.ruined_at >= 0).mean(axis=1)
+
+    def summary(self):
+        """ตารางเทียบกลยุทธ์ (แถวละกลยุทธ์)"""
+        import pandas as pd
+
+        final = self.final_balances
+        p5, p50, p95 = np.percentile(final, [5, 50, 95], axis=1)
+        dd50, dd95 = np.percentile(self.max_drawdowns, [50, 95], axis=1) * 100
+        return pd.DataFrame({
+            "กลยุทธ์": self.names,
+            "โอกาสทุนหมด (%)": self.ruin_probabilities * 100,
+            "โอกาสจบกำไร (%)": (final > self.capital).mean(axis=1) * 100,
+            "พอร์ตเฉลี่ย": final.mean(axis=1),
+            "พอร์ต P5": p5,
+            "พอร์ตมัธยฐาน": p50,
+            "พอร์ต P95": p95,
+            "Max DD มัธยฐาน (%)": dd50,
+            "Max DD P95 (%)": dd95,
+        })
+
+
+def compare_policies(policies, capital, odds, outcomes, min_bet=1.0, percentiles=DEFAULT_PERCENTILES, max_band_points=200):
+    """รันทุก policy กับ outcomes ชุดเดียวกัน
+
+    outcomes: เมทริกซ์รหัสผลลัพธ์ (num_trades, num_paths) หรือ iterable ของแถวละไม้ที่มี len() (เช่น SimulatedOutcomes)
+    คืน ComparisonResult (แถวเรียงตาม policies, เก็บ band ไม่เกิน max_band_points จุดต่อกลยุทธ์)
+    """
+    if odds <= 0:
+        raise ValueError("odds ต้องมากกว่า 0")
+    if not policies:
+        raise ValueError("ต้องมีอย่างน้อยหนึ่งกลยุทธ์")
+    num_trades = len(outcomes)
+    rows = iter(outcomes)
+    first = next(rows, None)
+    num_paths = 0 if first is None else len(first)
+
+    # เรียงแถวตามชนิดกลยุทธ์ ให้แต่ละชนิดเป็นช่วงติดกัน (slice เป็น view แก้ in-place ได้ ไม่ต้องคัดลอกทุกไม้)
+    order = sorted(range(len(policies)), key=lambda i: policies[i].kind)
+    ordered = [policies[i] for i in order]
+    kinds = [policy.kind for policy in ordered]
+    rec, frac, anti = (slice(kinds.index(k), len(kinds) - kinds[::-1].index(k)) if k in kinds else slice(0, 0)
+                       for k in (RECOVERY, FRACTIONAL, ANTI_MARTINGALE))
+
+    def column(attr, dtype=float):
+        return np.array([getattr(policy, attr) for policy in ordered], dtype=dtype)[:, None]
+
+    base, target, fraction = column("base_bet"), column("target_profit"), column("fraction")
+    trades = ~((column("kind", np.int64) == FRACTIONAL) & (fraction <= 0))  # Kelly ติดลบ: ไม่เข้าเทรด (ไม่ถือว่าทุนหมด)
+    # anti-martingale: ตารางเดิมพันตามจำนวนชนะติด 0..max_steps-1 (แทนการยกกำลังทุกไม้)
+    anti_policies = ordered[anti]
+    anti_steps = np.array([[max(policy.max_steps, 1)] for policy in anti_policies], dtype=np.int64)
+    width = int(anti_steps.max()) if len(anti_steps) else 1
+    anti_ladder = np.array([[policy.base_bet * policy.multiplier ** k for k in range(width)] for policy in anti_policies])
+
+    shape = (len(ordered), num_paths)
+    bal = np.full(shape, float(capital))
+    bet = np.where(column("kind", np.int64) == FRACTIONAL, fraction * bal, base)
+    loss_sum = np.zeros(shape)
+    streak = np.zeros(shape)
+    peak = bal.copy()
+    max_dd = np.zeros(shape)
+    ruined_at = np.full(shape, -1, dtype=np.int64)
+    # ชนะ / แพ้ / ยังเทรดอยู่ เก็บเป็น 0.0 / 1.0 แล้วใช้คูณ-บวกแทน np.where หรือ where=
+    # (mask สุ่มทำให้ select ช้ากว่าเลขคณิตหลายสิบเท่า) คูณ 0 / 1 และบวก 0 ไม่เปลี่ยนค่า ผลจึงตรงกับแบบแยกกรณีทุกบิต
+    # buffer ทุกตัวจองครั้งเดียวใช้ซ้ำทุกไม้ (อาร์เรย์ชั่วคราวขนาดนี้ทุก op ช้ากว่าการคำนวณจริง)
+    live = np.ones(shape)
+    win, loss, scratch, scratch2 = (np.empty(shape) for _ in range(4))
+    dead, under = np.empty(shape, dtype=bool), np.empty(shape, dtype=bool)
+
+    def check_ruin(trade):
+        # ทุนไม่พอวางเดิมพันไม้ถัดไป หรือเดิมพันต่ำกว่าขั้นต่ำ -> หยุดเทรด
+        np.greater(bet, bal, out=dead)
+        np.less(bet, min_bet, out=under)
+        np.logical_or(dead, under, out=dead)
+        np.logical_and(dead, live > 0, out=dead)
+        np.logical_and(dead, trades, out=dead)
+        if dead.any():
+            ruined_at[dead] = trade
+            live[dead] = 0.0
+
+    check_ruin(0)
+
+    num_points = min(num_trades + 1, max(2, int(max_band_points)))
+    band_trades = np.unique(np.linspace(0, num_trades, num_points).round().astype(np.int64))
+    bands = np.empty((len(ordered), len(percentiles), len(band_trades)))
+    bands[:, :, 0] = capital
+    band_pos = 1
+
+    trade = 0
+    row = first
+    while row is not None:
+        trade += 1
+        codes = np.asarray(row)
+        # ไม้ "-" และเส้นทางที่ทุนหมดแล้ว: win = loss = 0 ไม่เปลี่ยนพอร์ต / เดิมพัน
+        np.multiply(live, codes == 1, out=win)
+        np.multiply(live, codes == 2, out=loss)
+        # พอร์ต += เดิมพัน * (odds ถ้าชนะ, -1 ถ้าแพ้)
+        np.multiply(win, odds, out=scratch)
+        np.subtract(scratch, loss, out=scratch)
+        np.multiply(scratch, bet, out=scratch)
+        np.add(bal, scratch, out=bal)
+
+        if rec.stop > rec.start:
+            w, l, b, ls = win[rec], loss[rec], bet[rec], loss_sum[rec]
+            keep, tmp = scratch[rec], scratch2[rec]
+            # ขาดทุนสะสม = (เดิม + เดิมพันถ้าแพ้) แล้วล้างเป็น 0 ถ้าชนะ
+            np.multiply(b, l, out=tmp)
+            np.add(ls, tmp, out=ls)
+            np.subtract(1.0, w, out=keep)
+            np.multiply(ls, keep, out=ls)
+            # เดิมพัน = เดิม (ไม้ "-") + ceil((ขาดทุนสะสม + เป้า) / odds) ถ้าแพ้ + first_bet ถ้าชนะ
+            np.add(ls, target[rec], out=tmp)
+            np.divide(tmp, odds, out=tmp)
+            np.ceil(tmp, out=tmp)
+            np.multiply(tmp, l, out=tmp)
+            np.subtract(keep, l, out=keep)
+            np.multiply(b, keep, out=b)
+            np.add(b, tmp, out=b)
+            np.multiply(w, base[rec], out=tmp)
+            np.add(b, tmp, out=b)
+        if frac.stop > frac.start:
+            np.multiply(fraction[frac], bal[frac], out=bet[frac])
+        if anti.stop > anti.start:
+            # ชนะติด = (เดิม + 1 ถ้าชนะ) แล้วเป็น 0 ถ้าแพ้ หรือครบ max_steps
+            s = streak[anti]
+            np.add(s, win[anti], out=s)
+            np.multiply(s, 1.0 - loss[anti], out=s)
+            np.multiply(s, s < anti_steps, out=s)
+            bet[anti] = np.take_along_axis(anti_ladder, s.astype(np.intp), axis=1)
+
+        check_ruin(trade)
+        np.maximum(peak, bal, out=peak)
+        np.divide(bal, peak, out=scratch)
+        np.subtract(1, scratch, out=scratch)
+        np.maximum(max_dd, scratch, out=max_dd)
+
+        if band_pos < len(band_trades) and band_trades[band_pos] == trade:
+            bands[:, :, band_pos] = np.percentile(bal, percentiles, axis=1).T
+            band_pos += 1
+        row = next(rows, None)
+
+    restore = np.argsort(order)  # กลับไปเรียงตาม policies ที่ส่งเข้ามา
+    return ComparisonResult(
+        names=tuple(policy.name for policy in policies),
+        final_balances=bal[restore],
+        ruined_at=ruined_at[restore],
+        max_drawdowns=max_dd[restore],
+        band_trades=band_trades,
+        bands=bands[restore],
+        percentiles=tuple(percentiles),
+        capital=float(capital),
+    )
+
+
+class SimulatedOutcomes:
+    """รหัสผลลัพธ์ทีละไม้จาก stream "monte_carlo" (ค่าสุ่มตำแหน่งเดียวกับ simulate_recovery_paths ไม่ต้องเก็บทั้งเมทริกซ์)"""
+
+    def __init__(self, num_trades, num_paths, win_prob=0.5, seed=None):
+        self.streams = seed if isinstance(seed, RandomStreams) else RandomStreams(seed)
+        self.num_trades = int(num_trades)
+        self.num_paths = int(num_paths)
+        self.win_prob = win_prob
+
+    def __len__(self):
+        return self.num_trades
+
+    def __iter__(self):
+        for trade in range(1, self.num_trades + 1):
+            yield np.where(self.streams.uniforms("monte_carlo", trade, 0, self.num_paths) < self.win_prob, 1, 2).astype(np.int8)
+
+
+def compare_simulated(policies, capital, odds, num_trades, num_paths=10_000, win_prob=0.5, seed=None, **kwargs):
+    """เทียบกลยุทธ์บนเส้นทางสุ่ม num_paths เส้น (seed เดียวกันได้ผลเดิมทุกครั้ง)"""
+    outcomes = SimulatedOutcomes(num_trades, num_paths, win_prob, seed)
+    result = compare_policies(policies, capital, odds, outcomes, **kwargs)
+    result.seed = outcomes.streams.seed
+    return result
+
+
+def outcome_matrix(sequences):
+    """รวมรหัสผลลัพธ์หลายชุด (ยาวไม่เท่ากันได้) เป็นเมทริกซ์ (ไม้, ชุด) ช่องที่เกินความยาวชุดนั้นเป็น 0 (-)"""
+    sequences = [np.asarray(sequence, dtype=np.int8) for sequence in sequences]
+    matrix = np.zeros((max((len(s) for s in sequences), default=0), len(sequences)), dtype=np.int8)
+    for path, sequence in enumerate(sequences):
+        matrix[:len(sequence), path] = sequence
+    return matrix
+
+
+def observed_win_rate(outcomes):
+    """สัดส่วนชนะจากไม้ที่มีผล (ไม่นับ -) ใช้เป็น p ของ Kelly เมื่อเทียบกับผลลัพธ์จริง"""
+    codes = np.asarray(outcomes)
+    decided = np.count_nonzero(codes)
+    return float(np.count_nonzero(codes == 1) / decided) if decided else 0.0
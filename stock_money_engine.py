@@ -0,0 +1,202 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from stock_money_ladder import bet_ladder
+
+# ===================== Core engine (ไม่มี UI) =====================
+# กติกาเดินเงินที่เคยถูกก๊อปไว้ในทุกแอป รวมไว้ที่เดียว เรียกได้จาก Streamlit, สคริปต์ หรือ benchmark
+# - กติกาเดิมพันชดทุน: ชนะ -> กลับไป first_bet, แพ้ -> ceil((ขาดทุนสะสม + target_profit) / odds)
+# - replay ประวัติผลลัพธ์ทั้งชุด (คืน rows + checkpoint ต่อแถวแบบเดียวกับ stock_money_history.py)
+# - จำนวนไม้สูงสุดที่ทุนรองรับเมื่อแพ้ติด
+# - ขนาดการซื้อตามความเสี่ยงต่อเทรด (stock_money_management.py) ทั้งทีละรายการและทั้ง watchlist
+
+
+def next_bet(bet, loss_sum, result, first_bet, target_profit, odds):
+    """คืน (เดิมพันไม้ถัดไป, ขาดทุนสะสมใหม่) หลังผลลัพธ์ result ของไม้ที่เดิมพัน bet"""
+    if result == "ชนะ":
+        return first_bet, 0
+    if result == "แพ้":
+        loss_sum += bet
+        return (math.ceil((loss_sum + target_profit) / odds) if odds > 0 else bet), loss_sum
+    return bet, loss_sum
+
+
+def replay_results(results, capital, first_bet, target_profit, odds, start=None, with_current_bet=False):
+    """replay ผลลัพธ์ (list ของ dict ที่มี ไม้/Pattern/ผลลัพธ์) คืน (bal, bet, loss_sum, rows, checkpoints)
+
+    start = checkpoint (balance, bet, loss_sum) ที่จะเริ่มต่อ (ค่าเริ่มต้น = ต้นเซสชัน)
+    with_current_bet=True ให้แต่ละแถวแสดงทั้งเดิมพันของไม้นั้นและไม้ถัดไป (แอป Next Bet)
+    """
+    bal, bet, loss_sum = start if start is not None else (capital, first_bet, 0)
+    rows = []
+    checkpoints = []
+    for row in results:
+        res = row.get("ผลลัพธ์", "-")
+        current_bet = bet
+        if res == "ชนะ":
+            bal += bet * odds
+            bet, loss_sum = first_bet, 0
+        elif res == "แพ้":
+            bal -= bet
+            loss_sum += bet
+            bet = math.ceil((loss_sum + target_profit) / odds) if odds > 0 else bet
+        if with_current_bet:
+            rows.append({
+                "ไม้": row.get("ไม้"),
+                "Pattern": row.get("Pattern", "พุธ"),
+                "ผลลัพธ์": res,
+                "เงินเดิมพัน(ปัจจุบัน)": current_bet,
+                "เงินเดิมพันไม้ถัดไป": bet,
+                "พอร์ต": round(bal, 2),
+            })
+        else:
+            rows.append({
+                "ไม้": row.get("ไม้"),
+                "Pattern": row.get("Pattern", "พุธ"),
+                "ผลลัพธ์": res,
+                "เงินเดิมพัน": bet,
+                "พอร์ต": round(bal, 2),
+            })
+        checkpoints.append((bal, bet, loss_sum))
+    return bal, bet, loss_sum, rows, checkpoints
+
+
+# ===================== Vectorized replay (กรอกหลายไม้พร้อมกัน) =====================
+# เดิมพันของแต่ละไม้ขึ้นกับแค่ "แพ้ติดมาแล้วกี่ไม้" นับจากจุดเริ่ม (ก่อนชนะครั้งแรก) หรือจากชนะครั้งล่าสุด
+# จึงคำนวณขั้นเดิมพันของช่วงแพ้ติดยาวสุดไว้ครั้งเดียว (ด้วย next_bet ทีละขั้น เลขจึงตรงกับ replay_results ทุกบิต)
+# แล้วหาความลึกของทุกไม้ด้วย cumsum / maximum.accumulate และพอร์ตด้วย cumsum ของกำไร/ขาดทุน
+RESULT_CODES = {"-": 0, "ชนะ": 1, "แพ้": 2}  # รหัสเดียวกับคอลัมน์ ผลลัพธ์ ใน ResultsStore
+
+
+def _loss_levels(bet, loss_sum, depth, first_bet, target_profit, odds):
+    """เดิมพัน / ขาดทุนสะสม เมื่อแพ้ติดต่อจาก (bet, loss_sum) ไปอีก 0..depth ไม้"""
+    bets, losses = [bet], [loss_sum]
+    for _ in range(depth):
+        bet, loss_sum = next_bet(bet, loss_sum, "แพ้", first_bet, target_profit, odds)
+        bets.append(bet)
+        losses.append(loss_sum)
+    return np.array(bets, dtype=float), np.array(losses, dtype=float)
+
+
+def replay_outcomes(outcomes, capital, first_bet, target_profit, odds, start=None):
+    """replay รหัสผลลัพธ์ทั้งชุด (0 = -, 1 = ชนะ, 2 = แพ้) แบบ vectorized ผลตรงกับ replay_results
+
+    คืน (bets, next_bets, balances, loss_sums) เป็น array ยาวเท่า outcomes:
+    เดิมพันของไม้นั้น, เดิมพันไม้ถัดไป, พอร์ตหลังไม้นั้น, ขาดทุนสะสมหลังไม้นั้น
+    """
+    codes = np.asarray(outcomes, dtype=np.int8)
+    bal, bet, loss_sum = start if start is not None else (capital, first_bet, 0)
+    win, loss = codes == 1, codes == 2
+
+    # ช่วงแรก (จนถึงชนะครั้งแรก) ต่อจาก checkpoint ที่อาจอยู่กลางช่วงแพ้ติด ช่วงหลังเริ่มจาก first_bet เสมอ
+    wins = np.flatnonzero(win)
+    head = int(wins[0]) + 1 if len(wins) else len(codes)
+    lost = np.cumsum(loss)
+    reset = np.maximum.accumulate(np.where(win, lost, 0))  # แพ้สะสม ณ ชนะครั้งล่าสุด
+    depth = lost - loss - np.concatenate(([0], reset[:-1]))  # แพ้ติดมาแล้วก่อนไม้นั้น
+    after = np.where(win, 0, depth + loss)
+
+    bets = np.empty(len(codes))
+    next_bets = np.empty(len(codes))
+    loss_sums = np.empty(len(codes))
+    for part, level_start in ((slice(0, head), (bet, loss_sum)), (slice(head, None), (first_bet, 0))):
+        d, a, w = depth[part], after[part], win[part]
+        if not len(d):
+            continue
+        level_bets, level_losses = _loss_levels(*level_start, int(a.max()), first_bet, target_profit, odds)
+        bets[part] = level_bets[d]
+        next_bets[part] = np.where(w, first_bet, level_bets[a])
+        loss_sums[part] = np.where(w, 0, level_losses[a])
+
+    change = np.where(win, bets * odds, np.where(loss, -bets, 0.0))
+    balances = np.cumsum(np.concatenate(([bal], change)))[1:]
+    return bets, next_bets, balances, loss_sums
+
+
+def max_losing_streak(capital, first_bet, target_profit, odds):
+    """จำนวนไม้ที่แพ้ติดกันได้ก่อนทุนหมด"""
+    return bet_ladder(capital, first_bet, target_profit, odds).max_streak()
+
+
+@dataclass(frozen=True)
+class PositionPlan:
+    position_size: float
+    rr_ratio: float
+    profit_loss: float
+    new_capital: float
+
+
+def plan_position(capital, risk_percent, entry, stop_loss, target, result="-"):
+    """ขนาดการซื้อจากความเสี่ยงต่อเทรด (% ของทุน) และกำไร/ขาดทุนตามผลลัพธ์"""
+    if entry == stop_loss:
+        raise ValueError("ราคาซื้อและ Stop Loss ต้องไม่เท่ากัน!")
+    risk_per_trade = capital * (risk_percent / 100)
+    risk_per_share = abs(entry - stop_loss)
+    position_size = risk_per_trade / risk_per_share
+    rr_ratio = abs(target - entry) / risk_per_share
+    profit_loss = 0
+    if result == "ชนะ":
+        profit_loss = (target - entry) * position_size
+    elif result == "แพ้":
+        profit_loss = (stop_loss - entry) * position_size
+    return PositionPlan(position_size, rr_ratio, profit_loss, capital + profit_loss)
+
+
+# ===================== Batch position sizing (watchlist) =====================
+BOARD_LOT = 100  # หน่วยการซื้อขายขั้นต่ำของหุ้นไทย
+WATCHLIST_COLUMNS = ["Symbol", "Entry", "Stop Loss", "Target"]
+# คอลัมน์เสริมต่อแถว (ถ้าไม่มีใช้ค่ารวมที่ส่งเข้ามา)
+CAPITAL_COLUMN = "ทุน"
+RISK_COLUMN = "ความเสี่ยง (%)"
+
+
+def _column(watchlist, name, default):
+    if name in watchlist:
+        return watchlist[name].fillna(default).to_numpy(dtype=float)
+    return np.full(len(watchlist), float(default))
+
+
+def plan_positions(watchlist, capital, risk_percent, board_lot=BOARD_LOT, max_total_risk_percent=None):
+    """คำนวณขนาดการซื้อของทั้ง watchlist ในรอบเดียวด้วย NumPy
+
+    watchlist: DataFrame ที่มีคอลัมน์ Entry, Stop Loss, Target (และ ทุน / ความเสี่ยง (%) ต่อแถวได้)
+    จำนวนหุ้นปัดลงเป็นทวีคูณของ board_lot; ถ้าความเสี่ยงรวมเกิน max_total_risk_percent ของ capital
+    จะลดทุกตำแหน่งลงสัดส่วนเดียวกันแล้วปัดลงเป็น lot อีกครั้ง (ความเสี่ยงรวมจึงไม่เกินเพดาน)
+    แถวที่ Entry = Stop Loss หรือข้อมูลไม่ครบได้ 0 หุ้น
+    """
+    missing = [name for name in WATCHLIST_COLUMNS[1:] if name not in watchlist]
+    if missing:
+        raise ValueError("watchlist ต้องมีคอลัมน์: " + ", ".join(missing))
+    entry = watchlist["Entry"].to_numpy(dtype=float)
+    stop_loss = watchlist["Stop Loss"].to_numpy(dtype=float)
+    target = watchlist["Target"].to_numpy(dtype=float)
+    row_capital = _column(watchlist, CAPITAL_COLUMN, capital)
+    row_risk = _column(watchlist, RISK_COLUMN, risk_percent)
+    lot = max(1, int(board_lot))
+
+    risk_per_share = np.abs(entry - stop_loss)
+    budget = row_capital * row_risk / 100
+    valid = (risk_per_share > 0) & np.isfinite(risk_per_share) & np.isfinite(budget) & np.isfinite(target)
+    safe_risk = np.where(valid, risk_per_share, 1.0)
+    raw_size = np.where(valid, budget / safe_risk, 0.0)
+    # บวก epsilon กัน 99.99999 lot จากทศนิยมถูกปัดเหลือ 99
+    shares = np.floor(raw_size / lot + 1e-9) * lot
+    risk = shares * np.where(valid, risk_per_share, 0.0)
+
+    total_risk = risk.sum()
+    if max_total_risk_percent is not None and total_risk > 0:
+        cap = capital * max_total_risk_percent / 100
+        if total_risk > cap:
+            shares = np.floor(shares * (cap / total_risk) / lot + 1e-9) * lot
+            risk = shares * np.where(valid, risk_per_share, 0.0)
+
+    planned = watchlist.copy()
+    planned["ขนาดซื้อ (ไม่ปัด)"] = raw_size
+    planned["ขนาดซื้อ"] = shares.astype(np.int64)
+    planned["R:R"] = np.where(valid, np.abs(target - entry) / safe_risk, np.nan)
+    planned["ความเสี่ยง (บาท)"] = risk
+    planned["มูลค่าซื้อ (บาท)"] = shares * np.where(valid, entry, 0.0)
+    planned["กำไรเป้าหมาย (บาท)"] = shares * np.where(valid, target - entry, 0.0)
+    return planned
@@ -0,0 +1,144 @@
+# ===================== History: checkpoint / Undo / Redo =====================
+# ทุกแถวใน state["results"] มี checkpoint (balance, bet_amount, loss_streak_amount) หลังบันทึกแถวนั้น
+# เก็บคู่กันใน state["checkpoints"] (tuple แก้ไขไม่ได้) ทำให้ Undo/Redo แค่ pop/push ไม่ต้อง replay ประวัติ
+# state["hashes"] เก็บ hash ต่อเนื่องของ (ไม้, Pattern, ผลลัพธ์) ใช้เทียบ prefix ของประวัติ (ดู stock_money_replay.py)
+# state ใช้ได้ทั้ง st.session_state และ dict ธรรมดา; state["results"] เป็น list ของ dict หรือ ResultsStore
+# และ state["checkpoints"] เป็น list ของ tuple หรือ CheckpointStore ก็ได้ (stock_money_results.py)
+# บันทึกหลายไม้พร้อมกัน (record_trades) เก็บช่วงแถวไว้ใน state["batches"] ให้ undo_batch / redo_batch ย้อน/ทำซ้ำทั้งชุดได้
+# state["redo_batches"] = (ความยาว redo_stack หลังย้อนชุดนั้น, จำนวนไม้) ช่วงที่ถูกแก้/ย้อนไปบางส่วนแล้วจะหลุดจากการเป็นชุดเอง
+
+
+def row_hash(prev_hash, row):
+    return hash((prev_hash, row.get("ไม้"), row.get("Pattern"), row.get("ผลลัพธ์")))
+
+
+def chain_hashes(rows, prev_hash=0):
+    hashes = []
+    for row in rows:
+        prev_hash = row_hash(prev_hash, row)
+        hashes.append(prev_hash)
+    return hashes
+
+
+def last_hash(state):
+    return state["hashes"][-1] if state["hashes"] else 0
+
+
+def apply_checkpoint(state, checkpoint):
+    state["balance"], state["bet_amount"], state["loss_streak_amount"] = checkpoint
+
+
+def current_checkpoint(state, initial):
+    return state["checkpoints"][-1] if state["checkpoints"] else initial
+
+
+def record_trade(state, row, checkpoint):
+    """บันทึกแถวใหม่พร้อม checkpoint (ล้าง redo เพราะประวัติแยกสายแล้ว)"""
+    state["hashes"].append(row_hash(last_hash(state), row))
+    state["results"].append(row)
+    state["checkpoints"].append(tuple(checkpoint))
+    state["redo_stack"].clear()
+    state["redo_batches"].clear()
+    apply_checkpoint(state, checkpoint)
+
+
+def record_trades(state, rows, checkpoints):
+    """บันทึกหลายแถวเป็น state transition เดียว (ย้อนทั้งชุดได้ด้วย undo_batch)"""
+    start = len(state["results"])
+    state["hashes"].extend(chain_hashes(rows, last_hash(state)))
+    state["results"].extend(rows)
+    state["checkpoints"].extend(tuple(c) for c in checkpoints)
+    state["redo_stack"].clear()
+    state["redo_batches"].clear()
+    if len(state["results"]) > start:
+        state["batches"].append((start, len(state["results"])))
+        apply_checkpoint(state, state["checkpoints"][-1])
+
+
+def undo_trades(state, initial, steps=1):
+    """ย้อนกลับ steps ไม้ คืนรายการแถวที่ถูกย้อน (ล่าสุดก่อน)"""
+    popped = []
+    for _ in range(min(int(steps), len(state["results"]))):
+        row, checkpoint = state["results"].pop(), state["checkpoints"].pop()
+        state["hashes"].pop()
+        state["redo_stack"].append((row, checkpoint))
+        popped.append(row)
+    state["batches"] = [batch for batch in state["batches"] if batch[1] <= len(state["results"])]
+    apply_checkpoint(state, current_checkpoint(state, initial))
+    return popped
+
+
+def last_batch(state):
+    """(start, end) ของชุดที่บันทึกล่าสุด ถ้ายังอยู่ท้ายประวัติครบทั้งชุด ไม่งั้น None"""
+    batches = state["batches"]
+    return batches[-1] if batches and batches[-1][1] == len(state["results"]) else None
+
+
+def redo_batch_size(state):
+    """จำนวนไม้ของชุดบนสุดของ redo stack (0 ถ้าบนสุดไม่ใช่ชุด)"""
+    markers = state["redo_batches"]
+    while markers and markers[-1][0] > len(state["redo_stack"]):
+        markers.pop()  # redo stack ถูกล้าง (เช่น replay เมื่อพารามิเตอร์เปลี่ยน)
+    return markers[-1][1] if markers and markers[-1][0] == len(state["redo_stack"]) else 0
+
+
+def undo_batch(state, initial):
+    """ย้อนชุดที่บันทึกล่าสุดทั้งชุด คืนรายการแถวที่ถูกย้อน"""
+    batch = last_batch(state)
+    if batch is None:
+        return []
+    state["batches"].pop()
+    popped = undo_trades(state, initial, batch[1] - batch[0])
+    state["redo_batches"].append((len(state["redo_stack"]), len(popped)))
+    return popped
+
+
+def redo_batch(state):
+    """ทำซ้ำชุดบนสุดของ redo stack ทั้งชุด คืนรายการแถวที่ถูกนำกลับมา"""
+    size = redo_batch_size(state)
+    if not size:
+        return []
+    state["redo_batches"].pop()
+    restored = redo_trades(state, size)
+    state["batches"].append((len(state["results"]) - len(restored), len(state["results"])))
+    return restored
+
+
+def redo_trades(state, steps=1):
+    """ทำซ้ำ steps ไม้จาก redo stack คืนรายการแถวที่ถูกนำกลับมา"""
+    restored = []
+    for _ in range(min(int(steps), len(state["redo_stack"]))):
+        row, checkpoint = state["redo_stack"].pop()
+        state["hashes"].append(row_hash(last_hash(state), row))
+        state["results"].append(row)
+        state["checkpoints"].append(checkpoint)
+        restored.append(row)
+    state["redo_batches"] = [marker for marker in state["redo_batches"] if marker[0] <= len(state["redo_stack"])]
+    if restored:
+        apply_checkpoint(state, state["checkpoints"][-1])
+    return restored
+
+
+def rewrite_history(state, index, rows, checkpoints, initial):
+    """แทนที่ประวัติตั้งแต่แถว index เป็นต้นไป (แก้ผลย้อนหลัง) hash ก่อนหน้า index ใช้ต่อได้เลย"""
+    del state["results"][index:], state["checkpoints"][index:], state["hashes"][index:]
+    state["results"].extend(rows)
+    state["checkpoints"].extend(tuple(c) for c in checkpoints)
+    state["hashes"].extend(chain_hashes(rows, last_hash(state)))
+    state["redo_stack"] = []
+    state["redo_batches"] = []
+    state["batches"] = [batch for batch in state["batches"] if batch[1] <= index]
+    apply_checkpoint(state, current_checkpoint(state, initial))
+
+
+def reset_history(state, initial, results=None, checkpoints=None):
+    """แทนที่ประวัติทั้งหมด (Clear / Reset / Import / replay เมื่ออินพุตเปลี่ยน)"""
+    del state["results"][:]  # คงชนิด container เดิมไว้ (list หรือ ResultsStore / CheckpointStore)
+    state["results"].extend(results or [])
+    del state["checkpoints"][:]
+    state["checkpoints"].extend(checkpoints or [])
+    state["hashes"] = chain_hashes(state["results"])
+    state["redo_stack"] = []
+    state["redo_batches"] = []
+    state["batches"] = []
+    apply_checkpoint(state, current_checkpoint(state, initial))
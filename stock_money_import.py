@@ -0,0 +1,198 @@
+import importlib.util
+import io
+import re
+
+import numpy as np
+
+# ===================== Streaming CSV / Parquet import =====================
+# อ่านไฟล์ผลลัพธ์ที่ export ไว้ทีละก้อน (chunk) เฉพาะคอลัมน์ที่ใช้ พร้อมกำหนด dtype ชัดเจน
+# ตรวจแต่ละก้อนระหว่างอ่าน แล้ว replay ต่อจาก checkpoint ของก้อนก่อนหน้าทันที
+# ผลของแต่ละก้อนเขียนต่อท้าย container ที่ส่งเข้ามา (ResultsStore / CheckpointStore เก็บเป็นอาร์เรย์รายคอลัมน์)
+# dict ของแถวมีอยู่ทีละก้อน หน่วยความจำส่วนเกินจึงขึ้นกับขนาด chunk ไม่ใช่ขนาดไฟล์
+# (ยกเว้นไฟล์ที่ไม้ไม่เรียง ต้องอ่านทั้งไฟล์มาเรียงก่อน) ไฟล์ที่มีแต่ header ได้ผลว่าง
+# Parquet (ต้องมี pyarrow) อ่านทีละ row group / batch เฉพาะ 3 คอลัมน์ ไม่ต้อง parse ข้อความเหมือน CSV
+# pandas ถูก import ตอนนำเข้าไฟล์ครั้งแรก (แอปที่ import โมดูลนี้จึงไม่ต้องโหลด pandas ตอนเปิด)
+
+IMPORT_COLUMNS = ["ไม้", "Pattern", "ผลลัพธ์"]
+IMPORT_DTYPES = {"ไม้": "Int64", "Pattern": "string", "ผลลัพธ์": "string"}
+VALID_RESULTS = {"-", "ชนะ", "แพ้"}
+VALID_PATTERNS = {"พุธ", "คอ"}
+DEFAULT_CHUNKSIZE = 50_000
+
+
+class UnsortedImport(Exception):
+    pass
+
+
+def _validate(chunk, first_line):
+    """ตรวจก้อนข้อมูล: ไม้ต้องเป็นจำนวนเต็ม, Pattern ต้องเป็น พุธ/คอ (ว่าง = พุธ), ผลลัพธ์ต้องเป็น -, ชนะ, แพ้ (ว่าง = -)"""
+    missing = chunk["ไม้"].isna()
+    if missing.any():
+        raise ValueError(f"แถวที่ {first_line + int(missing.to_numpy().argmax())}: ไม่มีเลขไม้")
+    chunk = chunk.fillna({"Pattern": "พุธ", "ผลลัพธ์": "-"})
+    bad = ~chunk["ผลลัพธ์"].isin(VALID_RESULTS)
+    if bad.any():
+        pos = int(bad.to_numpy().argmax())
+        raise ValueError(f"แถวที่ {first_line + pos}: ผลลัพธ์ '{chunk['ผลลัพธ์'].iloc[pos]}' ไม่ถูกต้อง (ต้องเป็น -, ชนะ, แพ้)")
+    bad = ~chunk["Pattern"].isin(VALID_PATTERNS)
+    if bad.any():
+        pos = int(bad.to_numpy().argmax())
+        raise ValueError(f"แถวที่ {first_line + pos}: Pattern '{chunk['Pattern'].iloc[pos]}' ไม่ถูกต้อง (ต้องเป็น พุธ, คอ)")
+    return chunk
+
+
+def _csv_chunks(source, chunksize):
+    import pandas as pd
+
+    try:
+        reader = pd.read_csv(source, usecols=IMPORT_COLUMNS, dtype=IMPORT_DTYPES, chunksize=chunksize)
+    except ValueError as e:
+        if "Usecols" in str(e):
+            raise ValueError("ไฟล์ต้องมีคอลัมน์: ไม้, Pattern, ผลลัพธ์") from e
+        raise
+    with reader:
+        yield from reader
+
+
+def _parquet_chunks(source, chunksize):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("อ่านไฟล์ Parquet ต้องติดตั้ง pyarrow") from e
+    parquet = pq.ParquetFile(source)
+    if any(c not in parquet.schema_arrow.names for c in IMPORT_COLUMNS):
+        raise ValueError("ไฟล์ต้องมีคอลัมน์: ไม้, Pattern, ผลลัพธ์")
+    for batch in parquet.iter_batches(batch_size=chunksize, columns=IMPORT_COLUMNS):
+        yield batch.to_pandas().astype(IMPORT_DTYPES)
+
+
+def _read_sorted_chunks(chunks):
+    last_trade = None
+    first_line = 2  # บรรทัดแรกของข้อมูล (บรรทัด 1 คือ header)
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        chunk = _validate(chunk, first_line)
+        trades = chunk["ไม้"]
+        if not trades.is_monotonic_increasing or (last_trade is not None and trades.iloc[0] < last_trade):
+            raise UnsortedImport()
+        last_trade = trades.iloc[-1]
+        first_line += len(chunk)
+        yield chunk
+
+
+def _read_unsorted_chunks(chunks, chunksize):
+    import pandas as pd
+
+    df = pd.concat(list(chunks), ignore_index=True)
+    df = _validate(df, 2).sort_values(by="ไม้", kind="stable").reset_index(drop=True)
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def _replay_chunks(chunks, recompute, initial, rows, checkpoints):
+    start = initial
+    for chunk in chunks:
+        _, _, _, new_rows, new_checkpoints = recompute(chunk[IMPORT_COLUMNS].to_dict(orient="records"), start)
+        rows.extend(new_rows)
+        checkpoints.extend(new_checkpoints)
+        if new_checkpoints:
+            start = new_checkpoints[-1]
+    return rows, checkpoints
+
+
+def _import(read, source, recompute, initial, chunksize, rows, checkpoints):
+    rows = [] if rows is None else rows
+    checkpoints = [] if checkpoints is None else checkpoints
+    try:
+        return _replay_chunks(_read_sorted_chunks(read(source, chunksize)), recompute, initial, rows, checkpoints)
+    except UnsortedImport:
+        del rows[:], checkpoints[:]  # ทิ้งก้อนที่ replay ไปแล้ว เริ่มใหม่จากไฟล์ที่เรียงแล้ว
+        source.seek(0)
+        return _replay_chunks(_read_unsorted_chunks(read(source, chunksize), chunksize), recompute, initial, rows, checkpoints)
+
+
+def import_results_csv(source, recompute, initial, chunksize=DEFAULT_CHUNKSIZE, rows=None, checkpoints=None):
+    """อ่าน CSV แล้ว replay ด้วย recompute(results, start) คืน (rows, checkpoints)
+
+    rows / checkpoints: container ที่จะเขียนผลต่อท้ายทีละก้อน (เช่น ResultsStore / CheckpointStore) ค่าเริ่มต้น = list
+    ถ้าไม้ในไฟล์ไม่ได้เรียงจากน้อยไปมาก จะอ่านใหม่ทั้งไฟล์ (เฉพาะ 3 คอลัมน์) แล้วเรียงก่อน replay
+    """
+    return _import(_csv_chunks, source, recompute, initial, chunksize, rows, checkpoints)
+
+
+def import_results_parquet(source, recompute, initial, chunksize=DEFAULT_CHUNKSIZE, rows=None, checkpoints=None):
+    """เหมือน import_results_csv แต่อ่านไฟล์ Parquet"""
+    return _import(_parquet_chunks, source, recompute, initial, chunksize, rows, checkpoints)
+
+
+def import_results(source, name, recompute, initial, chunksize=DEFAULT_CHUNKSIZE, rows=None, checkpoints=None):
+    """เลือกตัวอ่านตามนามสกุลไฟล์ (.parquet / อื่น ๆ = CSV)"""
+    read = import_results_parquet if name.lower().endswith(".parquet") else import_results_csv
+    return read(source, recompute, initial, chunksize, rows, checkpoints)
+
+
+# ===================== Bulk entry (ข้อความ / วางจากตาราง) =====================
+# รับผลลัพธ์หลายไม้ในข้อความเดียว เช่น "WWLLWL", "W L W" หรือคอลัมน์ที่คัดลอกจาก Excel / Google Sheets (มี header ได้)
+# W / ชนะ / win / 1 = ชนะ, L / แพ้ / loss / 0 = แพ้, - = ยังไม่มีผล
+# ข้อความ W/L/- ติดกันแปลงทีละตัวอักษรด้วยตาราง lookup (vectorized) วาง 1,000 ไม้เป็นสตริงเดียวจึงไม่ต้องวนทีละตัว
+
+OUTCOME_WORDS = {"w": 1, "win": 1, "ชนะ": 1, "1": 1, "l": 2, "loss": 2, "lose": 2, "แพ้": 2, "0": 2, "-": 0}
+OUTCOME_HEADERS = {"ผลลัพธ์", "result", "results", "outcome", "outcomes"}
+_OUTCOME_CHARS = np.full(256, -1, dtype=np.int8)
+_OUTCOME_CHARS[[ord("W"), ord("w")]] = 1
+_OUTCOME_CHARS[[ord("L"), ord("l")]] = 2
+_OUTCOME_CHARS[ord("-")] = 0
+
+
+def parse_outcomes(text):
+    """แปลงข้อความผลลัพธ์หลายไม้เป็นรหัส int8 (0 = -, 1 = ชนะ, 2 = แพ้ ตรงกับ RESULT_CODES)"""
+    tokens = [token for token in re.split(r"[\s,;|]+", text.strip()) if token]
+    if tokens and tokens[0].lower() in OUTCOME_HEADERS:
+        tokens = tokens[1:]
+    parts = []
+    for pos, token in enumerate(tokens, 1):
+        code = OUTCOME_WORDS.get(token.lower())
+        if code is not None:
+            parts.append([code])
+            continue
+        codes = _OUTCOME_CHARS[np.frombuffer(token.encode(), dtype=np.uint8)] if token.isascii() else None
+        if codes is None or (codes < 0).any():
+            raise ValueError(f"ค่าที่ {pos}: '{token}' ไม่ใช่ผลลัพธ์ (ใช้ W/L, ชนะ/แพ้, win/loss หรือ 1/0)")
+        parts.append(codes)
+    if not parts:
+        raise ValueError("ไม่พบผลลัพธ์ในข้อความ")
+    return np.concatenate(parts).astype(np.int8)
+
+
+def parse_outcome_sequences(text):
+    """หลายชุดผลลัพธ์ในข้อความเดียว คั่นแต่ละชุดด้วยบรรทัดว่าง คืน list ของรหัส int8 (ชุดละ array)"""
+    blocks = [block for block in re.split(r"\n\s*\n", text.strip()) if block.strip()]
+    if not blocks:
+        raise ValueError("ไม่พบผลลัพธ์ในข้อความ")
+    sequences = []
+    for number, block in enumerate(blocks, 1):
+        try:
+            sequences.append(parse_outcomes(block))
+        except ValueError as e:
+            raise ValueError(f"ชุดที่ {number}: {e}") from None
+    return sequences
+
+
+# ===================== Export =====================
+# CSV (utf-8-sig เปิดใน Excel ได้) หรือ Parquet (zstd, คอลัมน์ Categorical เก็บเป็น dictionary)
+# Parquet เล็กกว่าและเขียน/อ่านเร็วกว่าหลายเท่า แต่ต้องมี pyarrow จึงเปิดให้เลือกเฉพาะเมื่อติดตั้งไว้
+
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+EXPORT_FORMATS = {"CSV": ("csv", "text/csv")}
+if PARQUET_AVAILABLE:
+    EXPORT_FORMATS["Parquet"] = ("parquet", "application/vnd.apache.parquet")
+
+
+def export_results(frame, fmt="CSV"):
+    """แปลงตารางผลลัพธ์เป็นไฟล์ตาม fmt (คีย์ของ EXPORT_FORMATS) คืน bytes"""
+    if fmt == "Parquet":
+        buf = io.BytesIO()
+        frame.to_parquet(buf, index=False, compression="zstd")
+        return buf.getvalue()
+    return frame.to_csv(index=False).encode("utf-8-sig")
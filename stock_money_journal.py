@@ -0,0 +1,132 @@
+import json
+import sqlite3
+import threading
+
+from stock_money_stats import RunningStats
+
+# ===================== Trade journal (SQLite, append-only) =====================
+# เก็บบันทึกการเทรดของ stock_money_management.py ลงไฟล์ SQLite ให้เปิดแอปใหม่แล้วประวัติยังอยู่
+# - เขียนแบบ batch: append() เก็บไว้ในบัฟเฟอร์ แล้ว flush() ทีเดียวด้วย executemany
+# - อ่านแบบ lazy: ดึงเฉพาะหน้าที่แสดง / คอลัมน์ที่ใช้วาดกราฟ
+# - สถิติพอร์ตเป็น RunningStats ที่อัปเดตทีละเทรด และบันทึก snapshot ไว้ในตาราง journal_meta
+#   เปิดแอปใหม่โหลด snapshot แล้วไล่ต่อเฉพาะแถวที่ snapshot ยังไม่ครอบคลุม
+
+DEFAULT_PATH = "trade_journal.sqlite3"
+
+# (ชื่อคอลัมน์ในแอป, ชื่อคอลัมน์ใน SQLite, ชนิดข้อมูล)
+COLUMNS = [
+    ("วันที่-เวลา", "ts", "TEXT"),
+    ("ทุนก่อนหน้า", "capital_before", "REAL"),
+    ("Entry", "entry", "REAL"),
+    ("Stop Loss", "stop_loss", "REAL"),
+    ("Target", "target", "REAL"),
+    ("ขนาดซื้อ", "position_size", "REAL"),
+    ("R:R", "rr_ratio", "REAL"),
+    ("ผลลัพธ์", "result", "TEXT"),
+    ("กำไร/ขาดทุน", "profit_loss", "REAL"),
+    ("ทุนหลังเทรด", "capital_after", "REAL"),
+    ("หมายเหตุ", "note", "TEXT"),
+]
+DISPLAY_NAMES = {sql: name for name, sql, _ in COLUMNS}
+
+
+class TradeJournal:
+    def __init__(self, path=DEFAULT_PATH, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        # Streamlit รันสคริปต์คนละ thread ในแต่ละ rerun จึงปิด check_same_thread แล้วใช้ lock เอง
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        column_sql = ", ".join(f"{sql} {kind}" for _, sql, kind in COLUMNS)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS trades (id INTEGER PRIMARY KEY, {column_sql})")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades (ts)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_result ON trades (result)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS journal_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        self.stats = self._load_stats()
+
+    def _load_stats(self):
+        row = self._conn.execute("SELECT value FROM journal_meta WHERE key = 'running_stats'").fetchone()
+        stats = RunningStats.from_dict(json.loads(row[0])) if row else RunningStats()
+        missing = self._conn.execute(
+            "SELECT result, profit_loss, capital_before, capital_after FROM trades ORDER BY id LIMIT -1 OFFSET ?",
+            (stats.rows,),
+        )
+        for result, profit_loss, capital_before, capital_after in missing:
+            stats.update(result, profit_loss or 0.0, capital_before or 0.0, capital_after or 0.0)
+        return stats
+
+    # ---------- write ----------
+    def append(self, trade):
+        """trade = dict ที่ใช้ชื่อคอลัมน์แบบในแอป (เหมือน st.session_state.trades เดิม)"""
+        with self._lock:
+            self._pending.append(tuple(trade.get(name) for name, _, _ in COLUMNS))
+            self.stats.update(
+                trade.get("ผลลัพธ์"), trade.get("กำไร/ขาดทุน", 0.0),
+                trade.get("ทุนก่อนหน้า", 0.0), trade.get("ทุนหลังเทรด", 0.0),
+            )
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def extend(self, trades):
+        for trade in trades:
+            self.append(trade)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        names = ", ".join(sql for _, sql, _ in COLUMNS)
+        marks = ", ".join("?" for _ in COLUMNS)
+        with self._conn:
+            self._conn.executemany(f"INSERT INTO trades ({names}) VALUES ({marks})", self._pending)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO journal_meta (key, value) VALUES ('running_stats', ?)",
+                (json.dumps(self.stats.to_dict()),),
+            )
+        self._pending = []
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute(sql, params).fetchall()
+
+    # ---------- read ----------
+    def count(self):
+        return self._query("SELECT COUNT(*) FROM trades")[0][0]
+
+    def last_capital(self, default=None):
+        row = self._query("SELECT capital_after FROM trades ORDER BY id DESC LIMIT 1")
+        return row[0][0] if row else default
+
+    def page(self, offset=0, limit=50):
+        """ดึงประวัติทีละหน้า เรียงจากเก่าไปใหม่ (offset นับจากแถวแรก)"""
+        import pandas as pd  # import เมื่อแสดงตารางจริง ไม่ใช่ตอนเปิดแอป
+
+        names = ", ".join(sql for _, sql, _ in COLUMNS)
+        rows = self._query(f"SELECT {names} FROM trades ORDER BY id LIMIT ? OFFSET ?", (int(limit), int(offset)))
+        return pd.DataFrame(rows, columns=[name for name, _, _ in COLUMNS])
+
+    def column(self, sql_name):
+        """ดึงคอลัมน์เดียวทั้งประวัติ (เช่น capital_after สำหรับ Equity Curve)"""
+        if sql_name not in DISPLAY_NAMES:
+            raise ValueError(f"ไม่มีคอลัมน์ {sql_name}")
+        return [row[0] for row in self._query(f"SELECT {sql_name} FROM trades ORDER BY id")]
+
+    def columns(self, sql_names):
+        """ดึงหลายคอลัมน์ทั้งประวัติในคำสั่งเดียว คืน dict ชื่อคอลัมน์ -> list (เรียงตาม id)"""
+        unknown = [name for name in sql_names if name not in DISPLAY_NAMES]
+        if unknown:
+            raise ValueError(f"ไม่มีคอลัมน์ {', '.join(unknown)}")
+        rows = self._query(f"SELECT {', '.join(sql_names)} FROM trades ORDER BY id")
+        return {name: [row[i] for row in rows] for i, name in enumerate(sql_names)}
+
+    def close(self):
+        self.flush()
+        self._conn.close()
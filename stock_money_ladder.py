@@ -0,0 +1,86 @@
+import math
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+# ===================== Bet ladder (ขั้นบันไดเดิมพันเมื่อแพ้ติด) =====================
+# b_0 = first_bet, L_0 = 0
+# แพ้ที่ระดับ k -> L_{k+1} = L_k + b_k, b_{k+1} = ceil((L_{k+1} + target_profit) / odds)
+# เมื่อ odds > 1 เดิมพันอาจคงที่ติดกันหลายระดับ (เช่น first_bet เล็ก) แทนที่จะเก็บทีละระดับ
+# จึงเก็บเป็นช่วง (segment) ที่เดิมพันเท่ากัน: L ภายในช่วงเป็นอนุกรมเลขคณิต คำนวณได้ทันที
+
+
+@dataclass(frozen=True)
+class BetLadder:
+    start_depth: tuple  # ระดับแรกของแต่ละช่วง
+    start_loss: tuple   # L ที่ระดับแรกของช่วง
+    bet: tuple          # เดิมพันของทุกระดับในช่วง
+    capital: float
+
+    def _segment(self, depth):
+        return bisect_right(self.start_depth, depth) - 1
+
+    def bet_at(self, depth):
+        """เดิมพันของไม้ที่แพ้ติดมาแล้ว depth ไม้"""
+        return self.bet[self._segment(depth)]
+
+    def capital_needed(self, depth):
+        """ทุนที่ต้องมีเพื่อแพ้ติดกัน depth ไม้ (= ขาดทุนสะสม L_depth)"""
+        i = self._segment(depth)
+        return self.start_loss[i] + (depth - self.start_depth[i]) * self.bet[i]
+
+    def max_streak(self, capital=None):
+        """จำนวนไม้ที่แพ้ติดกันได้มากสุดก่อนทุนไม่พอวางไม้ถัดไป"""
+        capital = self.capital if capital is None else capital
+        if capital > self.capital:
+            raise ValueError("ladder นี้สร้างไว้สำหรับทุนไม่เกิน capital")
+        i = bisect_right(self.start_loss, capital) - 1
+        return self.start_depth[i] + int((capital - self.start_loss[i]) // self.bet[i])
+
+    def arrays(self, depth):
+        """bets[0..depth-1] และ losses[0..depth] ของทุกระดับเป็น NumPy array"""
+        starts = np.array(self.start_depth + (math.inf,))
+        levels = np.arange(depth + 1)
+        seg = np.searchsorted(starts, levels, side="right") - 1
+        bet = np.array(self.bet)[seg]
+        losses = np.array(self.start_loss)[seg] + (levels - starts[seg]) * bet
+        return bet[:depth], losses
+
+
+@lru_cache(maxsize=256)
+def bet_ladder(capital, first_bet, target_profit, odds, max_depth=None):
+    """สร้าง ladder จนขาดทุนสะสมเกิน capital (ครอบคลุมทุกระดับที่ทุนนี้ไปถึงได้)
+    max_depth: หยุดเมื่อครอบคลุมถึงระดับนี้แล้ว (ใช้กับ capital = math.inf เพื่อหาทุนที่ต้องใช้ในรอบเดียว)
+    เก็บใน cache ตาม (capital, first_bet, target_profit, odds, max_depth) rerun ที่อินพุตเดิมไม่ต้องคำนวณใหม่
+    เดิมพัน / ขาดทุนสะสมเกินช่วงของ float (odds ต่ำ + แพ้ติดหลายร้อยไม้) -> ValueError
+    """
+    if odds <= 0:
+        raise ValueError("odds ต้องมากกว่า 0")
+    start_depth, start_loss, bets = [0], [0], [first_bet]
+    depth, loss_sum, bet = 0, 0, first_bet
+    try:
+        while True:
+            if depth == 0:
+                run = 1
+            else:
+                # เดิมพันคงที่ตราบที่ L + j * bet + target_profit <= bet * odds
+                run = 1 + max(0, math.floor((bet * odds - target_profit - loss_sum) / bet))
+                # ตรวจขอบช่วงด้วยสูตรเดิม กันปัดเศษทศนิยมคลาดเคลื่อน
+                while run > 1 and math.ceil((loss_sum + (run - 1) * bet + target_profit) / odds) > bet:
+                    run -= 1
+                while math.ceil((loss_sum + run * bet + target_profit) / odds) <= bet:
+                    run += 1
+            depth += run
+            loss_sum += run * bet
+            if loss_sum > capital or (max_depth is not None and depth > max_depth):
+                break
+            bet = math.ceil((loss_sum + target_profit) / odds)
+            start_depth.append(depth)
+            start_loss.append(loss_sum)
+            bets.append(bet)
+    except (OverflowError, ValueError):
+        # ceil / floor ของ inf หรือ nan: ขาดทุนสะสมล้นช่วงของ float
+        raise ValueError(f"เดิมพันเมื่อแพ้ติดเกิน {depth:,} ไม้ ใหญ่เกินขอบเขตที่คำนวณได้") from None
+    return BetLadder(tuple(start_depth), tuple(start_loss), tuple(bets), capital)
@@ -1,19 +1,55 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
+from stock_money_backtest import SIGNAL_COLUMNS, backtest, find_bars_file, load_bars
+from stock_money_bootstrap import JOURNAL_COLUMNS, MODES, bootstrap_paths, journal_samples
+from stock_money_charts import equity_curve_png, fan_chart_png
+from stock_money_engine import BOARD_LOT, plan_position, plan_positions
+from stock_money_journal import TradeJournal
+from stock_money_profiler import debug_panel, session_profiler
+from stock_money_stats import RunningStats
 
 # ตั้งค่าหน้าเว็บ
 st.set_page_config(page_title="การเดินเงินหุ้น", page_icon="📊", layout="centered", initial_sidebar_state="collapsed")
+prof = session_profiler()  # จับเวลาแต่ละขั้น (เปิดจากแผงดีบักในแถบข้าง)
 
 st.title("📊 การเดินเงินหุ้น")
 st.markdown("แอปคำนวณขนาดการซื้อ บันทึกการเทรด และดูสถิติพอร์ต")
 
-# เก็บข้อมูลใน session
-if "trades" not in st.session_state:
-    st.session_state.trades = []
+# เก็บข้อมูลใน journal (SQLite) ใช้ร่วมกันทุก rerun / ทุกครั้งที่เปิดแอป
+@st.cache_resource
+def open_journal():
+    return TradeJournal()
+
+with prof.stage("open_journal"):
+    journal = open_journal()
+
+# journal เป็นแบบ append-only จำนวนแถวจึงเป็นเวอร์ชันของกราฟ: วาดใหม่เฉพาะเมื่อมีเทรดเพิ่ม
+@st.cache_data(max_entries=4, show_spinner=False)
+def equity_chart(path, trade_count):
+    capital_after = journal.column("capital_after")
+    return equity_curve_png(range(1, len(capital_after) + 1), capital_after, title=None, xlabel="จำนวนการเทรด")
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def backtest_chart(capital_after):
+    return equity_curve_png(range(1, len(capital_after) + 1), capital_after, title="Backtest", xlabel="จำนวนการเทรด")
+
+# Bootstrap จากเทรดจริง: cache ตาม "เวอร์ชัน" ของ journal (จำนวนแถว) สุ่มใหม่เฉพาะเมื่อมีเทรดเพิ่มหรือเปลี่ยนพารามิเตอร์
+@st.cache_resource(max_entries=8, show_spinner="กำลังสุ่มอนาคตจากประวัติ...")
+def run_bootstrap(path, trade_count, capital, mode, horizon, num_paths, block_length, floor_percent, risk_percent):
+    samples = journal_samples(journal.columns(JOURNAL_COLUMNS), mode, risk_percent)
+    return bootstrap_paths(samples, capital, horizon, num_paths, mode, block_length or None, floor_percent)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def bootstrap_chart(*args):
+    result = run_bootstrap(*args)
+    return fan_chart_png(
+        result.band_trades, result.bands, result.capital,
+        f"ช่วงพอร์ตข้างหน้า ({len(result.final_balances):,} เส้นทางจาก {result.sample_size:,} เทรดจริง)",
+    )
+
 if "capital" not in st.session_state:
-    st.session_state.capital = 100000.0
+    st.session_state.capital = journal.last_capital(default=100000.0)
 
 # ฟอร์มคำนวณ
 with st.form("trade_form"):
@@ -27,63 +63,171 @@ with st.form("trade_form"):
     submitted = st.form_submit_button("คำนวณและบันทึก")
 
 if submitted:
-    if entry == stop_loss:
-        st.error("ราคาซื้อและ Stop Loss ต้องไม่เท่ากัน!")
+    try:
+        plan = plan_position(capital, risk_percent, entry, stop_loss, target, result)
+    except ValueError as e:
+        st.error(str(e))
     else:
-        risk_per_trade = capital * (risk_percent / 100)
-        risk_per_share = abs(entry - stop_loss)
-        position_size = risk_per_trade / risk_per_share
-        rr_ratio = abs(target - entry) / risk_per_share
-        profit_loss = 0
-
-        if result == "ชนะ":
-            profit_loss = (target - entry) * position_size
-        elif result == "แพ้":
-            profit_loss = (stop_loss - entry) * position_size
-
-        new_capital = capital + profit_loss
-        st.session_state.capital = new_capital
-
-        st.success(f"📌 ขนาดการซื้อ: {position_size:.2f} หุ้น")
-        st.info(f"📊 R:R = {rr_ratio:.2f}")
+        st.session_state.capital = plan.new_capital
+
+        st.success(f"📌 ขนาดการซื้อ: {plan.position_size:.2f} หุ้น")
+        st.info(f"📊 R:R = {plan.rr_ratio:.2f}")
         if result != "-":
-            st.write(f"💹 กำไร/ขาดทุน: {profit_loss:.2f} บาท | ทุนใหม่: {new_capital:.2f} บาท")
-
-        st.session_state.trades.append({
-            "วันที่-เวลา": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "ทุนก่อนหน้า": capital,
-            "Entry": entry,
-            "Stop Loss": stop_loss,
-            "Target": target,
-            "ขนาดซื้อ": position_size,
-            "R:R": rr_ratio,
-            "ผลลัพธ์": result,
-            "กำไร/ขาดทุน": profit_loss,
-            "ทุนหลังเทรด": new_capital,
-            "หมายเหตุ": note
-        })
+            st.write(f"💹 กำไร/ขาดทุน: {plan.profit_loss:.2f} บาท | ทุนใหม่: {plan.new_capital:.2f} บาท")
+
+        with prof.stage("journal_append"):
+            journal.append({
+                "วันที่-เวลา": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "ทุนก่อนหน้า": capital,
+                "Entry": entry,
+                "Stop Loss": stop_loss,
+                "Target": target,
+                "ขนาดซื้อ": plan.position_size,
+                "R:R": plan.rr_ratio,
+                "ผลลัพธ์": result,
+                "กำไร/ขาดทุน": plan.profit_loss,
+                "ทุนหลังเทรด": plan.new_capital,
+                "หมายเหตุ": note
+            })
+            journal.flush()
 
-# แสดงตารางบันทึก
-if st.session_state.trades:
-    df = pd.DataFrame(st.session_state.trades)
+# คำนวณขนาดการซื้อทั้ง watchlist ในครั้งเดียว (ปัดเป็น board lot + เพดานความเสี่ยงรวม)
+with st.expander("📋 คำนวณทั้ง watchlist"):
+    st.caption("CSV ต้องมีคอลัมน์ Symbol, Entry, Stop Loss, Target (ใส่ ทุน / ความเสี่ยง (%) รายตัวได้ ถ้าไม่ใส่ใช้ค่าด้านล่าง)")
+    w1, w2, w3, w4 = st.columns(4)
+    batch_capital = w1.number_input("💰 ทุนรวม (บาท)", value=float(st.session_state.capital), step=1000.0, format="%.2f")
+    batch_risk = w2.number_input("⚠️ ความเสี่ยงต่อตัว (%)", min_value=0.0, value=1.0, step=0.1)
+    board_lot = w3.number_input("📦 Board lot (หุ้น)", min_value=1, value=BOARD_LOT, step=1)
+    risk_cap = w4.number_input("🧯 ความเสี่ยงรวมสูงสุด (%)", min_value=0.0, value=10.0, step=0.5)
+    watchlist_file = st.file_uploader("อัปโหลด watchlist (CSV)", type=["csv"], key="watchlist_csv")
+    if watchlist_file is not None:
+        watchlist = pd.read_csv(watchlist_file)
+    else:
+        watchlist = pd.DataFrame({"Symbol": ["PTT", "AOT"], "Entry": [34.0, 62.5], "Stop Loss": [33.0, 60.0], "Target": [37.0, 68.0]})
+    watchlist = st.data_editor(watchlist, num_rows="dynamic", hide_index=True, key="watchlist_editor")
+    try:
+        with prof.stage("plan_positions"):
+            planned = plan_positions(watchlist, batch_capital, batch_risk, board_lot, risk_cap)
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        st.dataframe(planned, hide_index=True)
+        b1, b2, b3 = st.columns(3)
+        b1.metric("ความเสี่ยงรวม", f"{planned['ความเสี่ยง (บาท)'].sum():,.2f} บาท")
+        b2.metric("มูลค่าซื้อรวม", f"{planned['มูลค่าซื้อ (บาท)'].sum():,.2f} บาท")
+        b3.metric("จำนวนตัวที่ซื้อได้", f"{int((planned['ขนาดซื้อ'] > 0).sum())} / {len(planned)}")
+        with prof.stage("watchlist_csv"):
+            planned_csv = planned.to_csv(index=False).encode("utf-8-sig")
+        st.download_button(
+            "⬇️ ดาวน์โหลดผล (CSV)", planned_csv,
+            file_name="watchlist_positions.csv", mime="text/csv",
+        )
+
+# Backtest: ทดสอบ Entry / Stop Loss / Target กับแท่งราคาย้อนหลัง (ไม่บันทึกลง journal)
+with st.expander("🧪 Backtest จากราคาย้อนหลัง (OHLC)"):
+    st.caption("โฟลเดอร์ราคาเก็บไฟล์ <Symbol>.csv หรือ <Symbol>.parquet (คอลัมน์ time, open, high, low, close) | ไฟล์สัญญาณมีคอลัมน์ " + ", ".join(SIGNAL_COLUMNS))
+    with st.form("backtest_form"):
+        bars_dir = st.text_input("📁 โฟลเดอร์ไฟล์ราคา", value="ohlc")
+        signals_file = st.file_uploader("สัญญาณเข้าเทรด (CSV)", type=["csv"])
+        t1, t2, t3 = st.columns(3)
+        bt_capital = t1.number_input("💰 ทุนเริ่มต้น (บาท)", value=100000.0, step=1000.0, format="%.2f")
+        bt_risk = t2.number_input("⚠️ ความเสี่ยงต่อการเทรด (%)", min_value=0.0, value=2.0, step=0.1, key="bt_risk")
+        bt_lot = t3.number_input("📦 Board lot (หุ้น)", min_value=1, value=1, step=1)
+        run_backtest = st.form_submit_button("▶️ เริ่ม Backtest")
+    if run_backtest:
+        if signals_file is None:
+            st.error("กรุณาอัปโหลดไฟล์สัญญาณ")
+        else:
+            try:
+                with prof.stage("backtest"):
+                    st.session_state.backtest = backtest(
+                        pd.read_csv(signals_file), lambda symbol: load_bars(find_bars_file(bars_dir, symbol)),
+                        bt_capital, bt_risk, bt_lot,
+                    )
+            except (ValueError, OSError, ImportError) as e:
+                st.error(f"Backtest ไม่สำเร็จ: {e}")
+    if "backtest" in st.session_state:
+        bt_trades = st.session_state.backtest
+        with prof.stage("backtest_stats"):
+            bt_stats = RunningStats()
+            for row in bt_trades[["ผลลัพธ์", "กำไร/ขาดทุน", "ทุนก่อนหน้า", "ทุนหลังเทรด"]].itertuples(index=False):
+                bt_stats.update(*row)
+        r1, r2, r3, r4 = st.columns(4)
+        r1.metric("จำนวนเทรด", f"{len(bt_trades):,}")
+        r2.metric("Win Rate", f"{bt_stats.win_rate:.2f}%")
+        r3.metric("Profit Factor", f"{bt_stats.profit_factor:.2f}")
+        r4.metric("Max Drawdown", f"{bt_stats.max_drawdown:,.2f} บาท", f"-{bt_stats.max_drawdown_pct:.2f}%", delta_color="off")
+        st.dataframe(bt_trades, hide_index=True)
+        if len(bt_trades):
+            with prof.stage("backtest_chart"):
+                chart = backtest_chart(bt_trades["ทุนหลังเทรด"])
+            st.image(chart, use_container_width=True)
+
+# แสดงตารางบันทึก (ดึงจาก journal ทีละหน้า)
+total_rows = journal.count()
+if total_rows:
     st.subheader("📜 ประวัติการเทรด")
-    st.dataframe(df)
+    page_size = 50
+    pages = (total_rows + page_size - 1) // page_size
+    page = st.number_input(f"หน้า (1 = ล่าสุด, ทั้งหมด {pages} หน้า)", min_value=1, max_value=pages, value=1, step=1)
+    end = total_rows - (page - 1) * page_size
+    start = max(0, end - page_size)
+    with prof.stage("journal_page"):
+        history = journal.page(offset=start, limit=end - start)
+    st.dataframe(history)
 
-    # คำนวณสถิติ
-    wins = df[df["ผลลัพธ์"] == "ชนะ"].shape[0]
-    losses = df[df["ผลลัพธ์"] == "แพ้"].shape[0]
-    total_trades = wins + losses
-    win_rate = (wins / total_trades * 100) if total_trades > 0 else 0
-    avg_return = df["กำไร/ขาดทุน"].mean() if total_trades > 0 else 0
+    # สถิติอัปเดตทีละเทรดใน journal (ไม่ต้องสแกนประวัติ)
+    stats = journal.stats
 
     st.subheader("📈 สถิติพอร์ต")
-    st.write(f"Win Rate: {win_rate:.2f}%")
-    st.write(f"Average Return ต่อเทรด: {avg_return:.2f} บาท")
+    s1, s2, s3, s4 = st.columns(4)
+    s1.metric("Win Rate", f"{stats.win_rate:.2f}%")
+    s2.metric("Average Return ต่อเทรด", f"{stats.avg_return:,.2f} บาท")
+    s3.metric("Expectancy", f"{stats.expectancy:,.2f} บาท")
+    s4.metric("Profit Factor", f"{stats.profit_factor:.2f}")
+    s5, s6, s7, s8 = st.columns(4)
+    s5.metric("Max Drawdown", f"{stats.max_drawdown:,.2f} บาท", f"-{stats.max_drawdown_pct:.2f}%", delta_color="off")
+    s6.metric("ชนะติดกันสูงสุด", f"{stats.longest_win_streak} ไม้")
+    s7.metric("แพ้ติดกันสูงสุด", f"{stats.longest_loss_streak} ไม้")
+    s8.metric("Sharpe ต่อเทรด", f"{stats.sharpe_per_trade:.2f}")
 
     # กราฟ Equity Curve
     st.subheader("📊 Equity Curve")
-    plt.plot(df["ทุนหลังเทรด"])
-    plt.xlabel("จำนวนการเทรด")
-    plt.ylabel("มูลค่าพอร์ต (บาท)")
-    plt.grid(True)
-    st.pyplot(plt)
+    with prof.stage("equity_chart"):
+        chart = equity_chart(journal.path, journal.count())
+    st.image(chart, use_container_width=True)
+
+    # สุ่มอนาคตหลายพันเส้นทางจากเทรดจริง (block bootstrap) เพื่อดู drawdown / ระยะเวลาฟื้นตัว / โอกาสหลุดพื้นทุน
+    st.subheader("🔮 ความเสี่ยงข้างหน้า (Bootstrap จากประวัติจริง)")
+    bs1, bs2, bs3 = st.columns(3)
+    bs_mode = bs1.selectbox("สุ่มจาก", list(MODES), format_func=MODES.get)
+    bs_horizon = bs2.number_input("จำนวนเทรดข้างหน้า", min_value=1, max_value=5_000, value=100, step=10)
+    bs_paths = bs3.number_input("จำนวนเส้นทาง", min_value=1_000, max_value=200_000, value=10_000, step=1_000)
+    bs4, bs5, bs6 = st.columns(3)
+    bs_floor = bs4.number_input("พื้นทุน (% ของทุนปัจจุบัน)", min_value=0.0, max_value=99.0, value=80.0, step=5.0)
+    bs_block = bs5.number_input("ความยาว block (0 = อัตโนมัติ)", min_value=0, max_value=100, value=0, step=1)
+    bs_risk = bs6.number_input("ความเสี่ยงต่อเทรด (%) ของ R-multiple", min_value=0.1, value=max(float(risk_percent), 0.1), step=0.1,
+                               disabled=bs_mode != "r_multiple")
+    bootstrap_args = (journal.path, total_rows, float(st.session_state.capital), bs_mode, bs_horizon, bs_paths, bs_block, bs_floor, bs_risk)
+    try:
+        with prof.stage("bootstrap"):
+            outlook = run_bootstrap(*bootstrap_args)
+    except ValueError as e:
+        st.info(str(e))
+    else:
+        outlook_table = outlook.summary()
+        _, drawdown, underwater = outlook_table.to_dict("records")
+        f1, f2, f3, f4 = st.columns(4)
+        f1.metric(f"โอกาสหลุดพื้นทุน {outlook.floor:,.0f}", f"{outlook.floor_probability * 100:.2f}%")
+        f2.metric("Max Drawdown มัธยฐาน / P95", f"{drawdown['P50']:.1f}% / {drawdown['P95']:.1f}%")
+        f3.metric("ติดลบนานสุด (มัธยฐาน)", f"{underwater['P50']:.0f} เทรด")
+        f4.metric("จบที่จุดสูงสุดใหม่", f"{outlook.recovered.mean() * 100:.1f}%")
+        st.dataframe(outlook_table, hide_index=True, use_container_width=True, column_config={
+            name: st.column_config.NumberColumn(format="%.2f") for name in outlook_table.columns[1:]
+        })
+        st.caption(f"สุ่มจาก {outlook.sample_size:,} เทรดที่ชนะ/แพ้ เป็นช่วงละ {outlook.block_length} เทรดติดกัน (seed {outlook.seed}) | คำนวณใหม่เมื่อมีเทรดเพิ่มเท่านั้น")
+        with prof.stage("bootstrap_chart"):
+            chart = bootstrap_chart(*bootstrap_args)
+        st.image(chart, use_container_width=True)
+
+debug_panel(prof, prefix="stock_money_management")
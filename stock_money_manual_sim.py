@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import math
-import random
+from stock_money_charts import equity_curve_png
+from stock_money_engine import RESULT_CODES, max_losing_streak, replay_outcomes
+from stock_money_import import parse_outcomes
+from stock_money_profiler import debug_panel, session_profiler
+from stock_money_rng import RandomStreams, new_seed
+from stock_money_ruin_dp import ruin_estimate
 
 st.set_page_config(page_title="การเดินเงินหุ้น", page_icon="📈")
+prof = session_profiler()  # จับเวลาแต่ละขั้น (เปิดจากแผงดีบักในแถบข้าง)
 
 st.title("📈 การเดินเงินหุ้น (พุธ=ซื้อ, คอ=ขาย)")
 st.markdown("สุ่มซื้อ/ขาย, กรอกผลเอง, คำนวณจำนวนไม้สูงสุดที่ทุนรองรับได้")
@@ -15,64 +19,116 @@ num_trades = st.number_input("🔢 จำนวนไม้ที่ต้อง
 target_profit = st.number_input("🎯 กำไรที่ต้องการต่อรอบ (บาท)", min_value=0.1, value=1.0, step=0.1)
 odds = st.number_input("⚖️ อัตราจ่าย (1.0 = กำไรเท่าทุน)", min_value=0.1, value=1.0, step=0.1)
 first_bet = st.number_input("💵 เงินเดิมพันไม้แรก (บาท)", min_value=0.1, value=30.0, step=1.0)
+win_prob = st.number_input("🍀 โอกาสชนะต่อไม้ (%)", min_value=1.0, max_value=99.0, value=50.0, step=1.0) / 100
 
 # ===== คำนวณจำนวนไม้สูงสุดที่ทุนรองรับได้ =====
-max_bet_amount = first_bet
-loss_streak_amount = 0
-temp_capital = capital
-max_trades_possible = 0
-
-while temp_capital >= max_bet_amount:
-    temp_capital -= max_bet_amount
-    loss_streak_amount += max_bet_amount
-    max_trades_possible += 1
-    max_bet_amount = math.ceil((loss_streak_amount + target_profit) / odds)
+with prof.stage("max_trades_possible"):
+    max_trades_possible = max_losing_streak(capital, first_bet, target_profit, odds)
 
 st.info(f"💡 ถ้าแพ้ติดกันทุกไม้ คุณจะสามารถเล่นได้สูงสุด {max_trades_possible} ไม้ ก่อนที่ทุนจะหมด")
 
+@st.cache_resource(max_entries=16, show_spinner=False)
+def exact_ruin(capital, first_bet, target_profit, odds, num_trades, win_prob):
+    return ruin_estimate(capital, first_bet, target_profit, odds, num_trades, win_prob)
+
+
+with prof.stage("ruin_dp"):
+    ruin = exact_ruin(capital, first_bet, target_profit, odds, num_trades, win_prob)
+# DP เกินงบ (ไม้มาก / เศษเงินละเอียด) ได้ค่าประมาณจาก Monte Carlo แทน แสดงให้รู้ว่าไม่ใช่ค่าแม่นยำ
+ruin_method = "" if ruin.exact else f" (ประมาณจาก Monte Carlo {ruin.num_paths:,} เส้นทาง)"
+st.info(f"🎲 โอกาสทุนหมดภายใน {num_trades} ไม้ (ชนะ {win_prob * 100:.0f}%){ruin_method}: **{ruin.ruin_probability * 100:.2f}%** | พอร์ตคาดหวัง {ruin.expected_final_balance:,.2f} บาท")
+
 # ===== Logic เดินเงินจริง =====
-results = []
-balance = capital
-bet_amount = first_bet
-loss_streak_amount = 0
-patterns = ["พุธ", "คอ"]
-
-for trade in range(1, num_trades + 1):
-    pattern = random.choice(patterns)  # สุ่มซื้อ/ขาย
-    result = st.selectbox(f"ผลลัพธ์ไม้ {trade} ({pattern})", ["-", "ชนะ", "แพ้"], key=f"result_{trade}")
-
-    if result == "ชนะ":
-        profit = bet_amount * odds
-        balance += profit
-        loss_streak_amount = 0
-        bet_amount = first_bet
-    elif result == "แพ้":
-        balance -= bet_amount
-        loss_streak_amount += bet_amount
-        bet_amount = math.ceil((loss_streak_amount + target_profit) / odds)
-
-    results.append({
-        "ไม้": trade,
-        "Pattern": pattern,
-        "ผลลัพธ์": result,
-        "เงินเดิมพัน": bet_amount,
-        "พอร์ต": round(balance, 2)
-    })
+# Pattern สุ่มจาก seed: ใส่ seed เดิมจะได้ Pattern ชุดเดิม
+if "seed" not in st.session_state:
+    st.session_state.seed = new_seed()
+seed = st.number_input("🌱 Seed (Pattern)", min_value=0, max_value=2**32 - 1, step=1, key="seed")
+
+# ===== กรอกหลายไม้พร้อมกัน =====
+# วางผลลัพธ์ (เช่น "WWLLWL" หรือคอลัมน์จากตาราง) เป็นค่าของไม้ 1, 2, ... ในตารางด้านล่างครั้งเดียว
+# แล้วสร้างตารางกรอกผลใหม่ (ล้างการแก้ทีละช่อง) ย้อนการวางแต่ละครั้งได้ทั้งชุด
+for key, value in {"trade_outcomes": [], "bulk_undo": [], "bulk_error": None, "editor_nonce": 0}.items():
+    if key not in st.session_state:
+        st.session_state[key] = value
+
+
+def on_bulk_entry():
+    st.session_state.bulk_error = None
+    try:
+        codes = parse_outcomes(st.session_state.bulk_text)
+        if len(codes) > num_trades:
+            raise ValueError(f"วาง {len(codes):,} ไม้ เกินจำนวนไม้ที่ตั้งไว้ ({num_trades:,} ไม้)")
+    except ValueError as e:
+        st.session_state.bulk_error = str(e)
+        return
+    labels = list(RESULT_CODES)
+    current = st.session_state.trade_outcomes
+    st.session_state.bulk_undo.append(current)
+    st.session_state.trade_outcomes = [labels[code] for code in codes.tolist()] + current[len(codes):]
+    st.session_state.editor_nonce += 1
+    st.session_state.bulk_text = ""
+
+
+def on_bulk_undo():
+    st.session_state.trade_outcomes = st.session_state.bulk_undo.pop()
+    st.session_state.editor_nonce += 1
+
+
+with st.expander("⚡ กรอกหลายไม้พร้อมกัน", expanded=bool(st.session_state.bulk_error)):
+    st.text_area("ผลลัพธ์เริ่มจากไม้ 1 (W/L, ชนะ/แพ้, 1/0) เช่น WWLLWL หรือวางคอลัมน์จากตาราง", key="bulk_text", height=100)
+    bulk_col, undo_col = st.columns(2)
+    bulk_col.button("⚡ ใส่ผลทั้งชุด", on_click=on_bulk_entry, use_container_width=True)
+    undo_col.button("↩️ ย้อนการวางล่าสุด", on_click=on_bulk_undo, disabled=not st.session_state.bulk_undo, use_container_width=True)
+    if st.session_state.bulk_error:
+        st.error(st.session_state.bulk_error)
+
+# กรอกผลทุกไม้ใน data_editor ตัวเดียว แทน selectbox ทีละไม้ (render ไม่ช้าลงตาม num_trades)
+st.subheader("🧮 กรอกผลลัพธ์")
+with prof.stage("trade_inputs"):
+    outcomes = st.session_state.trade_outcomes[:num_trades]
+    trade_inputs = st.data_editor(
+        pd.DataFrame({
+            "ไม้": range(1, num_trades + 1),
+            "Pattern": RandomStreams(seed).patterns(num_trades),  # สุ่มซื้อ/ขาย
+            "ผลลัพธ์": outcomes + ["-"] * (num_trades - len(outcomes)),
+        }),
+        key=f"trade_inputs_{st.session_state.editor_nonce}",
+        column_config={"ผลลัพธ์": st.column_config.SelectboxColumn("ผลลัพธ์", options=["-", "ชนะ", "แพ้"], required=True)},
+        disabled=["ไม้", "Pattern"],
+        hide_index=True,
+    )
+    st.session_state.trade_outcomes = trade_inputs["ผลลัพธ์"].tolist()
+
+# replay ทั้งตารางแบบ vectorized ครั้งเดียว (ผลเท่ากับ replay ทีละไม้)
+with prof.stage("replay_outcomes"):
+    codes = trade_inputs["ผลลัพธ์"].map(RESULT_CODES).to_numpy(dtype="int8")
+    _, next_bets, balances, _ = replay_outcomes(codes, capital, first_bet, target_profit, odds)
+    balance = balances[-1]
 
 # ===== Show Table =====
-df = pd.DataFrame(results)
+with prof.stage("results_frame"):
+    df = pd.DataFrame({
+        "ไม้": trade_inputs["ไม้"].to_numpy(),
+        "Pattern": trade_inputs["Pattern"].to_numpy(),
+        "ผลลัพธ์": trade_inputs["ผลลัพธ์"].to_numpy(),
+        "เงินเดิมพัน": next_bets,
+        "พอร์ต": [round(value, 2) for value in balances.tolist()],
+    })
 st.subheader("📊 ตารางการเดินเงิน")
 st.dataframe(df)
 
 # ===== Show Chart =====
-fig, ax = plt.subplots()
-ax.plot(df["ไม้"], df["พอร์ต"], marker="o")
-ax.set_xlabel("ไม้ที่")
-ax.set_ylabel("มูลค่าพอร์ต (บาท)")
-ax.set_title("การเติบโตของพอร์ต")
-ax.grid(True)
-st.pyplot(fig)
+@st.cache_data(max_entries=16, show_spinner=False)
+def equity_chart(trades, balances):
+    return equity_curve_png(trades, balances)
+
+
+with prof.stage("equity_chart"):
+    chart = equity_chart(tuple(df["ไม้"]), tuple(df["พอร์ต"]))
+st.image(chart, use_container_width=True)
 
 # ===== Summary =====
 total_profit = balance - capital
 st.success(f"✅ กำไรรวมประมาณ: {total_profit:,.2f} บาท")
+
+debug_panel(prof, prefix="stock_money_manual_sim")
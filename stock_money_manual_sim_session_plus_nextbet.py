@@ -1,275 +1,109 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import math
-import random
-from io import StringIO
-from datetime import datetime
+from stock_money_engine import next_bet
+from stock_money_profiler import debug_panel, session_profiler
+from stock_money_results import NEXT_BET_SCHEMA
+from stock_money_service import JournalService
+from stock_money_session_ui import SessionApp
+import uuid
 
 st.set_page_config(page_title="การเดินเงินหุ้น (เวอร์ชันเสริม + Next Bet)", page_icon="📈")
+prof = session_profiler()  # จับเวลาแต่ละขั้น (เปิดจากแผงดีบักในแถบข้าง)
 
 st.title("📈 การเดินเงินหุ้น (พุธ=ซื้อ, คอ=ขาย) – เวอร์ชันเสริม + Next Bet")
-st.markdown("เพิ่มคอลัมน์ **เงินเดิมพันไม้ถัดไป** เพื่อวางแผนล่วงหน้า พร้อม Undo / ล็อก Pattern / Export-Import CSV")
-
-# ===================== Session Init =====================
-defaults = {
-    "results": [],
-    "balance": None,
-    "bet_amount": None,
-    "loss_streak_amount": 0,
-    "patterns": [],
-    "locked_patterns": False,
-    "inputs_snapshot": {},
-}
-for k, v in defaults.items():
-    if k not in st.session_state:
-        st.session_state[k] = v
-
-# ===================== Sidebar Controls =====================
-st.sidebar.header("⚙️ การตั้งค่า")
-locked = st.sidebar.checkbox("🔒 ล็อก Pattern (ไม่สุ่มใหม่เมื่อเปลี่ยนอินพุต)", value=st.session_state.locked_patterns)
-st.session_state.locked_patterns = locked
-
-if st.sidebar.button("🎲 สุ่ม Pattern ใหม่", use_container_width=True):
-    st.session_state.patterns = []  # จะถูกสร้างใหม่ด้านล่างตาม num_trades
-
-if st.sidebar.button("🧹 ล้างผล (Clear Results)", use_container_width=True):
-    st.session_state.results = []
-    st.session_state.balance = None
-    st.session_state.bet_amount = None
-    st.session_state.loss_streak_amount = 0
-
-# ===================== Inputs =====================
-capital = st.number_input("💰 เงินทุนเริ่มต้น (บาท)", min_value=10.0, value=1000.0, step=10.0)
-num_trades = st.number_input("🔢 จำนวนไม้ที่ต้องการจำลอง", min_value=1, value=5, step=1)
-target_profit = st.number_input("🎯 กำไรที่ต้องการต่อรอบ (บาท)", min_value=0.1, value=1.0, step=0.1)
-odds = st.number_input("⚖️ อัตราจ่าย (1.0 = กำไรเท่าทุน)", min_value=0.1, value=1.0, step=0.1)
-first_bet = st.number_input("💵 เงินเดิมพันไม้แรก (บาท)", min_value=0.1, value=30.0, step=1.0)
-
-# เก็บ snapshot ของอินพุตเพื่อใช้รีคอมพิวต์ (โดยเฉพาะตอน Undo / Import)
-st.session_state.inputs_snapshot = dict(
-    capital=capital, num_trades=num_trades,
-    target_profit=target_profit, odds=odds, first_bet=first_bet
-)
-
-# ===================== Maximum Trades Calc =====================
-max_bet_amount = first_bet
-loss_streak_amount_tmp = 0
-temp_capital = capital
-max_trades_possible = 0
-
-while temp_capital >= max_bet_amount and max_trades_possible < 100000:
-    temp_capital -= max_bet_amount
-    loss_streak_amount_tmp += max_bet_amount
-    max_trades_possible += 1
-    max_bet_amount = math.ceil((loss_streak_amount_tmp + target_profit) / odds) if odds > 0 else float("inf")
-
-st.info(f"💡 ถ้าแพ้ติดกันทุกไม้ จะเล่นได้สูงสุด **{max_trades_possible} ไม้** ก่อนที่ทุนจะหมด")
-
-# ===================== Reset Button =====================
-col_reset, col_lock = st.columns([1,1])
-with col_reset:
-    if st.button("🔄 เริ่มใหม่ (Reset State)"):
-        st.session_state.results = []
-        st.session_state.balance = capital
-        st.session_state.bet_amount = first_bet
-        st.session_state.loss_streak_amount = 0
-        if not st.session_state.locked_patterns:
-            st.session_state.patterns = [random.choice(["พุธ", "คอ"]) for _ in range(num_trades)]
-
-with col_lock:
-    st.write(" ")  # spacer
-    st.caption("หากล็อก Pattern ไว้ จะไม่สุ่มใหม่เมื่อปรับอินพุต")
-
-# ===================== Pattern Bootstrap =====================
-# ถ้ายังไม่มี pattern: สร้างตาม num_trades เว้นแต่ล็อกไว้และมีอยู่แล้ว
-if not st.session_state.patterns or (not st.session_state.locked_patterns and len(st.session_state.patterns) != num_trades):
-    st.session_state.patterns = [random.choice(["พุธ", "คอ"]) for _ in range(num_trades)]
-elif st.session_state.locked_patterns and len(st.session_state.patterns) < num_trades:
-    # ถ้าล็อกไว้แล้วเพิ่มจำนวนไม้ ให้เติมต่อจากรายการเดิม
-    need = num_trades - len(st.session_state.patterns)
-    if need > 0:
-        st.session_state.patterns += [random.choice(["พุธ", "คอ"]) for _ in range(need)]
-elif st.session_state.locked_patterns and len(st.session_state.patterns) > num_trades:
-    # ถ้าล็อกแล้วลดจำนวนไม้ ให้ตัดให้พอดี
-    st.session_state.patterns = st.session_state.patterns[:num_trades]
-
-# ===================== Initialize Running State =====================
-if st.session_state.balance is None:
-    st.session_state.balance = capital
-if st.session_state.bet_amount is None:
-    st.session_state.bet_amount = first_bet
-
-# ===================== Helper: Next bet calc =====================
-def compute_next_bet(current_bet, loss_sum, result):
-    if result == "ชนะ":
-        return first_bet, 0  # next bet, next loss_sum
-    elif result == "แพ้":
-        next_loss_sum = loss_sum + current_bet
-        next_bet = math.ceil((next_loss_sum + target_profit) / odds) if odds > 0 else current_bet
-        return next_bet, next_loss_sum
-    else:
-        return current_bet, loss_sum
-
-# ===================== Helper: Recompute from results =====================
-def recompute_state_from_results(results):
-    bal = capital
-    bet = first_bet
-    loss_sum = 0
-    recomputed_rows = []
-    for row in results:
-        res = row.get("ผลลัพธ์", "-")
-        patt = row.get("Pattern", "พุธ")
-
-        # bet for this row (current bet before applying result)
-        current_bet = bet
-
-        if res == "ชนะ":
-            profit = current_bet * odds
-            bal += profit
-            next_bet = first_bet
-            next_loss_sum = 0
-        elif res == "แพ้":
-            bal -= current_bet
-            next_loss_sum = loss_sum + current_bet
-            next_bet = math.ceil((next_loss_sum + target_profit) / odds) if odds > 0 else current_bet
-        else:
-            # no-op
-            next_bet = current_bet
-            next_loss_sum = loss_sum
-
-        recomputed_rows.append({
-            "ไม้": row.get("ไม้"),
-            "Pattern": patt,
-            "ผลลัพธ์": res,
-            "เงินเดิมพัน(ปัจจุบัน)": current_bet,
-            "เงินเดิมพันไม้ถัดไป": next_bet,
-            "พอร์ต": round(bal, 2)
-        })
-
-        # update state for next row
-        bet = next_bet
-        loss_sum = next_loss_sum
-
-    return bal, bet, loss_sum, recomputed_rows
-
-# ===================== Import / Export =====================
-st.subheader("📥📤 นำเข้า / ส่งออก")
-exp_col, imp_col = st.columns(2)
-
-with exp_col:
-    if st.session_state.results:
-        export_df = pd.DataFrame(st.session_state.results)
-        csv_bytes = export_df.to_csv(index=False).encode("utf-8-sig")
-        st.download_button(
-            label="⬇️ ดาวน์โหลดผลลัพธ์ (CSV)",
-            data=csv_bytes,
-            file_name=f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
-    else:
-        st.caption("ยังไม่มีผลลัพธ์ให้ดาวน์โหลด")
-
-with imp_col:
-    uploaded = st.file_uploader("อัปโหลด CSV เพื่อโหลดผล", type=["csv"])
-    if uploaded is not None:
-        try:
-            df_imp = pd.read_csv(uploaded)
-            required_cols = {"ไม้", "Pattern", "ผลลัพธ์"}
-            if not required_cols.issubset(set(df_imp.columns)):
-                st.error("ไฟล์ต้องมีคอลัมน์: ไม้, Pattern, ผลลัพธ์")
-            else:
-                # จัดเรียงตาม 'ไม้' และสร้าง list of dict
-                df_imp = df_imp.sort_values(by("ไม้")) if "ไม้" in df_imp.columns else df_imp
-                df_imp = df_imp.reset_index(drop=True)
-                loaded = df_imp[["ไม้", "Pattern", "ผลลัพธ์"]].to_dict(orient="records")
-                bal, bet, loss_sum, recomputed = recompute_state_from_results(loaded)
-                st.session_state.results = recomputed
-                st.session_state.balance = bal
-                st.session_state.bet_amount = bet
-                st.session_state.loss_streak_amount = loss_sum
-                # ถ้าล็อก pattern ให้ใช้จากไฟล์ที่นำเข้า
-                st.session_state.patterns = df_imp["Pattern"].tolist() + st.session_state.patterns[len(df_imp):]
-                st.success("นำเข้าผลลัพธ์จาก CSV สำเร็จ ✅")
-        except Exception as e:
-            st.error(f"ไม่สามารถอ่านไฟล์ได้: {e}")
-
-# ===================== Results Input Loop =====================
-st.subheader("🧮 กรอกผลลัพธ์ทีละไม้")
-for trade in range(1, int(num_trades) + 1):
-    col1, col2, col3, col4, col5 = st.columns([0.7, 1, 1, 1.2, 1.3])
-    col1.write(f"ไม้ {trade}")
-    col2.write(f"({st.session_state.patterns[trade-1]})")
-
-    # ค่าเริ่มต้นก่อนบันทึกผลของไม้ปัจจุบัน
-    current_bet = st.session_state.bet_amount if trade == len(st.session_state.results) + 1 else (
-        st.session_state.results[trade-1]["เงินเดิมพันไม้ถัดไป"] if len(st.session_state.results) >= trade else st.session_state.bet_amount
-    )
-    col3.write(f"เดิมพันปัจจุบัน: **{current_bet}**")
-
-    prior = st.session_state.results[trade-1]["ผลลัพธ์"] if len(st.session_state.results) >= trade else "-"
-    result = col4.selectbox("ผลลัพธ์", ["-", "ชนะ", "แพ้"], key=f"res_{trade}", index=["-","ชนะ","แพ้"].index(prior) if prior in ["-","ชนะ","แพ้"] else 0)
-
-    # คำนวณ next bet (preview) จากผลที่เลือกไว้
-    preview_next_bet, _ = compute_next_bet(current_bet, st.session_state.loss_streak_amount if trade == len(st.session_state.results) + 1 else 0, result)
-    col5.metric("เงินเดิมพันไม้ถัดไป (พรีวิว)", preview_next_bet)
-
-    # บันทึกเฉพาะครั้งแรกที่เลือกระหว่างไม้ถัดไป
-    if result != "-" and trade == len(st.session_state.results) + 1:
-        # next values based on result
-        if result == "ชนะ":
-            profit = current_bet * odds
-            st.session_state.balance += profit
-            next_bet = first_bet
-            st.session_state.loss_streak_amount = 0
-        elif result == "แพ้":
-            st.session_state.balance -= current_bet
-            st.session_state.loss_streak_amount += current_bet
-            next_bet = math.ceil((st.session_state.loss_streak_amount + target_profit) / odds) if odds > 0 else current_bet
-        else:
-            next_bet = current_bet
-
-        st.session_state.results.append({
-            "ไม้": trade,
-            "Pattern": st.session_state.patterns[trade-1],
-            "ผลลัพธ์": result,
-            "เงินเดิมพัน(ปัจจุบัน)": current_bet,
-            "เงินเดิมพันไม้ถัดไป": next_bet,
-            "พอร์ต": round(st.session_state.balance, 2)
-        })
-        st.session_state.bet_amount = next_bet  # สำคัญ: อัปเดตสำหรับไม้ถัดไป
-
-# ===================== Undo =====================
-st.subheader("↩️ ย้อนกลับ (Undo)")
-if st.button("ย้อนกลับ 1 ไม้"):
-    if st.session_state.results:
-        trimmed = st.session_state.results[:-1]
-        bal, bet, loss_sum, recomputed = recompute_state_from_results(trimmed)
-        st.session_state.results = recomputed
-        st.session_state.balance = bal
-        st.session_state.bet_amount = bet
-        st.session_state.loss_streak_amount = loss_sum
-        st.success("ย้อนกลับ 1 ไม้เรียบร้อย")
-    else:
-        st.warning("ยังไม่มีผลให้ย้อนกลับ")
-
-# ===================== Display =====================
-if st.session_state.results:
-    df = pd.DataFrame(st.session_state.results)
-    st.subheader("📊 ตารางการเดินเงิน")
-    st.dataframe(df, use_container_width=True, hide_index=True)
-
-    st.subheader("📈 Equity Curve")
-    fig, ax = plt.subplots()
-    ax.plot(df["ไม้"], df["พอร์ต"], marker="o")
-    ax.set_xlabel("ไม้ที่")
-    ax.set_ylabel("มูลค่าพอร์ต (บาท)")
-    ax.set_title("การเติบโตของพอร์ต")
-    ax.grid(True)
-    st.pyplot(fig)
-
-    total_profit = st.session_state.balance - capital
-    st.success(f"✅ กำไรรวมประมาณ: {total_profit:,.2f} บาท")
+st.markdown("เพิ่มคอลัมน์ **เงินเดิมพันไม้ถัดไป** เพื่อวางแผนล่วงหน้า พร้อม Undo / ล็อก Pattern / Export-Import CSV / Parquet")
+
+# ===================== Shared journal =====================
+# journal รวมของทุกเซสชันในเซิร์ฟเวอร์นี้ (หนึ่ง service ต่อ process) แยกตามชื่อบัญชี
+@st.cache_resource
+def journal_service():
+    return JournalService().start()
+
+
+# ===================== Next bet app =====================
+# ส่วนที่เหลือใช้ร่วมกับเวอร์ชันเสริม (stock_money_session_ui): ต่างกันที่ schema, แถวบันทึกผล และการส่งไม้เข้า journal รวม
+class NextBetApp(SessionApp):
+    def compute_next_bet(self, current_bet, loss_sum, result):
+        return next_bet(current_bet, loss_sum, result, self.first_bet, self.target_profit, self.odds)
+
+    def trade_row(self, trade):
+        col1, col2, col3, col4, col5 = st.columns([0.7, 1, 1, 1.2, 1.3])
+        col1.write(f"ไม้ {trade}")
+        col2.write(f"({st.session_state.patterns[trade-1]})")
+
+        # ค่าเริ่มต้นก่อนบันทึกผลของไม้ปัจจุบัน
+        current_bet = st.session_state.bet_amount
+        col3.write(f"เดิมพันปัจจุบัน: **{current_bet}**")
+
+        col4.selectbox("ผลลัพธ์", ["-", "ชนะ", "แพ้"], key=f"res_{trade}", on_change=self.on_result_selected, args=(trade,))
+
+        # คำนวณ next bet (พรีวิว) ของทั้งสองกรณี
+        win_next_bet, _ = self.compute_next_bet(current_bet, st.session_state.loss_streak_amount, "ชนะ")
+        lose_next_bet, _ = self.compute_next_bet(current_bet, st.session_state.loss_streak_amount, "แพ้")
+        col5.metric("เงินเดิมพันไม้ถัดไป (ชนะ / แพ้)", f"{win_next_bet} / {lose_next_bet}")
+
+    def on_record(self, rows):
+        if st.session_state.shared_account:
+            journal_service().extend(st.session_state.shared_account, rows, session=st.session_state.session_id)
+
+
+app = NextBetApp(prof, NEXT_BET_SCHEMA, with_current_bet=True, extra_defaults={
+    "session_id": uuid.uuid4().hex[:8],
+    "shared_account": "",
+    "shared_book": None,  # (บัญชี, version, entries ล่าสุดไม่เกิน SHARED_BOOK_TAIL แถว) ของ journal รวมที่ดึงมาแล้ว
+})
+app.sidebar()
+st.sidebar.text_input("👥 บัญชี (journal รวม)", key="shared_account", help="เซสชันที่ใช้ชื่อบัญชีเดียวกันเห็นไม้ที่บันทึกของกันและกัน (เว้นว่าง = ไม่แชร์)")
+app.inputs()
+app.import_export()
+app.trade_panel()
+
+# ===================== Shared journal (ทุกเซสชัน) =====================
+# fragment รันซ้ำเองทุก 2 วินาทีโดยไม่ rerun ทั้งหน้า และดึงเฉพาะ entry ที่ใหม่กว่า version ที่เคยเห็น
+# (Streamlit ส่งข้อมูลเข้าเซสชันได้เฉพาะตอน rerun จึงใช้ poll แทน subscribe / wait_delta ของ service
+#  ซึ่งจะบล็อก thread ของสคริปต์จนกด widget อื่นไม่ตอบสนอง)
+# journal รวมเป็นแบบ append-only: Undo / แก้ย้อนหลังมีผลเฉพาะเซสชันนี้
+# แต่ละเซสชันในบัญชีเดินเงินแยกกัน พอร์ต / เดิมพันไม้ถัดไปจึงแสดงของเซสชันนี้ และแยกตามเซสชันในตาราง
+SHARED_BOOK_TAIL = 200
+
+
+@st.fragment(run_every=2)
+def shared_journal(account):
+    book = st.session_state.shared_book
+    if book is None or book[0] != account:
+        book = (account, 0, [])
+    with prof.stage("shared_journal_delta"):  # รันเองทุก 2 วินาที: นับรวมในรอบถัดไปของ profiler
+        version, entries, summary = journal_service().delta(account, book[1])
+    book[2].extend(entries)
+    del book[2][:-SHARED_BOOK_TAIL]  # แถวทั้งหมดอยู่ใน journal แล้ว เซสชันเก็บเฉพาะท้ายที่แสดง
+    st.session_state.shared_book = book = (account, version, book[2])
+    if journal_service().write_error:
+        st.warning(f"บันทึก journal ลงดิสก์ไม่สำเร็จ (ยังแชร์ระหว่างเซสชันได้จนปิดเซิร์ฟเวอร์): {journal_service().write_error}")
+
+    sessions = summary["sessions"]
+    mine = sessions.get(st.session_state.session_id)
+    s1, s2, s3 = st.columns(3)
+    s1.metric("พอร์ตล่าสุด (เซสชันนี้)", "-" if mine is None else f"{mine['balance']:,.2f}")
+    s2.metric("เงินเดิมพันไม้ถัดไป (เซสชันนี้)", "-" if mine is None else f"{mine['next_bet']:,.2f}")
+    s3.metric("จำนวนไม้ในบัญชี", f"{version:,}", help=f"จาก {len(sessions):,} เซสชัน")
+    if len(sessions) > 1 or (sessions and mine is None):
+        st.dataframe([
+            {"เซสชัน": session + (" (นี่)" if session == st.session_state.session_id else ""), "ไม้": info["trades"],
+             "พอร์ตล่าสุด": info["balance"], "เงินเดิมพันไม้ถัดไป": info["next_bet"], "อัปเดต": info["updated"]}
+            for session, info in sessions.items()
+        ], use_container_width=True, hide_index=True)
+    if book[2]:
+        st.dataframe(book[2][-20:][::-1], use_container_width=True, hide_index=True)
+    others = {name: info for name, info in journal_service().summaries().items() if name != account and info["version"]}
+    if others:
+        st.caption("บัญชีอื่น: " + " | ".join(
+            f"{name}: {info['version']:,} ไม้ จาก {len(info['sessions']):,} เซสชัน" for name, info in others.items()
+        ))
+
+
+st.subheader("👥 Journal รวม (ทุกเซสชัน)")
+if st.session_state.shared_account:
+    shared_journal(st.session_state.shared_account)
 else:
-    st.caption("ยังไม่มีผลลัพธ์ - เลือกผลลัพธ์ของไม้แรกเพื่อเริ่มบันทึก")
+    st.caption("ใส่ชื่อบัญชีใน sidebar เพื่อแชร์ไม้ที่บันทึกกับเซสชันอื่นแบบสด")
+
+debug_panel(prof, prefix="stock_money_manual_sim_session_plus_nextbet")
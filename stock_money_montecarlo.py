@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from stock_money_rng import RandomStreams
+
+# ===================== Monte Carlo: ระบบชดทุน + เป้ากำไร =====================
+# จำลองหลายเส้นทางพร้อมกันด้วย NumPy โดยใช้กติกาเดียวกับ stock_money_recovery_target.py
+#   ชนะ -> พอร์ต += เดิมพัน * odds, ล้างขาดทุนสะสม, กลับไปเดิมพันไม้แรก
+#   แพ้ -> พอร์ต -= เดิมพัน, ขาดทุนสะสม += เดิมพัน, เดิมพันใหม่ = ceil((ขาดทุนสะสม + เป้า) / odds)
+# เส้นทางที่ทุนเหลือไม่พอวางเดิมพันไม้ถัดไปถือว่า "ทุนหมด" และหยุดเทรด (เหมือน max_trades_possible)
+# ค่าสุ่มของเส้นทาง p ไม้ t มาจาก stream "monte_carlo" ตำแหน่ง (t, p) ของ stock_money_rng.py
+# แบ่งเส้นทางเป็นช่วง ๆ (first_path) ไปรันหลาย worker แล้วต่อกันจะได้ผลเหมือนรันรวดเดียว
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+# ผลมี array ขนาด num_paths (1M เส้นทาง = 16 MB) และใช้อ่านอย่างเดียว: แอป cache ผลลัพธ์ (รวมถึง RuinDistribution)
+# ด้วย st.cache_resource ซึ่งคืน object เดิม แทน st.cache_data ที่ต้อง pickle/unpickle array ทั้งก้อนทุก rerun
+# ผู้เรียกจึงห้ามแก้ array ในผลลัพธ์แบบ in-place
+@dataclass
+class MonteCarloResult:
+    final_balances: np.ndarray      # พอร์ตสุดท้ายของทุกเส้นทาง (num_paths,)
+    ruined_at: np.ndarray           # ไม้ที่ทุนหมด (-1 = ไม่หมด) (num_paths,)
+    band_trades: np.ndarray         # ไม้ที่เก็บ percentile band (num_points,)
+    bands: np.ndarray               # มูลค่าพอร์ตตาม percentile (len(percentiles), num_points)
+    percentiles: tuple
+    paths: Optional[np.ndarray] = None  # เมทริกซ์พอร์ต (num_trades + 1, num_paths) ถ้า keep_paths=True
+    seed: Optional[int] = None          # seed ที่ใช้จริง (ส่ง seed นี้กลับเข้าไปจะได้ผลเดิม)
+
+    @property
+    def ruin_probability(self):
+        return float(np.mean(self.ruined_at >= 0))
+
+    @property
+    def mean_final_balance(self):
+        return float(self.final_balances.mean())
+
+
+def simulate_recovery_paths(
+    capital,
+    first_bet,
+    target_profit,
+    odds,
+    num_trades,
+    num_paths=10_000,
+    win_prob=0.5,
+    percentiles=DEFAULT_PERCENTILES,
+    max_band_points=200,
+    keep_paths=False,
+    seed=None,
+    first_path=0,
+):
+    """จำลอง num_paths เส้นทาง x num_trades ไม้ในรอบเดียว
+
+    คืนค่า MonteCarloResult ที่มีพอร์ตสุดท้าย, ไม้ที่ทุนหมด และ percentile band
+    (เก็บไม่เกิน max_band_points จุด เพื่อให้ใช้กับ 1M เส้นทางได้โดยไม่ต้องเก็บทั้งเมทริกซ์)
+    seed (int หรือ RandomStreams) + first_path กำหนดเส้นทางที่ first_path .. first_path+num_paths-1
+    """
+    num_trades = int(num_trades)
+    num_paths = int(num_paths)
+    if odds <= 0:
+        raise ValueError("odds ต้องมากกว่า 0")
+
+    streams = seed if isinstance(seed, RandomStreams) else RandomStreams(seed)
+    balances = np.full(num_paths, float(capital))
+    ruined_at = np.full(num_paths, -1, dtype=np.int64)
+    if capital < first_bet:
+        ruined_at[:] = 0
+
+    # เก็บเฉพาะเส้นทางที่ยังเทรดอยู่ (บีบอาร์เรย์ทุกครั้งที่มีเส้นทางทุนหมด)
+    # เส้นทางที่ทุนหมดแล้วไม่ต้องคำนวณต่อ ทำให้ยิ่งเสี่ยงสูงยิ่งจำลองเร็ว
+    idx = np.flatnonzero(ruined_at < 0)
+    bal = balances[idx]
+    bet = np.full(len(idx), float(first_bet))
+    loss_sum = np.zeros(len(idx))
+
+    # เลือกไม้ที่จะเก็บ band แบบกระจายเท่า ๆ กัน (รวมไม้ 0 และไม้สุดท้ายเสมอ)
+    num_points = min(num_trades + 1, max(2, int(max_band_points)))
+    band_trades = np.unique(np.linspace(0, num_trades, num_points).round().astype(np.int64))
+    bands = np.empty((len(percentiles), len(band_trades)))
+    bands[:, 0] = capital
+    band_pos = 1
+
+    paths = None
+    if keep_paths:
+        paths = np.empty((num_trades + 1, num_paths), dtype=np.float32)
+        paths[0] = balances
+
+    for trade in range(1, num_trades + 1):
+        if len(idx) == 0 and not keep_paths and band_pos >= len(band_trades):
+            break
+        # ดึงค่าสุ่มถึงเส้นทางที่ยังอยู่ตัวสุดท้าย (idx เรียงอยู่แล้ว) แล้วเลือกเฉพาะที่ยังเทรด
+        draws = streams.uniforms("monte_carlo", trade, first_path, idx[-1] + 1) if len(idx) else np.empty(0)
+        win = (draws if len(draws) == len(idx) else draws[idx]) < win_prob
+        bal += np.where(win, bet * odds, -bet)
+        loss_sum = np.where(win, 0.0, loss_sum + bet)
+        bet = np.where(win, first_bet, np.ceil((loss_sum + target_profit) / odds))
+
+        busted = bal < bet
+        if busted.any():
+            dead = idx[busted]
+            balances[dead] = bal[busted]
+            ruined_at[dead] = trade
+            keep = ~busted
+            idx, bal, bet, loss_sum = idx[keep], bal[keep], bet[keep], loss_sum[keep]
+
+        record_band = band_pos < len(band_trades) and band_trades[band_pos] == trade
+        if keep_paths or record_band:
+            balances[idx] = bal
+        if keep_paths:
+            paths[trade] = balances
+        if record_band:
+            bands[:, band_pos] = np.percentile(balances, percentiles)
+            band_pos += 1
+
+    balances[idx] = bal
+
+    return MonteCarloResult(
+        final_balances=balances,
+        ruined_at=ruined_at,
+        band_trades=band_trades,
+        bands=bands,
+        percentiles=tuple(percentiles),
+        paths=paths,
+        seed=streams.seed,
+    )
+
@@ -0,0 +1,357 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ===================== Rerun profiler =====================
+# จับเวลาแต่ละขั้นของสคริปต์ Streamlit (เปิดเองจากแผงดีบัก ปิดอยู่จะไม่จับอะไรเลย)
+# - with profiler.stage("ชื่อ"): ... / @profiler.timed() ครอบขั้นที่ต้องการ ซ้อนกันได้
+# - หนึ่งรอบ (run) = rerun ทั้งหน้า หรือ rerun เฉพาะ fragment; เก็บเวลาของรอบล่าสุด + สะสมทุกรอบ (เวลา / จำนวนครั้ง)
+#   stage ที่เกิดนอกรอบ (เช่น callback ของปุ่มที่รันก่อนสคริปต์) ถูกนับรวมในรอบถัดไป
+# - peak memory ต่อขั้นด้วย tracemalloc (เลือกเปิด เพราะทำให้ช้าลง) และ peak RSS ของทั้งโปรเซส
+#   tracemalloc มีตัวเดียวทั้งโปรเซส แต่ละเซสชันมี Profiler ของตัวเอง จึงจัดการร่วมกันที่ระดับโมดูล:
+#   เปิดเมื่อมี Profiler แรกขอ ปิดเมื่อไม่เหลือ Profiler ที่วัดหน่วยความจำ (นับ reference ด้วย WeakSet)
+#   และก่อน reset_peak ทุกครั้งจะพับ peak ปัจจุบันเข้าทุกขั้นที่ยังเปิดอยู่ของทุกเซสชัน ไม่มีเซสชันไหนทำให้ค่าของอีกเซสชันหาย
+#   (peak ของขั้นจึงรวมหน่วยความจำที่เซสชันอื่นจองในช่วงเวลาเดียวกันด้วย)
+# - เปิด cProfile ได้ทุกรอบ แล้ว dump เป็นไฟล์ .prof (pstats / snakeviz) + JSON แบบ Chrome trace (chrome://tracing, Perfetto)
+
+HISTORY_RUNS = 50
+MAX_PENDING = 1_000  # stage นอกรอบที่เก็บรอไว้ได้ (เช่น fragment ที่รันเองทุกไม่กี่วินาที)
+DUMP_DIR = "profiles"
+
+_memory_lock = threading.Lock()
+_memory_users = weakref.WeakSet()  # Profiler ที่เปิดวัดหน่วยความจำอยู่
+_open_frames = {}                  # id(frame) -> frame ของทุกขั้นที่ยังเปิดอยู่ (ทุกเซสชัน)
+_started_tracing = False           # tracemalloc ถูกเปิดโดยโมดูลนี้ (ไม่ปิดถ้าเปิดจากที่อื่น เช่น PYTHONTRACEMALLOC)
+
+
+def _fold_peak():
+    """พับ peak ตั้งแต่ reset ครั้งก่อนเข้าทุกขั้นที่เปิดอยู่ แล้ว reset peak คืนหน่วยความจำปัจจุบัน (เรียกภายใต้ _memory_lock)"""
+    current, peak = tracemalloc.get_traced_memory()
+    for frame in _open_frames.values():
+        frame[1] = max(frame[1], peak)
+    tracemalloc.reset_peak()
+    return current
+
+
+class Profiler:
+    def __init__(self, history=HISTORY_RUNS):
+        self.enabled = False
+        self.track_memory = False
+        self.use_cprofile = False
+        self.history = history
+        self.runs = []        # รอบที่จบแล้ว ล่าสุดอยู่ท้าย
+        self.totals = {}      # ชื่อขั้น -> [เวลารวม ms, จำนวนครั้ง, เวลาสูงสุด ms, peak สูงสุด (ไบต์)]
+        self.run_counts = {}  # scope -> จำนวนรอบ
+        self._run = None
+        self._pending = []
+        self._stack = []      # [ตำแหน่งหน่วยความจำตอนเริ่ม, peak สูงสุดที่เห็น] ของรอบ / ขั้นที่ซ้อนกันอยู่
+        self._depth = 0
+        self._profile = None
+        self._stats = None
+
+    def configure(self, enabled, track_memory=False, use_cprofile=False):
+        global _started_tracing
+        self.enabled = bool(enabled)
+        self.track_memory = self.enabled and bool(track_memory)
+        self.use_cprofile = self.enabled and bool(use_cprofile)
+        with _memory_lock:
+            if self.track_memory:
+                _memory_users.add(self)
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _started_tracing = True
+            else:
+                _memory_users.discard(self)
+                if not _memory_users and _started_tracing:
+                    tracemalloc.stop()
+                    _started_tracing = False
+
+    # ---------- memory ----------
+    def _memory_enter(self):
+        if not self.track_memory:
+            return None
+        with _memory_lock:
+            if not tracemalloc.is_tracing():
+                return None
+            current = _fold_peak()
+            frame = [current, current]
+            _open_frames[id(frame)] = frame
+        self._stack.append(frame)
+        return frame
+
+    def _memory_exit(self, frame):
+        if frame is None:
+            return None
+        with _memory_lock:
+            if tracemalloc.is_tracing():
+                _fold_peak()
+            _open_frames.pop(id(frame), None)
+        if self._stack and self._stack[-1] is frame:
+            self._stack.pop()
+        return frame[1] - frame[0]
+
+    def _drop_frames(self):
+        """ทิ้งขั้นที่ค้างอยู่ของรอบที่ถูกขัดจังหวะ (ไม่ให้รับ peak ต่อไปเรื่อย ๆ)"""
+        with _memory_lock:
+            for frame in self._stack:
+                _open_frames.pop(id(frame), None)
+        self._stack.clear()
+
+    # ---------- runs ----------
+    def begin_run(self, scope="app"):
+        """เริ่มรอบใหม่ (ถ้ารอบก่อนถูกขัดจังหวะกลางทางจะถูกทิ้ง)"""
+        self._stop_cprofile()
+        self._drop_frames()
+        self._depth = 0
+        self._run = None
+        if not self.enabled:
+            self._pending.clear()
+            return
+        self.run_counts[scope] = self.run_counts.get(scope, 0) + 1
+        self._run = {
+            "scope": scope,
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "start": time.perf_counter(),
+            "stages": self._pending,
+            "memory": self._memory_enter(),
+        }
+        self._pending = []
+        if self.use_cprofile:
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:  # มี profiler อื่นทำงานอยู่ใน thread นี้
+                self._profile = None
+
+    def end_run(self):
+        """ปิดรอบปัจจุบัน คืนข้อมูลของรอบ (None ถ้าไม่ได้จับเวลา)"""
+        run, self._run = self._run, None
+        self._stop_cprofile()
+        if run is None:
+            return None
+        run["elapsed"] = (time.perf_counter() - run["start"]) * 1000
+        run["peak"] = self._memory_exit(run.pop("memory"))
+        self.runs = (self.runs + [run])[-self.history:]
+        return run
+
+    def _stop_cprofile(self):
+        if self._profile is None:
+            return
+        self._profile.disable()
+        if self._stats is None:
+            self._stats = pstats.Stats(self._profile)
+        else:
+            self._stats.add(self._profile)
+        self._profile = None
+
+    @property
+    def last_run(self):
+        return self.runs[-1] if self.runs else None
+
+    def reset(self):
+        self.runs, self.totals, self.run_counts, self._stats = [], {}, {}, None
+
+    # ---------- stages ----------
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        depth = self._depth
+        self._depth += 1
+        frame = self._memory_enter()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self._depth = depth
+            peak = self._memory_exit(frame)
+            event = {"name": name, "start": start, "elapsed": elapsed, "peak": peak, "depth": depth}
+            if self._run is not None:
+                self._run["stages"].append(event)
+            else:
+                self._pending = (self._pending + [event])[-MAX_PENDING:]
+            total = self.totals.setdefault(name, [0.0, 0, 0.0, None])
+            total[0] += elapsed
+            total[1] += 1
+            total[2] = max(total[2], elapsed)
+            if peak is not None:
+                total[3] = max(total[3] or 0, peak)
+
+    def timed(self, name=None):
+        """decorator: จับเวลาทุกครั้งที่ฟังก์ชันถูกเรียก"""
+        def decorate(func):
+            label = name or func.__name__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    # ---------- report ----------
+    def summary(self):
+        """ตารางต่อขั้น: รอบล่าสุด + สะสม เรียงตามเวลารวมมากไปน้อย"""
+        last = {}
+        for event in (self.last_run or {}).get("stages", []):
+            ms, calls = last.get(event["name"], (0.0, 0))
+            last[event["name"]] = (ms + event["elapsed"], calls + 1)
+        rows = []
+        for name, (total, calls, slowest, peak) in sorted(self.totals.items(), key=lambda item: -item[1][0]):
+            rows.append({
+                "ขั้น": name,
+                "รอบล่าสุด (ms)": last.get(name, (0.0, 0))[0],
+                "ครั้ง (รอบล่าสุด)": last.get(name, (0.0, 0))[1],
+                "รวม (ms)": total,
+                "ครั้ง (รวม)": calls,
+                "เฉลี่ย (ms)": total / calls,
+                "ช้าสุด (ms)": slowest,
+                "peak (KB)": None if peak is None else peak / 1024,
+            })
+        return rows
+
+    def trace(self):
+        """ทุกขั้นของรอบที่เก็บไว้ในรูป Chrome trace event"""
+        events = [event for run in self.runs for event in run["stages"]]
+        origin = min([run["start"] for run in self.runs] + [event["start"] for event in events], default=0.0)
+        trace = []
+        for index, run in enumerate(self.runs):
+            trace.append({
+                "name": run["scope"], "cat": "run", "ph": "X", "pid": 1, "tid": 1,
+                "ts": (run["start"] - origin) * 1e6, "dur": run["elapsed"] * 1000,
+                "args": {"run": index + 1, "time": run["time"], "peak_bytes": run["peak"]},
+            })
+        for event in events:
+            trace.append({
+                "name": event["name"], "cat": "stage", "ph": "X", "pid": 1, "tid": 1,
+                "ts": (event["start"] - origin) * 1e6, "dur": event["elapsed"] * 1000,
+                "args": {"peak_bytes": event["peak"]},
+            })
+        return trace
+
+    def dump(self, directory=DUMP_DIR, prefix="profile"):
+        """เขียน JSON (Chrome trace + สรุป) และ .prof ของ cProfile (ถ้าเปิด) คืน list ของ path"""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        with open(f"{stem}.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "traceEvents": self.trace(),
+                "displayTimeUnit": "ms",
+                "otherData": {"summary": self.summary(), "run_counts": self.run_counts, "peak_rss_bytes": peak_rss()},
+            }, f, ensure_ascii=False, indent=1)
+        paths = [f"{stem}.json"]
+        if self._stats is not None:
+            self._stats.dump_stats(f"{stem}.prof")
+            paths.append(f"{stem}.prof")
+        return paths
+
+
+def peak_rss():
+    """peak RSS ของโปรเซส (ไบต์) หรือ None ถ้าระบบไม่รองรับ"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux รายงานเป็น KB
+
+
+# ===================== Streamlit debug panel =====================
+# ใช้ในแอป:
+#   prof = session_profiler()                       # บนสุดของสคริปต์ (หลัง set_page_config)
+#   with prof.stage("..."): ...                     # รอบขั้นที่ต้องการ
+#   with fragment_scope(prof, "ชื่อ fragment"): ... # ในตัว fragment
+#   debug_panel(prof)                               # ล่างสุดของสคริปต์
+# เปิดจาก checkbox ในแถบข้าง หรือเปิดแอปด้วย ?debug=1
+
+def session_profiler(scope="app"):
+    """Profiler ของเซสชันนี้ เริ่มรอบใหม่ตามตัวเลือกในแผงดีบัก"""
+    import streamlit as st
+
+    if "profiler" not in st.session_state:
+        st.session_state.profiler = Profiler()
+        st.session_state.setdefault("debug_profiling", st.query_params.get("debug") == "1")
+    prof = st.session_state.profiler
+    prof.configure(
+        st.session_state.get("debug_profiling", False),
+        st.session_state.get("debug_memory", False),
+        st.session_state.get("debug_cprofile", False),
+    )
+    prof.begin_run(scope)
+    return prof
+
+
+@contextmanager
+def fragment_scope(prof, name):
+    """rerun เฉพาะ fragment = รอบใหม่ของ profiler; ตอน rerun ทั้งหน้า = ขั้นหนึ่งของรอบนั้น"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is not None and ctx.fragment_ids_this_run:
+        prof.begin_run(name)
+        try:
+            yield
+        finally:
+            prof.end_run()
+    else:
+        with prof.stage(name):
+            yield
+
+
+def debug_panel(prof, prefix="profile"):
+    """ปิดรอบของสคริปต์ แล้วแสดงแผงดีบักในแถบข้าง"""
+    import streamlit as st
+
+    prof.end_run()
+    with st.sidebar.expander("🔬 ดีบัก: จับเวลาแต่ละขั้น", expanded=prof.enabled):
+        st.checkbox("เปิดจับเวลา", key="debug_profiling")
+        if not st.session_state.debug_profiling:
+            st.caption("ปิดอยู่: ไม่จับเวลา ไม่มี overhead")
+            return
+        st.checkbox("วัดหน่วยความจำ (tracemalloc, ช้าลง)", key="debug_memory")
+        if st.session_state.get("debug_memory"):
+            st.caption("tracemalloc ใช้ร่วมทั้งโปรเซส: peak ของแต่ละขั้นรวมหน่วยความจำที่เซสชันอื่นจองในช่วงเดียวกันด้วย")
+        st.checkbox("cProfile ทุกรอบ", key="debug_cprofile")
+
+        # แผงเป็น fragment: กดรีเฟรชเพื่อดูรอบล่าสุดของ fragment อื่น โดยไม่ rerun ทั้งหน้า
+        @st.fragment
+        def report():
+            refresh_col, reset_col = st.columns(2)
+            refresh_col.button("🔄 รีเฟรช", use_container_width=True)
+            if reset_col.button("🧹 ล้างสถิติ", use_container_width=True):
+                prof.reset()
+            run = prof.last_run
+            if run is not None:
+                peak = "" if run["peak"] is None else f" | peak {run['peak'] / 1024:,.0f} KB"
+                st.caption(f"รอบล่าสุด: {run['scope']} {run['elapsed']:.1f} ms{peak} ({run['time']})")
+            counts = ", ".join(f"{scope} {count:,}" for scope, count in prof.run_counts.items())
+            if counts:
+                st.caption(f"จำนวนรอบ: {counts}")
+            rss = peak_rss()
+            if rss is not None:
+                st.caption(f"peak RSS ของโปรเซส: {rss / 2**20:,.1f} MB")
+            rows = prof.summary()
+            if rows:
+                st.dataframe(rows, hide_index=True, use_container_width=True, column_config={
+                    name: st.column_config.NumberColumn(format="%.2f")
+                    for name in ("รอบล่าสุด (ms)", "รวม (ms)", "เฉลี่ย (ms)", "ช้าสุด (ms)", "peak (KB)")
+                })
+            if st.button("💾 บันทึก trace (JSON / cProfile)", use_container_width=True):
+                paths = prof.dump(prefix=prefix)
+                st.success("บันทึกแล้ว: " + ", ".join(paths))
+
+        report()
@@ -1,10 +1,27 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import random
-import math
+from stock_money_charts import equity_curve_png, fan_chart_png, heatmap_png, strategy_bands_png, terminal_wealth_png
+from stock_money_compare import (
+    anti_martingale_policy,
+    compare_policies,
+    compare_simulated,
+    fixed_fractional_policy,
+    kelly_fraction,
+    kelly_policy,
+    observed_win_rate,
+    outcome_matrix,
+    recovery_policy,
+)
+from stock_money_engine import max_losing_streak, replay_results
+from stock_money_import import parse_outcome_sequences
+from stock_money_montecarlo import simulate_recovery_paths
+from stock_money_profiler import debug_panel, session_profiler
+from stock_money_rng import RandomStreams, new_seed
+from stock_money_streaks import plan_streak, streak_curve, streak_for_confidence, streak_probability
+from stock_money_sweep import SweepCache, grid_values, run_sweep
 
 st.set_page_config(page_title="การเดินเงินหุ้น (ชดทุน+เป้ากำไร)", page_icon="📈")
+prof = session_profiler()  # จับเวลาแต่ละขั้น (เปิดจากแผงดีบักในแถบข้าง)
 
 st.title("📈 การเดินเงินหุ้น (พุธ=ซื้อ, คอ=ขาย)")
 st.markdown("ระบบคำนวณเดิมพันคืนทุน + ได้กำไรตามเป้าหมาย พร้อมสุ่มรูปแบบการซื้อขาย")
@@ -16,52 +33,284 @@ target_profit = st.number_input("🎯 กำไรต่อไม้ (บาท)
 odds = st.number_input("⚖️ อัตราจ่าย (1.0 = กำไรเท่าทุน)", min_value=0.1, value=1.0, step=0.1)
 first_bet = st.number_input("💵 เดิมพันไม้แรก (บาท)", min_value=0.1, value=30.0, step=1.0)
 
-patterns = ["พุธ", "คอ"]  # พุธ=ซื้อ, คอ=ขาย
+# ===== Seed =====
+# Pattern / ผลลัพธ์ / Monte Carlo สุ่มจาก seed เดียวกัน: ใส่ seed เดิมจะได้ผลชุดเดิมทุกครั้ง
+if "seed" not in st.session_state:
+    st.session_state.seed = new_seed()
+
+
+def on_reroll():
+    st.session_state.seed = new_seed()
+
+
+seed_col, reroll_col = st.columns([3, 1])
+seed = seed_col.number_input("🌱 Seed", min_value=0, max_value=2**32 - 1, step=1, key="seed")
+reroll_col.button("🎲 สุ่มใหม่", on_click=on_reroll, use_container_width=True)
+streams = RandomStreams(seed)
 
 # ===== Calculation =====
-results = []
-balance = capital
-bet_amount = first_bet
-loss_streak_amount = 0  # ยอดขาดทุนสะสม
-
-for trade in range(1, num_trades + 1):
-    pattern = random.choice(patterns)  # สุ่มซื้อ/ขาย
-    win = random.choice([True, False])  # สุ่มผลลัพธ์
-
-    if win:
-        profit = bet_amount * odds
-        balance += profit
-        loss_streak_amount = 0  # ล้างขาดทุนสะสม
-        bet_amount = first_bet  # กลับไปเริ่มใหม่
-        result_text = "ชนะ"
-    else:
-        balance -= bet_amount
-        loss_streak_amount += bet_amount
-        bet_amount = math.ceil((loss_streak_amount + target_profit) / odds)
-        result_text = "แพ้"
-
-    results.append({
-        "ไม้": trade,
-        "Pattern": pattern,
-        "ผลลัพธ์": result_text,
-        "เงินเดิมพัน": bet_amount,
-        "พอร์ต": round(balance, 2)
-    })
+with prof.stage("replay_results"):
+    simulated = [
+        {"ไม้": trade, "Pattern": pattern, "ผลลัพธ์": "ชนะ" if win else "แพ้"}
+        for trade, pattern, win in zip(
+            range(1, num_trades + 1),
+            streams.patterns(num_trades),  # สุ่มซื้อ/ขาย
+            streams.outcomes(num_trades),  # สุ่มผลลัพธ์
+        )
+    ]
+    balance, bet_amount, loss_streak_amount, results, _ = replay_results(simulated, capital, first_bet, target_profit, odds)
 
 # ===== Show Table =====
-df = pd.DataFrame(results)
+with prof.stage("results_frame"):
+    df = pd.DataFrame(results)
 st.subheader("📊 ตารางการเดินเงิน")
 st.dataframe(df)
 
 # ===== Show Chart =====
-fig, ax = plt.subplots()
-ax.plot(df["ไม้"], df["พอร์ต"], marker="o")
-ax.set_xlabel("ไม้ที่")
-ax.set_ylabel("มูลค่าพอร์ต (บาท)")
-ax.set_title("การเติบโตของพอร์ต")
-ax.grid(True)
-st.pyplot(fig)
+@st.cache_data(max_entries=16, show_spinner=False)
+def equity_chart(trades, balances):
+    return equity_curve_png(trades, balances)
+
+
+with prof.stage("equity_chart"):
+    chart = equity_chart(tuple(df["ไม้"]), tuple(df["พอร์ต"]))
+st.image(chart, use_container_width=True)
 
 # ===== Summary =====
 total_profit = balance - capital
 st.success(f"✅ กำไรรวมประมาณ: {total_profit:,.2f} บาท")
+
+# ===== Monte Carlo (หลายเส้นทาง) =====
+st.subheader("🎲 จำลองหลายเส้นทาง (Monte Carlo)")
+mc_col1, mc_col2 = st.columns(2)
+num_paths = mc_col1.number_input("🔁 จำนวนเส้นทางที่จำลอง", min_value=100, max_value=1_000_000, value=10_000, step=1000)
+win_prob = mc_col2.slider("🍀 โอกาสชนะต่อไม้ (%)", min_value=1, max_value=99, value=50) / 100
+
+
+@st.cache_resource(max_entries=8, show_spinner="กำลังจำลอง...")
+def run_monte_carlo(capital, first_bet, target_profit, odds, num_trades, num_paths, win_prob, seed):
+    return simulate_recovery_paths(
+        capital, first_bet, target_profit, odds, num_trades,
+        num_paths=num_paths, win_prob=win_prob, seed=seed,
+    )
+
+
+with prof.stage("monte_carlo"):
+    mc = run_monte_carlo(capital, first_bet, target_profit, odds, num_trades, num_paths, win_prob, seed)
+(p5, p25, p50, p75, p95) = mc.bands
+
+m1, m2, m3 = st.columns(3)
+m1.metric("โอกาสทุนหมด", f"{mc.ruin_probability * 100:.2f}%")
+m2.metric("พอร์ตเฉลี่ยสุดท้าย", f"{mc.mean_final_balance:,.2f}")
+m3.metric("พอร์ตมัธยฐานสุดท้าย", f"{p50[-1]:,.2f}")
+
+
+@st.cache_data(show_spinner=False)
+def monte_carlo_chart(capital, first_bet, target_profit, odds, num_trades, num_paths, win_prob, seed):
+    mc = run_monte_carlo(capital, first_bet, target_profit, odds, num_trades, num_paths, win_prob, seed)
+    return fan_chart_png(mc.band_trades, mc.bands, capital, f"ช่วงการเติบโตของพอร์ต ({num_paths:,} เส้นทาง, seed {seed})")
+
+
+with prof.stage("monte_carlo_chart"):
+    chart = monte_carlo_chart(capital, first_bet, target_profit, odds, num_trades, num_paths, win_prob, seed)
+st.image(chart, use_container_width=True)
+
+# ===== เปรียบเทียบกลยุทธ์เดินเงิน =====
+# ทุกกลยุทธ์เจอผลลัพธ์ชุดเดียวกัน (เส้นทางสุ่มชุดเดียวกับ Monte Carlo ด้านบน หรือผลลัพธ์จริงที่วางไว้) ความต่างจึงมาจากกติกาการวางเงินล้วน ๆ
+st.subheader("⚖️ เปรียบเทียบกลยุทธ์เดินเงิน")
+with st.form("compare_form"):
+    c1, c2, c3 = st.columns(3)
+    fixed_risk = c1.number_input("Fixed fractional (% ของพอร์ต)", min_value=0.1, max_value=100.0, value=2.0, step=0.5)
+    kelly_scale = c2.number_input("Kelly x (สัดส่วนของ Kelly เต็ม)", min_value=0.05, max_value=2.0, value=0.5, step=0.05)
+    min_bet = c3.number_input("เดิมพันขั้นต่ำ (บาท)", min_value=0.01, value=1.0, step=0.5)
+    c4, c5 = st.columns(2)
+    anti_multiplier = c4.number_input("Anti-martingale: คูณเดิมพันหลังชนะ", min_value=1.0, max_value=10.0, value=2.0, step=0.5)
+    anti_steps = c5.number_input("Anti-martingale: ชนะติดกี่ไม้แล้วเก็บกำไร", min_value=1, max_value=20, value=3, step=1)
+    compare_source = st.radio("ผลลัพธ์ที่ใช้", ["จำลอง (เส้นทางเดียวกับ Monte Carlo)", "ผลลัพธ์จริง (วางข้อความ)"], horizontal=True)
+    compare_text = st.text_area("ผลลัพธ์จริง: W/L, ชนะ/แพ้, 1/0 แต่ละชุดคั่นด้วยบรรทัดว่าง", height=100)
+    st.form_submit_button("▶️ เปรียบเทียบ")
+
+
+def compare_policy_set(win_prob, fixed_risk, kelly_scale, anti_multiplier, anti_steps):
+    return [
+        recovery_policy(first_bet, target_profit),
+        fixed_fractional_policy(fixed_risk),
+        kelly_policy(win_prob, odds, kelly_scale),
+        anti_martingale_policy(first_bet, anti_multiplier, anti_steps),
+    ]
+
+
+@st.cache_resource(max_entries=8, show_spinner="กำลังเปรียบเทียบกลยุทธ์...")
+def run_comparison(capital, first_bet, target_profit, odds, num_trades, num_paths, win_prob, seed,
+                   fixed_risk, kelly_scale, anti_multiplier, anti_steps, min_bet, sequences):
+    if sequences:
+        outcomes = outcome_matrix(sequences)
+        policies = compare_policy_set(observed_win_rate(outcomes), fixed_risk, kelly_scale, anti_multiplier, anti_steps)
+        return compare_policies(policies, capital, odds, outcomes, min_bet=min_bet)
+    policies = compare_policy_set(win_prob, fixed_risk, kelly_scale, anti_multiplier, anti_steps)
+    return compare_simulated(policies, capital, odds, num_trades, num_paths, win_prob, seed, min_bet=min_bet)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def comparison_charts(*args):
+    result = run_comparison(*args)
+    source = f"{result.final_balances.shape[1]:,} เส้นทาง" + (f", seed {result.seed}" if result.seed is not None else " จากผลลัพธ์จริง")
+    return (
+        strategy_bands_png(result.band_trades, result.bands, result.names, capital, f"มัธยฐาน / 25%-75% ของพอร์ต ({source})"),
+        terminal_wealth_png(result.final_balances, result.names, capital, "การกระจายพอร์ตสุดท้าย (กล่อง 25%-75%, หนวด 5%-95%)"),
+    )
+
+
+sequences = ()
+try:
+    if compare_source.startswith("ผลลัพธ์จริง"):
+        sequences = tuple(tuple(codes.tolist()) for codes in parse_outcome_sequences(compare_text))
+        kelly_p = observed_win_rate(outcome_matrix(sequences))
+        st.caption(f"ผลลัพธ์จริง {len(sequences):,} ชุด, ยาวสุด {max(map(len, sequences)):,} ไม้ | อัตราชนะที่ใช้คำนวณ Kelly {kelly_p * 100:.1f}%")
+    else:
+        kelly_p = win_prob
+    st.caption(f"Kelly เต็ม = {kelly_fraction(kelly_p, odds) * 100:.2f}% ของพอร์ตต่อไม้ (ติดลบ = ไม่ควรเข้าเทรด กลยุทธ์ Kelly จึงไม่วางเงินเลย)")
+    comparison_args = (capital, first_bet, target_profit, odds, num_trades, num_paths, win_prob, seed,
+                       fixed_risk, kelly_scale, anti_multiplier, anti_steps, min_bet, sequences)
+    with prof.stage("compare_policies"):
+        comparison = run_comparison(*comparison_args)
+except ValueError as e:
+    st.error(str(e))
+    comparison = None
+
+if comparison is not None:
+    summary = comparison.summary()
+    st.dataframe(summary, hide_index=True, use_container_width=True, column_config={
+        name: st.column_config.NumberColumn(format="%.2f") for name in summary.columns[1:]
+    })
+    with prof.stage("compare_charts"):
+        bands_chart, wealth_chart = comparison_charts(*comparison_args)
+    st.image(bands_chart, use_container_width=True)
+    st.image(wealth_chart, use_container_width=True)
+
+# ===== Stress test แพ้ติด / วางแผนทุน =====
+# ใช้สูตรความน่าจะเป็นของการแพ้ติด (ไม่จำลอง) จึงตอบได้ทันทีแม้แพ้ติดหลักร้อยไม้และ 1,000,000 ไม้
+st.subheader("🧯 Stress test แพ้ติด / วางแผนทุน")
+plan_mode = st.radio("กำหนดจาก", ["ระดับความมั่นใจ", "จำนวนไม้แพ้ติด"], horizontal=True)
+s_col1, s_col2 = st.columns(2)
+horizon = s_col1.number_input("🔢 จำนวนไม้ที่จะเทรด", min_value=1, max_value=1_000_000, value=min(max(int(num_trades), 1000), 1_000_000), step=100)
+try:
+    if plan_mode == "ระดับความมั่นใจ":
+        confidence = s_col2.number_input("🛡️ ระดับความมั่นใจ (%)", min_value=50.0, max_value=99.9999, value=99.0, step=0.1, format="%.4f") / 100
+        with prof.stage("streak_for_confidence"):
+            depth = streak_for_confidence(confidence, horizon, 1 - win_prob)
+    else:
+        depth = s_col2.number_input("📉 แพ้ติดกันที่ต้องรับได้ (ไม้)", min_value=1, max_value=2_000, value=10, step=1)
+    with prof.stage("plan_streak"):
+        plan = plan_streak(depth, first_bet, target_profit, odds, horizon, win_prob)
+except ValueError as e:
+    st.error(str(e))
+    plan = None
+
+
+def money(value):
+    # ทุนสำหรับแพ้ติดหลายร้อยไม้ใหญ่มาก แสดงแบบวิทยาศาสตร์แทนตัวเลขยาวเกินจอ
+    return f"{value:,.0f}" if abs(value) < 1e15 else f"{value:.3e}"
+
+
+if plan is not None:
+    current_depth = max_losing_streak(capital, first_bet, target_profit, odds)
+    current_hit = streak_probability(current_depth + 1, horizon, 1 - win_prob)[0]
+    p1, p2, p3 = st.columns(3)
+    p1.metric("ต้องรับแพ้ติดได้", f"{plan.depth:,} ไม้")
+    p2.metric("ทุนที่ต้องมี", money(plan.capital), delta=f"{'+' if plan.capital >= capital else '-'}{money(abs(plan.capital - capital))} จากทุนปัจจุบัน", delta_color="inverse")
+    p3.metric(f"โอกาสแพ้ติดเกิน {plan.depth:,} ไม้", f"{plan.hit_probability * 100:.4g}%")
+    st.caption(
+        f"ทุนปัจจุบัน {capital:,.0f} รับแพ้ติดได้ {current_depth:,} ไม้ → โอกาสทุนหมดภายใน {horizon:,} ไม้ "
+        f"≈ {current_hit * 100:.4g}% (ชนะ {win_prob * 100:.0f}% ต่อไม้, ไม่นับกำไรที่สะสมระหว่างทาง)"
+    )
+
+    with st.expander(f"📋 ขั้นบันไดเดิมพัน {plan.depth:,} ระดับ"):
+        st.dataframe(pd.DataFrame({
+            "แพ้ติดมาแล้ว (ไม้)": range(plan.depth),
+            "เดิมพัน": plan.bets,
+            "ขาดทุนสะสมหลังแพ้": plan.losses[1:],
+        }), hide_index=True, use_container_width=True)
+
+    @st.cache_data(max_entries=16, show_spinner=False)
+    def streak_chart(horizon, loss_prob, max_depth):
+        depths, prob = streak_curve(horizon, loss_prob, max_depth)
+        return equity_curve_png(
+            depths, prob * 100, title=f"โอกาสเจอแพ้ติด >= k ไม้ ภายใน {horizon:,} ไม้",
+            xlabel="แพ้ติด k ไม้", ylabel="โอกาส (%)",
+        )
+
+    with prof.stage("streak_chart"):
+        chart = streak_chart(horizon, 1 - win_prob, max(2 * plan.depth, current_depth + 1, 10))
+    st.image(chart, use_container_width=True)
+
+# ===== Sweep พารามิเตอร์ (กริด) =====
+st.subheader("🧪 Sweep พารามิเตอร์")
+st.caption(f"ประเมินทุกชุดในกริดด้วยกติกาเดิมพันเดียวกัน ({num_trades} ไม้, ชนะ {win_prob * 100:.0f}%) แบบขนานทุกคอร์ ผลเก็บใน cache บนดิสก์")
+
+
+@st.cache_resource
+def open_sweep_cache():
+    return SweepCache()
+
+
+def axis_input(label, low, high, steps, minimum):
+    c1, c2, c3 = st.columns(3)
+    lo = c1.number_input(f"{label} ต่ำสุด", min_value=minimum, value=low)
+    hi = c2.number_input(f"{label} สูงสุด", min_value=minimum, value=high)
+    n = c3.number_input(f"{label} จำนวนค่า", min_value=1, max_value=100, value=steps, step=1)
+    return grid_values(lo, max(lo, hi), n)
+
+
+with st.form("sweep_form"):
+    sweep_odds = axis_input("⚖️ odds", 0.5, 2.0, 16, 0.1)
+    sweep_first_bets = axis_input("💵 first_bet", 5.0, 100.0, 20, 0.1)
+    sweep_targets = axis_input("🎯 target_profit", 1.0, 10.0, 4, 0.1)
+    sweep_capitals = axis_input("💰 ทุน", 1000.0, 5000.0, 3, 100.0)
+    st.caption(f"กริดนี้มี {len(sweep_odds) * len(sweep_first_bets) * len(sweep_targets) * len(sweep_capitals):,} ช่อง")
+    sweep_submitted = st.form_submit_button("▶️ คำนวณกริด")
+
+if sweep_submitted:
+    bar = st.progress(0.0, text="กำลังคำนวณกริด...")
+    with prof.stage("run_sweep"):
+        st.session_state.sweep, computed = run_sweep(
+            sweep_capitals, sweep_first_bets, sweep_targets, sweep_odds, num_trades, win_prob,
+            cache=open_sweep_cache(), progress=lambda done, total: bar.progress(done / total, text=f"คำนวณแล้ว {done:,}/{total:,} ช่อง"),
+        )
+    bar.empty()
+    st.caption(f"คำนวณใหม่ {computed:,} ช่อง จากทั้งหมด {len(st.session_state.sweep):,} ช่อง (ที่เหลือดึงจาก cache)")
+
+SWEEP_METRICS = {
+    "expected_profit": "กำไรคาดหวัง (บาท)",
+    "ruin_probability": "โอกาสทุนหมด",
+    "max_streak": "แพ้ติดกันได้สูงสุด (ไม้)",
+}
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def sweep_heatmap(metric, capital_value, target_value, frame):
+    cells = frame[(frame["capital"] == capital_value) & (frame["target_profit"] == target_value)]
+    table = cells.pivot(index="first_bet", columns="odds", values=metric)
+    return heatmap_png(
+        table.to_numpy(), list(table.columns), list(table.index), "odds", "first_bet",
+        f"{SWEEP_METRICS[metric]} | ทุน {capital_value:,.0f}, target_profit {target_value:g}",
+        cmap="RdYlGn_r" if metric == "ruin_probability" else "RdYlGn",
+    )
+
+
+if "sweep" in st.session_state:
+    sweep = st.session_state.sweep
+    h1, h2, h3 = st.columns(3)
+    metric = h1.selectbox("ค่าที่แสดง", list(SWEEP_METRICS), format_func=SWEEP_METRICS.get)
+    capital_value = h2.select_slider("💰 ทุน", options=sorted(sweep["capital"].unique()))
+    target_value = h3.select_slider("🎯 target_profit", options=sorted(sweep["target_profit"].unique()))
+    with prof.stage("sweep_heatmap"):
+        chart = sweep_heatmap(metric, capital_value, target_value, sweep)
+    st.image(chart, use_container_width=True)
+    # ช่องที่ DP เกินงบ (หรือไม้มากเกิน EXACT_MAX_TRADES) เป็นค่าประมาณจาก Monte Carlo แสดงให้รู้ว่าไม่ใช่ค่าแม่นยำ
+    shown = sweep[(sweep["capital"] == capital_value) & (sweep["target_profit"] == target_value)]
+    estimated = int((shown["method"] != "exact").sum())
+    if estimated:
+        st.caption(f"ประมาณจาก Monte Carlo {estimated:,} จาก {len(shown):,} ช่องในแผนภาพนี้ (ทั้งกริด {int((sweep['method'] != 'exact').sum()):,} จาก {len(sweep):,} ช่อง)")
+
+debug_panel(prof, prefix="stock_money_recovery_target")
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+
+from stock_money_history import apply_checkpoint
+
+# ===================== Prefix-cached replay =====================
+# เก็บผล replay ของประวัติแยกตามชุดพารามิเตอร์ (capital, first_bet, target_profit, odds)
+# แต่ละชุดจำ rows / checkpoints / hashes ของ prefix ที่เคยคำนวณไว้ เมื่อสลับกลับไปใช้ชุดเดิม
+# จะ replay เฉพาะไม้หลังจุดที่ประวัติต่างกัน (หาได้ด้วย binary search บน hash ต่อเนื่อง)
+# บันทึกไม้ใหม่ภายใต้พารามิเตอร์เดิมไม่ต้องผ่าน cache เลย (record_trade เป็น O(1) อยู่แล้ว)
+
+
+def common_prefix(a, b):
+    """ความยาว prefix ที่ตรงกันของ hash chain สองชุด
+    hash ตำแหน่ง i ตรงกันแปลว่าแถว 0..i ตรงกันทั้งหมด จึง binary search ได้
+    """
+    lo, hi = 0, min(len(a), len(b))
+    if hi and a[hi - 1] == b[hi - 1]:
+        return hi
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[mid - 1] == b[mid - 1]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class ReplayCache:
+    def __init__(self, max_entries=8, new_rows=list, new_checkpoints=list):
+        self.max_entries = max_entries
+        self.new_rows = new_rows  # container ของ rows แบบเดียวกับ state["results"] (list หรือ ResultsStore)
+        self.new_checkpoints = new_checkpoints  # แบบเดียวกับ state["checkpoints"] (list หรือ CheckpointStore)
+        self.entries = OrderedDict()  # params -> (rows, checkpoints, hashes)
+
+    def _entry(self, params):
+        if params not in self.entries:
+            self.entries[params] = (self.new_rows(), self.new_checkpoints(), [])
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        self.entries.move_to_end(params)
+        return self.entries[params]
+
+    def _truncate(self, params, state):
+        rows, checkpoints, hashes = entry = self._entry(params)
+        keep = common_prefix(hashes, state["hashes"])
+        del rows[keep:], checkpoints[keep:], hashes[keep:]
+        return entry, keep
+
+    def sync(self, params, state):
+        """เก็บ state ปัจจุบัน (คำนวณด้วย params แล้ว) ลง cache: คัดลอกเฉพาะไม้ที่ต่างจากที่จำไว้"""
+        (rows, checkpoints, hashes), keep = self._truncate(params, state)
+        rows.extend(state["results"][keep:])
+        checkpoints.extend(state["checkpoints"][keep:])
+        hashes.extend(state["hashes"][keep:])
+
+    def replay(self, params, state, recompute, initial):
+        """คำนวณประวัติใน state ใหม่ด้วย params โดย replay เฉพาะส่วนที่ยังไม่อยู่ใน cache
+
+        recompute(results, start) ต้องคืน (bal, bet, loss_sum, rows, checkpoints) แบบ recompute_state_from_results
+        """
+        (rows, checkpoints, hashes), keep = self._truncate(params, state)
+        start = checkpoints[-1] if checkpoints else initial
+        _, _, _, new_rows, new_checkpoints = recompute(state["results"][keep:], start)
+        rows.extend(new_rows)
+        checkpoints.extend(new_checkpoints)
+        hashes.extend(state["hashes"][keep:])
+
+        state["results"] = rows.copy()
+        state["checkpoints"] = checkpoints.copy()
+        state["redo_stack"] = []  # checkpoint ใน redo คำนวณด้วยพารามิเตอร์เก่า
+        apply_checkpoint(state, checkpoints[-1] if checkpoints else initial)
+        return len(rows) - keep
+
+
+def switch_params(state, params, recompute, initial):
+    """เรียกทุก rerun: ถ้าพารามิเตอร์เปลี่ยนให้เก็บผลชุดเก่าแล้ว replay ด้วยชุดใหม่ คืนจำนวนไม้ที่ต้อง replay จริง"""
+    old = state["replay_params"]
+    if old == params:
+        return 0
+    cache = state["replay_cache"]
+    if old is not None:
+        cache.sync(old, state)
+    replayed = cache.replay(params, state, recompute, initial) if state["results"] else 0
+    state["replay_params"] = params
+    return replayed
@@ -0,0 +1,197 @@
+import numpy as np
+
+# ===================== Columnar results store =====================
+# เก็บประวัติผลลัพธ์เป็นอาร์เรย์ NumPy รายคอลัมน์ แทน list ของ dict (dict ละหลายร้อยไบต์ต่อไม้)
+# - Pattern / ผลลัพธ์ เก็บเป็นรหัส int8, ไม้เป็น int32, เงินเป็น float64 (~20-30 ไบต์ต่อไม้)
+# - append / extend แบบขยายความจุทีละเท่าตัว (amortized O(1))
+# - frame() คืน DataFrame ที่คัดลอกช่วงแถวออกมา ใช้แสดงตาราง / กราฟ / export
+#   (อาร์เรย์ภายในถูกเขียนทับเมื่อ pop แล้ว append ใหม่ ถ้าคืน view ตารางที่เก็บไว้ก่อนหน้าจะเปลี่ยนตามเงียบ ๆ)
+#   (import pandas ตอนเรียก frame() ครั้งแรก ไม่ใช่ตอนเปิดแอป)
+# - ยังทำตัวเหมือน list ของ dict (len, index, slice, pop, del [k:], iterate) ให้ stock_money_history.py
+#   และ stock_money_replay.py ใช้ได้เหมือนเดิม
+# - CheckpointStore: checkpoint (balance, bet_amount, loss_streak_amount) ต่อแถว เป็น float64 3 คอลัมน์
+#   แทน list ของ tuple (~24 ไบต์ต่อไม้แทน ~100 ไบต์) อ่านทีละตำแหน่ง / iterate ได้ tuple เหมือนเดิม
+
+ENUMS = {
+    "pattern": ("พุธ", "คอ"),
+    "result": ("-", "ชนะ", "แพ้"),
+}
+DTYPES = {"int": np.int32, "float": np.float64, "pattern": np.int8, "result": np.int8}
+
+RESULT_SCHEMA = (
+    ("ไม้", "int"),
+    ("Pattern", "pattern"),
+    ("ผลลัพธ์", "result"),
+    ("เงินเดิมพัน", "float"),
+    ("พอร์ต", "float"),
+)
+CHECKPOINT_SCHEMA = (
+    ("balance", "float"),
+    ("bet_amount", "float"),
+    ("loss_streak_amount", "float"),
+)
+NEXT_BET_SCHEMA = (
+    ("ไม้", "int"),
+    ("Pattern", "pattern"),
+    ("ผลลัพธ์", "result"),
+    ("เงินเดิมพัน(ปัจจุบัน)", "float"),
+    ("เงินเดิมพันไม้ถัดไป", "float"),
+    ("พอร์ต", "float"),
+)
+
+
+def _encode(kind, values):
+    if kind in ENUMS:
+        codes = {label: code for code, label in enumerate(ENUMS[kind])}
+        try:
+            return np.fromiter((codes[v] for v in values), dtype=DTYPES[kind], count=len(values))
+        except KeyError as e:
+            raise ValueError(f"ค่า {e.args[0]!r} ไม่ถูกต้อง (ต้องเป็น {', '.join(ENUMS[kind])})") from None
+    return np.asarray(values, dtype=DTYPES[kind])
+
+
+class ResultsStore:
+    def __init__(self, schema=RESULT_SCHEMA, capacity=64):
+        self.schema = tuple(schema)
+        self._len = 0
+        self._data = {name: np.empty(capacity, dtype=DTYPES[kind]) for name, kind in self.schema}
+
+    @property
+    def columns(self):
+        return [name for name, _ in self.schema]
+
+    @property
+    def nbytes(self):
+        return sum(array[:self._len].nbytes for array in self._data.values())
+
+    def __len__(self):
+        return self._len
+
+    def _reserve(self, size):
+        capacity = len(next(iter(self._data.values())))
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2)
+        for name, array in self._data.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self._len] = array[:self._len]
+            self._data[name] = grown
+
+    # ---------- write ----------
+    def append(self, row):
+        self.extend([row])
+
+    def extend(self, rows):
+        if isinstance(rows, ResultsStore):
+            columns = {name: rows._data[name][:len(rows)] for name in self.columns}
+            count = len(rows)
+        else:
+            rows = list(rows)
+            count = len(rows)
+            columns = {name: _encode(kind, [row.get(name) for row in rows]) for name, kind in self.schema}
+        self._append(columns, count)
+
+    def extend_columns(self, columns):
+        """ต่อท้ายจากอาร์เรย์รายคอลัมน์ (คอลัมน์ enum ส่งเป็นรหัส int หรือข้อความก็ได้)"""
+        arrays = {}
+        for name, kind in self.schema:
+            values = np.asarray(columns[name])
+            if kind in ENUMS and not np.issubdtype(values.dtype, np.integer):
+                values = _encode(kind, values.tolist())
+            arrays[name] = values
+        self._append(arrays, len(arrays[self.schema[0][0]]))
+
+    def _append(self, columns, count):
+        self._reserve(self._len + count)
+        for name, values in columns.items():
+            self._data[name][self._len:self._len + count] = values
+        self._len += count
+
+    def pop(self):
+        if not self._len:
+            raise IndexError("pop from empty ResultsStore")
+        row = self[self._len - 1]
+        self._len -= 1
+        return row
+
+    def __delitem__(self, index):
+        # รองรับเฉพาะการตัดท้าย (del store[k:]) ซึ่งเป็นรูปแบบเดียวที่ประวัติใช้
+        start, stop, step = index.indices(self._len) if isinstance(index, slice) else (index, index + 1, 1)
+        if step != 1 or stop != self._len:
+            raise ValueError("ResultsStore ลบได้เฉพาะแถวท้าย (store[k:])")
+        self._len = min(self._len, start)
+
+    # ---------- read ----------
+    def _decode(self, name, kind, values):
+        if kind in ENUMS:
+            labels = ENUMS[kind]
+            return [labels[code] for code in values.tolist()]
+        return values.tolist()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            part = type(self)(self.schema, capacity=max(1, len(range(start, stop, step))))
+            for name in self.columns:
+                values = self._data[name][start:stop:step]
+                part._data[name][:len(values)] = values
+            part._len = len(range(start, stop, step))
+            return part
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("ResultsStore index out of range")
+        return {name: self._decode(name, kind, self._data[name][index:index + 1])[0] for name, kind in self.schema}
+
+    def __iter__(self):
+        columns = [self._decode(name, kind, self._data[name][:self._len]) for name, kind in self.schema]
+        for values in zip(*columns):
+            yield dict(zip(self.columns, values))
+
+    def copy(self):
+        return self[:]
+
+    def column(self, name):
+        """view ของคอลัมน์ (ไม่คัดลอก) Pattern / ผลลัพธ์ เป็นรหัส int8"""
+        return self._data[name][:self._len]
+
+    def values(self, name):
+        """list ของค่าในคอลัมน์ (คอลัมน์ enum เป็นข้อความ)"""
+        return self._decode(name, dict(self.schema)[name], self.column(name))
+
+    def frame(self, start=0, stop=None):
+        """DataFrame ของแถว start..stop (สำเนา ไม่เปลี่ยนตามเมื่อแก้ store ภายหลัง คอลัมน์ enum เป็น Categorical)"""
+        import pandas as pd
+
+        stop = self._len if stop is None else min(stop, self._len)
+        columns = {}
+        for name, kind in self.schema:
+            values = self._data[name][start:stop].copy()
+            columns[name] = pd.Categorical.from_codes(values, ENUMS[kind]) if kind in ENUMS else values
+        return pd.DataFrame(columns, copy=False)
+
+
+class CheckpointStore(ResultsStore):
+    """checkpoint ต่อแถวของประวัติ: append / extend รับ tuple (balance, bet_amount, loss_streak_amount) และอ่านกลับเป็น tuple"""
+
+    def __init__(self, schema=CHECKPOINT_SCHEMA, capacity=64):
+        super().__init__(schema, capacity)
+
+    def extend(self, rows):
+        if isinstance(rows, ResultsStore):
+            super().extend(rows)
+            return
+        values = np.array(list(rows), dtype=np.float64).reshape(-1, len(self.schema))
+        self._append({name: values[:, i] for i, name in enumerate(self.columns)}, len(values))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return super().__getitem__(index)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("CheckpointStore index out of range")
+        return tuple(self._data[name][index].item() for name in self.columns)
+
+    def __iter__(self):
+        return zip(*(self._data[name][:self._len].tolist() for name in self.columns))
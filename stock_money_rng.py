@@ -0,0 +1,45 @@
+import numpy as np
+
+# ===================== Seeded random streams =====================
+# ตัวสุ่มแบบ counter-based (Philox) แยกเป็น stream ตามหน้าที่ แทน random.choice แบบ global
+# - key ของแต่ละ (stream, index) มาจาก SeedSequence(seed, spawn_key=...) สร้างได้ทันทีไม่ต้อง spawn ไล่ลำดับ
+# - ค่าตำแหน่ง position ใดก็ได้ของ stream คำนวณได้แบบ O(1) ด้วยการตั้ง counter ของ Philox
+#   (Philox ให้ 4 ค่า uint64 ต่อ counter หนึ่งช่อง) จึงแบ่งงานให้หลาย worker แล้วได้ผลเหมือนรันรวดเดียวทุกบิต
+# - seed เดียวกัน + พารามิเตอร์เดียวกัน = pattern / ผลลัพธ์ชุดเดิมทุกครั้ง
+
+STREAMS = {"pattern": 0, "outcome": 1, "monte_carlo": 2, "bootstrap": 3}
+PATTERNS = np.array(["พุธ", "คอ"])  # พุธ=ซื้อ, คอ=ขาย
+_WORDS_PER_COUNTER = 4
+
+
+def new_seed():
+    """seed ใหม่จาก entropy ของระบบ (32 บิต ให้จดหรือพิมพ์กลับมาใส่ได้ง่าย)"""
+    return int(np.random.SeedSequence().generate_state(1)[0])
+
+
+class RandomStreams:
+    def __init__(self, seed=None):
+        self.seed = new_seed() if seed is None else int(seed)
+
+    def _key(self, stream, index):
+        return np.random.SeedSequence(self.seed, spawn_key=(STREAMS[stream], int(index))).generate_state(2, np.uint64)
+
+    def uniforms(self, stream, index, start=0, count=1):
+        """ค่าสุ่ม [0, 1) ตำแหน่ง start .. start+count-1 ของ stream (index แยก stream ย่อย เช่นไม้ที่ของ Monte Carlo)"""
+        block, offset = divmod(int(start), _WORDS_PER_COUNTER)
+        bit_generator = np.random.Philox(key=self._key(stream, index), counter=block)
+        if offset:
+            bit_generator.random_raw(offset)  # ข้ามค่าที่อยู่ก่อน start ใน counter ช่องเดียวกัน
+        # Generator.random ใช้ uint64 หนึ่งค่าต่อหนึ่ง double จึงตรงกับตำแหน่งของ random_raw
+        return np.random.Generator(bit_generator).random(int(count))
+
+    def uniform(self, stream, index, position):
+        return float(self.uniforms(stream, index, position, 1)[0])
+
+    def patterns(self, count, start=0, index=0):
+        """Pattern ของไม้ start .. start+count-1 (ขอช่วงไหนก็ได้ ผลตรงกับการสร้างรวดเดียว)"""
+        return PATTERNS[(self.uniforms("pattern", index, start, count) >= 0.5).astype(np.int64)].tolist()
+
+    def outcomes(self, count, win_prob=0.5, start=0, index=0):
+        """True = ชนะ ของไม้ start .. start+count-1"""
+        return self.uniforms("outcome", index, start, count) < win_prob
@@ -0,0 +1,215 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from stock_money_ladder import bet_ladder
+from stock_money_montecarlo import simulate_recovery_paths
+
+# ===================== Exact ruin / outcome distribution =====================
+# คำนวณความน่าจะเป็นแบบแม่นยำ (ไม่สุ่ม) ของระบบชดทุน + เป้ากำไร
+# ระหว่างแพ้ติดกัน k ไม้ ขาดทุนสะสม L_k และเดิมพัน b_k ถูกกำหนดตายตัวจาก k (ดู stock_money_ladder.py)
+# ดังนั้นสถานะทั้งหมดคือ (B, k) โดย B = พอร์ต ณ ต้นรอบแพ้ติด และพอร์ตปัจจุบัน = B - L_k
+#   ชนะที่ระดับ k -> (B + b_k * odds - L_k, 0)
+#   แพ้ที่ระดับ k -> (B, k + 1) ถ้า B - L_{k+1} ยังพอวาง b_{k+1} ไม่งั้นถือว่าทุนหมด
+# เงินทุกจำนวนเก็บเป็นจำนวนเต็มหน่วย 1/SCALE บาท เพื่อให้รวมสถานะที่พอร์ตเท่ากันได้โดยไม่เพี้ยน
+# จำนวนสถานะโตตามจำนวนไม้และความละเอียดของเศษเงิน (odds / เดิมพันไม่ลงตัว) จึงมีงบงานจำกัด:
+# เกินงบ -> ruin_estimate ใช้ Monte Carlo ที่ seed ตายตัวแทน (RuinDistribution.num_paths > 0 = ค่าประมาณ)
+
+SCALE = 10_000
+# จำนวนช่องสูงสุดของตาราง dense (ระดับ x ช่องพอร์ต) ก่อนเปลี่ยนไปใช้แบบ sparse
+DENSE_LIMIT = 5_000_000
+# งบงาน (~0.5 วินาที): ช่องที่ตาราง dense อาจต้องแตะรวมทุกไม้ / สถานะที่แบบ sparse ประมวลผลรวมทุกไม้
+DENSE_WORK_LIMIT = 200_000_000
+SPARSE_STATE_LIMIT = 10_000_000
+# Monte Carlo สำรองเมื่อเกินงบ: เส้นทาง x ไม้ไม่เกิน FALLBACK_WORK (อย่างน้อย FALLBACK_MIN_PATHS เส้นทาง)
+FALLBACK_WORK = 5_000_000
+FALLBACK_MIN_PATHS = 500
+FALLBACK_MAX_PATHS = 20_000
+FALLBACK_SEED = 20240101
+
+
+class BudgetExceeded(Exception):
+    """DP ต้องใช้สถานะ / งานเกินงบที่กำหนด"""
+
+
+# ใช้อ่านอย่างเดียวและ cache แบบเดียวกับ MonteCarloResult (ดู stock_money_montecarlo.py)
+@dataclass
+class RuinDistribution:
+    ruin_by_trade: np.ndarray   # ความน่าจะเป็นสะสมที่ทุนหมดภายในไม้ที่ t (num_trades + 1,)
+    final_values: np.ndarray    # มูลค่าพอร์ตสุดท้ายที่เป็นไปได้ (เรียงจากน้อยไปมาก)
+    final_probs: np.ndarray     # ความน่าจะเป็นของแต่ละมูลค่า
+    num_paths: int = 0          # 0 = ค่าแม่นยำจาก DP, > 0 = ประมาณจาก Monte Carlo กี่เส้นทาง
+
+    @property
+    def exact(self):
+        return self.num_paths == 0
+
+    @property
+    def ruin_probability(self):
+        return float(self.ruin_by_trade[-1])
+
+    @property
+    def expected_final_balance(self):
+        return float(np.dot(self.final_values, self.final_probs))
+
+    def quantile(self, q):
+        cdf = np.cumsum(self.final_probs)
+        pos = min(int(np.searchsorted(cdf, q - 1e-12)), len(cdf) - 1)
+        return float(self.final_values[pos])
+
+
+def _scaled_ladder(first_bet, target_profit, odds, max_balance):
+    """bets[k] = b_k, losses[k] = L_k (ขาดทุนสะสมก่อนไม้ที่ k) ในหน่วย 1/SCALE
+    ครอบคลุมทุกระดับที่พอร์ตไม่เกิน max_balance ไปถึงได้ และ gains[k] = กำไรสุทธิของรอบเมื่อชนะที่ระดับ k
+    """
+    ladder = bet_ladder(max_balance, first_bet, target_profit, odds)
+    bets, losses = ladder.arrays(ladder.max_streak() + 1)
+    bets = np.rint(bets * SCALE).astype(np.int64)
+    losses = np.rint(losses * SCALE).astype(np.int64)
+    gains = np.rint(bets * odds).astype(np.int64) - losses[:-1]
+    return bets, losses, gains
+
+
+def _merge(keys, probs):
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    return uniq, np.bincount(inverse, weights=probs, minlength=len(uniq))
+
+
+def ruin_distribution(capital, first_bet, target_profit, odds, num_trades, win_prob=0.5,
+                      dense_work_limit=None, sparse_state_limit=None):
+    """การกระจายของพอร์ตสุดท้ายและโอกาสทุนหมดภายใน num_trades ไม้ แบบแม่นยำ
+
+    dense_work_limit / sparse_state_limit (None = ไม่จำกัด): เกินงบ -> BudgetExceeded
+    """
+    if odds <= 0:
+        raise ValueError("odds ต้องมากกว่า 0")
+    num_trades = int(num_trades)
+    cap = round(capital * SCALE)
+
+    # พอร์ตสูงสุดที่เป็นไปได้ใช้จำกัดความลึกของ ladder
+    max_gain = max(first_bet * odds, target_profit + odds)
+    max_balance = capital + num_trades * max_gain
+    bets, losses, gains = _scaled_ladder(first_bet, target_profit, odds, max_balance)
+
+    ruin_by_trade = np.zeros(num_trades + 1)
+    if cap < bets[0]:
+        ruin_by_trade[:] = 1.0
+        return RuinDistribution(ruin_by_trade, np.array([capital], dtype=float), np.array([1.0]))
+
+    unit = int(np.gcd.reduce(gains))
+    steps = gains // unit
+    width = num_trades * int(steps.max()) + 1
+    # งานของแบบ dense ประมาณล่วงหน้าได้ (ช่องที่ใช้ขยายเป็นเส้นตรงตามไม้ -> ราวครึ่งหนึ่งของตารางต่อไม้)
+    dense_work = num_trades * width * len(bets) // 2
+    if width * len(bets) <= DENSE_LIMIT and (dense_work_limit is None or dense_work <= dense_work_limit):
+        states, ruined_keys, ruined_probs = _run_dense(cap, bets, losses, steps, unit, width, num_trades, win_prob, ruin_by_trade)
+    else:
+        states, ruined_keys, ruined_probs = _run_sparse(cap, losses, gains, num_trades, win_prob, ruin_by_trade, sparse_state_limit)
+
+    final_keys = [keys - losses[k] for k, (keys, _) in enumerate(states)] + ruined_keys
+    final_probs = [probs for _, probs in states] + ruined_probs
+    values, probs = _merge(np.concatenate(final_keys), np.concatenate(final_probs))
+    return RuinDistribution(ruin_by_trade, values / SCALE, probs)
+
+
+def _run_dense(cap, bets, losses, steps, unit, width, num_trades, win_prob, ruin_by_trade):
+    """กรณีพอร์ตที่เป็นไปได้อยู่บนตาราง cap + i * unit ที่ไม่ใหญ่เกินไป: ใช้อาร์เรย์เต็มแทน dict
+    ชนะ = เลื่อนอาร์เรย์ไป steps[k] ช่อง, แพ้ = เลื่อนลงหนึ่งระดับ ไม่ต้อง sort/merge ทุกไม้
+    """
+    lose_prob = 1.0 - win_prob
+    depth = len(bets)
+    # ระดับ k ยังเทรดต่อได้เมื่อ B >= L_{k+1} -> ช่องแรกที่รอดของแต่ละระดับ
+    first_alive = np.maximum(0, -((cap - losses[1:depth + 1]) // unit)).astype(np.int64)
+    dense = np.zeros((depth, width))
+    dense[0, 0] = 1.0
+    new = np.zeros_like(dense)
+    ruined_dense = np.zeros((depth, width))
+    ruined = 0.0
+    hi = 1  # ช่องที่อาจมีความน่าจะเป็น (ขยายตามจำนวนไม้ที่ชนะได้มากสุด)
+    for trade in range(1, num_trades + 1):
+        active = np.flatnonzero(dense[:, :hi].any(axis=1))
+        if len(active) == 0:
+            # ทุนหมดครบทุกเส้นทางแล้ว
+            ruin_by_trade[trade:] = ruined
+            break
+        next_hi = min(width, hi + int(steps[active].max()))
+        new[:, :next_hi] = 0.0
+        new[1:, :hi] = dense[:-1, :hi] * lose_prob
+        for k in active:
+            new[0, steps[k]:steps[k] + hi] += dense[k, :hi] * win_prob
+        for k in range(1, min(depth, int(active.max()) + 2)):
+            cut = min(first_alive[k], next_hi)
+            if cut > 0 and new[k, :cut].any():
+                ruined += float(new[k, :cut].sum())
+                ruined_dense[k, :cut] += new[k, :cut]
+                new[k, :cut] = 0.0
+        dense, new = new, dense
+        hi = next_hi
+        ruin_by_trade[trade] = ruined
+
+    keys = cap + np.arange(width, dtype=np.int64) * unit
+    states = [(keys[dense[k] > 0], dense[k][dense[k] > 0]) for k in range(depth)]
+    ruined_keys = [keys[ruined_dense[k] > 0] - losses[k] for k in range(depth)]
+    ruined_probs = [ruined_dense[k][ruined_dense[k] > 0] for k in range(depth)]
+    return states, ruined_keys, ruined_probs
+
+
+def _run_sparse(cap, losses, gains, num_trades, win_prob, ruin_by_trade, state_limit=None):
+    """กรณีทั่วไป: เก็บเฉพาะพอร์ตที่เกิดขึ้นจริงของแต่ละระดับแล้วรวมค่าซ้ำทุกไม้"""
+    lose_prob = 1.0 - win_prob
+    ruined_keys, ruined_probs = [], []
+    # states[k] = (B ในหน่วย 1/SCALE, ความน่าจะเป็น) ของสถานะที่แพ้ติดอยู่ k ไม้
+    states = [(np.array([cap], dtype=np.int64), np.array([1.0]))]
+    ruined = 0.0
+    processed = 0
+    for trade in range(1, num_trades + 1):
+        processed += sum(len(keys) for keys, _ in states)
+        if state_limit is not None and processed > state_limit:
+            raise BudgetExceeded(f"DP ใช้สถานะเกิน {state_limit:,} ที่ไม้ {trade:,}")
+        win_keys, win_probs = [], []
+        next_states = [(np.empty(0, dtype=np.int64), np.empty(0))]
+        for k, (keys, probs) in enumerate(states):
+            if len(keys) == 0:
+                next_states.append((keys, probs))
+                continue
+            win_keys.append(keys + gains[k])
+            win_probs.append(probs * win_prob)
+
+            # แพ้: ต้องมี B - L_{k+1} >= b_{k+1} หรือ B >= L_{k+2}
+            alive = keys >= losses[k + 2]
+            if not alive.all():
+                dead = ~alive
+                ruined_keys.append(keys[dead] - losses[k + 1])
+                ruined_probs.append(probs[dead] * lose_prob)
+                ruined += float(probs[dead].sum()) * lose_prob
+            next_states.append((keys[alive], probs[alive] * lose_prob))
+
+        next_states[0] = _merge(np.concatenate(win_keys), np.concatenate(win_probs))
+        while len(next_states) > 1 and len(next_states[-1][0]) == 0:
+            next_states.pop()
+        states = next_states
+        ruin_by_trade[trade] = ruined
+
+    return states, ruined_keys, ruined_probs
+
+
+def fallback_paths(num_trades):
+    """จำนวนเส้นทางของ Monte Carlo สำรองที่ ruin_estimate ใช้กับ num_trades ไม้"""
+    return int(np.clip(FALLBACK_WORK // max(int(num_trades), 1), FALLBACK_MIN_PATHS, FALLBACK_MAX_PATHS))
+
+
+def ruin_estimate(capital, first_bet, target_profit, odds, num_trades, win_prob=0.5):
+    """ruin_distribution ภายในงบงาน เกินงบใช้ Monte Carlo (seed ตายตัว) แทน ดู RuinDistribution.exact"""
+    try:
+        return ruin_distribution(capital, first_bet, target_profit, odds, num_trades, win_prob,
+                                 dense_work_limit=DENSE_WORK_LIMIT, sparse_state_limit=SPARSE_STATE_LIMIT)
+    except BudgetExceeded:
+        pass
+    num_trades = int(num_trades)
+    num_paths = fallback_paths(num_trades)
+    mc = simulate_recovery_paths(capital, first_bet, target_profit, odds, num_trades, num_paths=num_paths,
+                                 win_prob=win_prob, max_band_points=2, seed=FALLBACK_SEED)
+    ruined_at = mc.ruined_at[mc.ruined_at >= 0]
+    ruin_by_trade = np.cumsum(np.bincount(ruined_at, minlength=num_trades + 1)[:num_trades + 1]) / num_paths
+    values, counts = np.unique(mc.final_balances, return_counts=True)
+    return RuinDistribution(ruin_by_trade, values, counts / num_paths, num_paths=num_paths)
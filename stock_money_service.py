@@ -0,0 +1,301 @@
+import argparse
+import asyncio
+import logging
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+# ===================== Shared session journal (asyncio service) =====================
+# journal กลางของทุกเซสชัน Streamlit ในเซิร์ฟเวอร์เดียวกัน แยกตามบัญชี (account)
+# - event loop ของ asyncio รันใน thread แยกหนึ่งตัว สถานะทั้งหมดถูกแก้เฉพาะบน loop นั้น จึงไม่ต้องใช้ lock
+#   สคริปต์ Streamlit (sync) เรียกผ่านเมธอด append / delta / summaries ที่ส่งงานเข้า loop ด้วย run_coroutine_threadsafe
+# - append หลายเซสชันพร้อมกันได้: ได้เลขลำดับ (seq) ต่อบัญชีทันที แล้วเข้าคิวเขียน
+#   writer task รวมคิวเป็น batch (ครบ batch_size หรือทุก flush_interval วินาที) แล้ว executemany ครั้งเดียวใน thread อื่น
+#   batch ที่เขียนไม่สำเร็จ (DB ล็อก, ดิสก์เต็ม, แถวผิด) ถูก log และเก็บ error ไว้ให้ flush() แจ้งผู้เรียก writer ทำงานต่อ
+# - เซสชันดึงเฉพาะแถวที่ seq > ที่เคยเห็น (delta) ไม่ต้องโหลดประวัติทั้งหมดทุก rerun
+# - client แบบ async รอการเปลี่ยนแปลงได้ด้วย wait_delta() หรือรับทุก entry ผ่าน subscribe() (push)
+#   สคริปต์ Streamlit อัปเดตหน้าได้เฉพาะตอน rerun จึงใช้ delta() จาก fragment ที่รันซ้ำเองแทน (poll แบบถูก)
+# - แต่ละเซสชันในบัญชีเดียวกันเดินเงินแยกกัน สรุปพอร์ต / เดิมพันไม้ถัดไปจึงเก็บแยกตามเซสชัน
+# เปิดใหม่แล้วโหลด journal เดิมจาก SQLite กลับเข้าหน่วยความจำ
+
+DEFAULT_PATH = "session_journal.sqlite3"
+
+logger = logging.getLogger(__name__)
+
+# (ชื่อคอลัมน์ในแอป, ชื่อคอลัมน์ใน SQLite, ชนิดข้อมูล)
+COLUMNS = [
+    ("เวลา", "ts", "TEXT"),
+    ("เซสชัน", "session", "TEXT"),
+    ("ไม้", "trade", "INTEGER"),
+    ("Pattern", "pattern", "TEXT"),
+    ("ผลลัพธ์", "result", "TEXT"),
+    ("เงินเดิมพัน(ปัจจุบัน)", "bet", "REAL"),
+    ("เงินเดิมพันไม้ถัดไป", "next_bet", "REAL"),
+    ("พอร์ต", "balance", "REAL"),
+]
+
+
+@dataclass
+class AccountBook:
+    entries: list = field(default_factory=list)  # entry ลำดับที่ seq อยู่ที่ index seq - 1
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+    subscribers: set = field(default_factory=set)
+    sessions: dict = field(default_factory=dict)  # เซสชัน -> สรุปไม้ล่าสุดของเซสชันนั้น
+
+    @property
+    def version(self):
+        return len(self.entries)
+
+    def add(self, entry):
+        """ต่อท้าย entry และอัปเดตสรุปของเซสชันเจ้าของ คืน seq"""
+        self.entries.append(entry)
+        info = self.sessions.setdefault(entry["เซสชัน"], {"trades": 0})
+        info["trades"] += 1
+        info.update(balance=entry["พอร์ต"], next_bet=entry["เงินเดิมพันไม้ถัดไป"], updated=entry["เวลา"])
+        return self.version
+
+    def summary(self):
+        """จำนวน entry ของบัญชี + สรุปแยกตามเซสชัน (พอร์ตของแต่ละเซสชันไม่เกี่ยวกัน จึงไม่รวมเป็นค่าเดียว)"""
+        return {
+            "version": self.version,
+            "updated": self.entries[-1]["เวลา"] if self.entries else None,
+            "sessions": {session: dict(info) for session, info in self.sessions.items()},
+        }
+
+
+class JournalService:
+    def __init__(self, path=DEFAULT_PATH, batch_size=500, flush_interval=0.05):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._books = {}
+        self._loop = None
+        self._thread = None
+        self._queue = None
+        self._writer = None
+        self._conn = None
+        self._error = None  # error ล่าสุดของ writer ที่ยังไม่ถูกแจ้งผ่าน flush()
+        self._write_error = None  # error ของ batch ล่าสุดที่เขียนไม่สำเร็จ (ล้างเมื่อ batch ถัดไปเขียนสำเร็จ)
+
+    # ---------- lifecycle ----------
+    def start(self):
+        """เปิด event loop ใน thread แยก (เรียกครั้งเดียว เช่นใน st.cache_resource)"""
+        if self._thread is not None:
+            return self
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._open())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="journal-service", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def close(self):
+        """เขียนคิวที่ค้างให้หมดแล้วหยุด loop"""
+        if self._thread is None:
+            return
+        self._call(self._close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    async def _open(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        column_sql = ", ".join(f"{sql} {kind}" for _, sql, kind in COLUMNS)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS entries (account TEXT, seq INTEGER, {column_sql}, PRIMARY KEY (account, seq))"
+        )
+        self._conn.commit()
+        names = ", ".join(sql for _, sql, _ in COLUMNS)
+        for account, *values in self._conn.execute(f"SELECT account, {names} FROM entries ORDER BY account, seq"):
+            self._book(account).add({name: value for (name, _, _), value in zip(COLUMNS, values)})
+        self._queue = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_batches())
+
+    async def _close(self):
+        await self._queue.join()
+        self._writer.cancel()
+        self._conn.close()
+
+    def _call(self, coro, timeout=10):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def _book(self, account):
+        if account not in self._books:
+            self._books[account] = AccountBook()
+        return self._books[account]
+
+    # ---------- writer ----------
+    async def _write_batches(self):
+        names = ", ".join(sql for _, sql, _ in COLUMNS)
+        marks = ", ".join("?" for _ in range(len(COLUMNS) + 2))
+        sql = f"INSERT INTO entries (account, seq, {names}) VALUES ({marks})"
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.to_thread(self._insert, sql, batch)
+            except Exception as e:
+                # entry ยังอยู่ในหน่วยความจำ (delta เห็นตามปกติ) แต่ไม่ถูกบันทึกลง SQLite
+                logger.exception("เขียน journal %d entries ลง SQLite ไม่สำเร็จ", len(batch))
+                self._error = self._write_error = e
+            else:
+                self._write_error = None
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _insert(self, sql, batch):
+        with self._conn:
+            self._conn.executemany(sql, batch)
+
+    # ---------- async API (เรียกบน loop) ----------
+    async def append_async(self, account, entry, session=""):
+        book = self._book(account)
+        entry = {name: entry.get(name) for name, _, _ in COLUMNS}
+        entry["เวลา"] = entry["เวลา"] or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        entry["เซสชัน"] = entry["เซสชัน"] or session
+        seq = book.add(entry)
+        self._queue.put_nowait((account, seq, *entry.values()))
+        for queue in book.subscribers:
+            queue.put_nowait((seq, entry))
+        # ปลุกทุกคนที่รออยู่ แล้วเปลี่ยน Event ใหม่ให้รอบถัดไป
+        book.changed.set()
+        book.changed = asyncio.Event()
+        return seq
+
+    async def extend_async(self, account, entries, session=""):
+        """append หลาย entry ในการเรียกเดียว (เช่นกรอกหลายไม้พร้อมกัน) คืน seq ล่าสุด"""
+        seq = self._book(account).version
+        for entry in entries:
+            seq = await self.append_async(account, entry, session)
+        return seq
+
+    async def delta_async(self, account, since=0):
+        book = self._book(account)
+        return book.version, book.entries[since:], book.summary()
+
+    async def wait_delta(self, account, since=0, timeout=None):
+        """รอจนบัญชีมี entry ใหม่กว่า since (หรือหมดเวลา) แล้วคืน delta"""
+        book = self._book(account)
+        if book.version <= since:
+            try:
+                await asyncio.wait_for(book.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return await self.delta_async(account, since)
+
+    def subscribe(self, account):
+        """คิวที่ได้รับ (seq, entry) ทุกครั้งที่บัญชีนี้มี entry ใหม่ (ต้องเรียกบน loop ของ service)"""
+        queue = asyncio.Queue()
+        self._book(account).subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, account, queue):
+        self._book(account).subscribers.discard(queue)
+
+    async def summaries_async(self):
+        return {account: book.summary() for account, book in sorted(self._books.items())}
+
+    # ---------- sync API (เรียกจากสคริปต์ Streamlit) ----------
+    def append(self, account, entry, session=""):
+        return self._call(self.append_async(account, entry, session))
+
+    def extend(self, account, entries, session=""):
+        return self._call(self.extend_async(account, list(entries), session))
+
+    def delta(self, account, since=0):
+        """(version, entries ที่ seq > since, สรุปล่าสุด) ของบัญชี"""
+        return self._call(self.delta_async(account, since))
+
+    def summaries(self):
+        return self._call(self.summaries_async())
+
+    @property
+    def write_error(self):
+        """ข้อความ error ของ batch ล่าสุดที่เขียนไม่สำเร็จ (None = batch ล่าสุดเขียนสำเร็จ ใช้แสดงสถานะ)"""
+        return None if self._write_error is None else str(self._write_error)
+
+    def flush(self):
+        """รอจน entry ที่อยู่ในคิวถูกเขียนลง SQLite แล้ว ถ้ามี batch ที่เขียนไม่สำเร็จตั้งแต่ flush ครั้งก่อน -> RuntimeError"""
+        self._call(self._queue.join())
+        error, self._error = self._error, None
+        if error is not None:
+            raise RuntimeError(f"เขียน journal ลง SQLite ไม่สำเร็จ: {error}") from error
+
+
+# ===================== Local stand-in feed =====================
+# จำลองหลายเทรดเดอร์ยิง append พร้อมกัน + ผู้ติดตามแบบ push เพื่อวัด throughput ของ service
+#   python stock_money_service.py --clients 20 --trades 500
+
+async def _feed(service, clients, trades, accounts):
+    async def trader(i):
+        account = f"acct{i % accounts}"
+        balance = 1000.0
+        for trade in range(1, trades + 1):
+            win = random.random() < 0.5
+            balance += 30 if win else -30
+            await service.append_async(account, {
+                "ไม้": trade, "Pattern": random.choice(["พุธ", "คอ"]), "ผลลัพธ์": "ชนะ" if win else "แพ้",
+                "เงินเดิมพัน(ปัจจุบัน)": 30.0, "เงินเดิมพันไม้ถัดไป": 30.0, "พอร์ต": balance,
+            }, session=f"s{i}")
+            await asyncio.sleep(0)
+
+    received = 0
+
+    async def watcher(queue, expected):
+        nonlocal received
+        for _ in range(expected):
+            await queue.get()
+            received += 1
+
+    per_account = [sum(1 for i in range(clients) if i % accounts == a) * trades for a in range(accounts)]
+    watchers = [watcher(service.subscribe(f"acct{a}"), n) for a, n in enumerate(per_account)]
+    await asyncio.gather(*(trader(i) for i in range(clients)), *watchers)
+    await service._queue.join()
+    return received
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ทดสอบ journal service ด้วยเทรดเดอร์จำลองหลายเซสชัน")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--trades", type=int, default=500)
+    parser.add_argument("--accounts", type=int, default=4)
+    parser.add_argument("--path", default=":memory:")
+    args = parser.parse_args(argv)
+
+    service = JournalService(args.path).start()
+    start = time.perf_counter()
+    received = asyncio.run_coroutine_threadsafe(
+        _feed(service, args.clients, args.trades, args.accounts), service._loop,
+    ).result()
+    elapsed = time.perf_counter() - start
+    total = args.clients * args.trades
+    print(f"append {total:,} entries จาก {args.clients} เซสชัน ใน {elapsed:.2f} วินาที ({total / elapsed:,.0f} entries/วินาที)")
+    print(f"push ถึงผู้ติดตาม {received:,} entries")
+    for account, summary in service.summaries().items():
+        print(f"  {account}: {summary['version']:,} entries จาก {len(summary['sessions'])} เซสชัน")
+    service.close()
+
+
+if __name__ == "__main__":
+    main()
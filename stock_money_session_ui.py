@@ -0,0 +1,461 @@
+import math
+import statistics
+import time
+from datetime import datetime
+
+import streamlit as st
+
+from stock_money_charts import equity_curve_png
+from stock_money_engine import max_losing_streak, replay_outcomes, replay_results
+from stock_money_history import (
+    last_batch, last_hash, record_trade, record_trades, redo_batch, redo_batch_size, redo_trades,
+    reset_history, rewrite_history, undo_batch, undo_trades,
+)
+from stock_money_import import EXPORT_FORMATS, export_results, import_results, parse_outcomes
+from stock_money_profiler import fragment_scope
+from stock_money_replay import ReplayCache, switch_params
+from stock_money_results import RESULT_SCHEMA, CheckpointStore, ResultsStore
+from stock_money_rng import RandomStreams, new_seed
+from stock_money_ruin_dp import ruin_estimate
+
+# ===================== ส่วนร่วมของแอปบันทึกผล (session_plus / session_plus_nextbet) =====================
+# state ของเซสชัน, callback (บันทึกไม้ / กรอกหลายไม้ / แก้ประวัติ / Undo / Redo), นำเข้า/ส่งออก และ trade panel
+# แอปสร้าง SessionApp ด้วย schema ของตัวเอง แล้ว override trade_row / on_record สำหรับส่วนที่ต่างกัน
+# ใช้:
+#   app = SessionApp(prof, RESULT_SCHEMA)
+#   app.sidebar(); app.inputs(); app.import_export(); app.trade_panel()
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def exact_ruin(capital, first_bet, target_profit, odds, num_trades, win_prob):
+    return ruin_estimate(capital, first_bet, target_profit, odds, num_trades, win_prob)
+
+
+# สร้างไฟล์ export เฉพาะตอนกดดาวน์โหลด (data เป็น callable) และ cache ตามเวอร์ชันของประวัติ
+# rerun ปกติจึงไม่ต้องแปลงทั้งประวัติเป็น CSV ทุกครั้ง
+@st.cache_data(max_entries=4, show_spinner=False)
+def export_file(version, fmt, seed, _rows):
+    # version = (schema, พารามิเตอร์, จำนวนไม้, hash ล่าสุด); _rows ไม่ถูก hash
+    export_df = _rows.frame()
+    export_df["Seed"] = seed
+    return export_results(export_df, fmt)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def equity_chart(version, _rows):
+    # version = (พารามิเตอร์, จำนวนไม้, hash ล่าสุด) เปลี่ยนเมื่อประวัติเปลี่ยนเท่านั้น; _rows ไม่ถูก hash
+    return equity_curve_png(_rows.column("ไม้"), _rows.column("พอร์ต"))
+
+
+class SessionApp:
+    def __init__(self, prof, schema=RESULT_SCHEMA, with_current_bet=False, extra_defaults=None):
+        self.prof = prof
+        self.schema = schema
+        self.with_current_bet = with_current_bet  # schema มีคอลัมน์เงินเดิมพันของไม้ปัจจุบันแยกจากไม้ถัดไป
+        self.init_state(extra_defaults or {})
+
+    def new_rows(self, capacity=64):
+        return ResultsStore(self.schema, capacity=capacity)
+
+    # ===================== Session Init =====================
+    def init_state(self, extra_defaults):
+        defaults = {
+            "results": self.new_rows(),
+            "balance": None,
+            "bet_amount": None,
+            "loss_streak_amount": 0,
+            "patterns": [],
+            "locked_patterns": False,
+            "inputs_snapshot": {},
+            "checkpoints": CheckpointStore(),
+            "hashes": [],
+            "redo_stack": [],
+            "batches": [],
+            "redo_batches": [],
+            "bulk_text": "",
+            "bulk_error": None,
+            "replay_params": None,
+            "replay_cache": ReplayCache(new_rows=self.new_rows, new_checkpoints=CheckpointStore),
+            "history_editor_nonce": 0,
+            "imported_file_id": None,
+            "export_has_rows": False,
+            "click_latencies": [],
+            "run_counts": {"app": 0, "trade_panel": 0},
+            "component_cache": {},
+            "seed": None,
+            "patterns_seed": None,
+            **extra_defaults,
+        }
+        for k, v in defaults.items():
+            if k not in st.session_state:
+                st.session_state[k] = v
+        if st.session_state.seed is None:
+            st.session_state.seed = new_seed()
+        st.session_state.run_counts["app"] += 1
+
+    # ===================== Sidebar Controls =====================
+    def sidebar(self):
+        st.sidebar.header("⚙️ การตั้งค่า")
+        locked = st.sidebar.checkbox("🔒 ล็อก Pattern (ไม่สุ่มใหม่เมื่อเปลี่ยนอินพุต)", value=st.session_state.locked_patterns)
+        st.session_state.locked_patterns = locked
+
+        self.page_size = st.sidebar.number_input("📄 แถวต่อหน้า (ประวัติ)", min_value=5, max_value=500, value=20, step=5)
+
+        # Pattern สร้างจาก seed (ใส่ seed เดิมจะได้ Pattern ชุดเดิม) และ seed ติดไปกับไฟล์ export
+        st.sidebar.number_input("🌱 Seed", min_value=0, max_value=2**32 - 1, step=1, key="seed")
+        st.sidebar.button("🎲 สุ่ม Pattern ใหม่", on_click=self.on_reroll_patterns, use_container_width=True)
+
+        if st.sidebar.button("🧹 ล้างผล (Clear Results)", use_container_width=True):
+            st.session_state.results = self.new_rows()
+            st.session_state.balance = None
+            st.session_state.bet_amount = None
+            st.session_state.loss_streak_amount = 0
+            st.session_state.checkpoints = CheckpointStore()
+            st.session_state.hashes = []
+            st.session_state.redo_stack = []
+            st.session_state.batches = []
+            st.session_state.redo_batches = []
+
+    def on_reroll_patterns(self):
+        st.session_state.seed = new_seed()
+        st.session_state.patterns = []  # จะถูกสร้างใหม่ด้านล่างตาม num_trades
+
+    # ===================== Inputs =====================
+    def inputs(self):
+        prof = self.prof
+        self.capital = capital = st.number_input("💰 เงินทุนเริ่มต้น (บาท)", min_value=10.0, value=1000.0, step=10.0)
+        self.num_trades = num_trades = st.number_input("🔢 จำนวนไม้ที่ต้องการจำลอง", min_value=1, value=5, step=1)
+        self.target_profit = target_profit = st.number_input("🎯 กำไรที่ต้องการต่อรอบ (บาท)", min_value=0.1, value=1.0, step=0.1)
+        self.odds = odds = st.number_input("⚖️ อัตราจ่าย (1.0 = กำไรเท่าทุน)", min_value=0.1, value=1.0, step=0.1)
+        self.first_bet = first_bet = st.number_input("💵 เงินเดิมพันไม้แรก (บาท)", min_value=0.1, value=30.0, step=1.0)
+        win_prob = st.number_input("🍀 โอกาสชนะต่อไม้ (%)", min_value=1.0, max_value=99.0, value=50.0, step=1.0) / 100
+        self.initial = (capital, first_bet, 0)
+
+        # เก็บ snapshot ของอินพุตเพื่อใช้รีคอมพิวต์ (โดยเฉพาะตอน Import)
+        st.session_state.inputs_snapshot = dict(
+            capital=capital, num_trades=num_trades,
+            target_profit=target_profit, odds=odds, first_bet=first_bet
+        )
+
+        # ===================== Maximum Trades Calc =====================
+        with prof.stage("max_trades_possible"):
+            max_trades_possible = max_losing_streak(capital, first_bet, target_profit, odds)
+
+        st.info(f"💡 ถ้าแพ้ติดกันทุกไม้ จะเล่นได้สูงสุด **{max_trades_possible} ไม้** ก่อนที่ทุนจะหมด")
+
+        with prof.stage("ruin_dp"):
+            ruin = exact_ruin(capital, first_bet, target_profit, odds, num_trades, win_prob)
+        # DP เกินงบ (ไม้มาก / เศษเงินละเอียด) ได้ค่าประมาณจาก Monte Carlo แทน แสดงให้รู้ว่าไม่ใช่ค่าแม่นยำ
+        ruin_method = "" if ruin.exact else f" (ประมาณจาก Monte Carlo {ruin.num_paths:,} เส้นทาง)"
+        st.info(f"🎲 โอกาสทุนหมดภายใน {num_trades} ไม้ (ชนะ {win_prob * 100:.0f}%){ruin_method}: **{ruin.ruin_probability * 100:.2f}%** | พอร์ตคาดหวัง {ruin.expected_final_balance:,.2f} บาท")
+
+        # ===================== Reset Button =====================
+        col_reset, col_lock = st.columns([1,1])
+        with col_reset:
+            if st.button("🔄 เริ่มใหม่ (Reset State)"):
+                reset_history(st.session_state, self.initial)
+                if not st.session_state.locked_patterns:
+                    st.session_state.patterns = []  # สร้างใหม่จาก seed ด้านล่าง
+
+        with col_lock:
+            st.write(" ")  # spacer
+            st.caption("หากล็อก Pattern ไว้ จะไม่สุ่มใหม่เมื่อปรับอินพุต")
+
+        # ===================== Pattern Bootstrap =====================
+        # ถ้ายังไม่มี pattern: สร้างตาม num_trades เว้นแต่ล็อกไว้และมีอยู่แล้ว
+        with prof.stage("pattern_bootstrap"):
+            streams = RandomStreams(st.session_state.seed)
+            if not st.session_state.patterns or (not st.session_state.locked_patterns and (
+                    len(st.session_state.patterns) != num_trades or st.session_state.patterns_seed != streams.seed)):
+                st.session_state.patterns = streams.patterns(num_trades)
+                st.session_state.patterns_seed = streams.seed
+            elif st.session_state.locked_patterns and len(st.session_state.patterns) < num_trades:
+                # ถ้าล็อกไว้แล้วเพิ่มจำนวนไม้ ให้เติมต่อจากรายการเดิม (ไม้ที่ n ของ seed เดิมเสมอ)
+                need = num_trades - len(st.session_state.patterns)
+                if need > 0:
+                    st.session_state.patterns += streams.patterns(need, start=len(st.session_state.patterns))
+            elif st.session_state.locked_patterns and len(st.session_state.patterns) > num_trades:
+                # ถ้าล็อกแล้วลดจำนวนไม้ ให้ตัดให้พอดี
+                st.session_state.patterns = st.session_state.patterns[:num_trades]
+
+        # ===================== Initialize Running State =====================
+        if st.session_state.balance is None:
+            st.session_state.balance = capital
+        if st.session_state.bet_amount is None:
+            st.session_state.bet_amount = first_bet
+
+        # ===================== Replay เมื่ออินพุตเปลี่ยน =====================
+        # เก็บผลของแต่ละชุดพารามิเตอร์ไว้ใน cache: สลับไปมาระหว่างชุดที่เคยใช้จะ replay เฉพาะไม้ที่ยังไม่เคยคำนวณ
+        with prof.stage("switch_params"):
+            switch_params(
+                st.session_state, (capital, first_bet, target_profit, odds),
+                self.recompute_state_from_results, self.initial,
+            )
+
+    # ===================== Helper: Recompute from results =====================
+    def recompute_state_from_results(self, results, start=None):
+        # start = checkpoint (balance, bet, loss_sum) ที่จะเริ่ม replay ต่อ (ค่าเริ่มต้น = ต้นเซสชัน)
+        with self.prof.stage("recompute_state_from_results"):
+            return replay_results(results, self.capital, self.first_bet, self.target_profit, self.odds, start,
+                                  with_current_bet=self.with_current_bet)
+
+    # ===================== Import / Export =====================
+    def import_export(self):
+        st.subheader("📥📤 นำเข้า / ส่งออก")
+        exp_col, imp_col = st.columns(2)
+
+        with exp_col:
+            self.export_panel()
+
+        with imp_col:
+            uploaded = st.file_uploader("อัปโหลด CSV / Parquet เพื่อโหลดผล", type=[ext for ext, _ in EXPORT_FORMATS.values()])
+            # นำเข้าครั้งเดียวต่อไฟล์ ไม่อ่านซ้ำทุก rerun ขณะที่ไฟล์ยังค้างอยู่ใน uploader
+            if uploaded is not None and uploaded.file_id != st.session_state.imported_file_id:
+                try:
+                    # อ่านทีละ chunk + ตรวจข้อมูล แล้ว replay ต่อเนื่องโดยไม่สร้าง list ของทั้งไฟล์ก่อน
+                    with self.prof.stage("import_results"):
+                        recomputed, checkpoints = import_results(
+                            uploaded, uploaded.name, self.recompute_state_from_results, self.initial,
+                            rows=self.new_rows(), checkpoints=CheckpointStore(),
+                        )
+                    reset_history(st.session_state, self.initial, recomputed, checkpoints)
+                    # ถ้าล็อก pattern ให้ใช้จากไฟล์ที่นำเข้า
+                    st.session_state.patterns = recomputed.values("Pattern") + st.session_state.patterns[len(recomputed):]
+                    st.session_state.imported_file_id = uploaded.file_id
+                    st.success(f"นำเข้าผลลัพธ์สำเร็จ ({len(recomputed):,} ไม้) ✅")
+                except Exception as e:
+                    st.error(f"ไม่สามารถอ่านไฟล์ได้: {e}")
+
+    # ปุ่มดาวน์โหลดอยู่คนละ fragment กับส่วนบันทึกผล จึงไม่ถูกวาดใหม่เมื่อบันทึกไม้:
+    # อ่านเวอร์ชันของประวัติตอนกดดาวน์โหลดจาก object ที่ถูกแก้แบบ in-place (results / hashes) แทนค่าตอน render
+    @st.fragment
+    def export_panel(self):
+        export_format = st.radio("รูปแบบไฟล์", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+        extension, mime = EXPORT_FORMATS[export_format]
+        rows, hashes = st.session_state.results, st.session_state.hashes
+        params, seed = st.session_state.replay_params, st.session_state.patterns_seed
+        st.session_state.export_has_rows = bool(rows)
+        if not rows:
+            st.caption("ยังไม่มีผลลัพธ์ให้ดาวน์โหลด")
+            return
+
+        def build():
+            # รันตอนกดดาวน์โหลด (นอกรอบของสคริปต์) เวลาจึงไปรวมในรอบถัดไปของ profiler
+            with self.prof.stage("export_file"):
+                version = (self.schema, params, len(rows), hashes[-1] if hashes else 0)
+                return export_file(version, export_format, seed, rows)
+
+        st.download_button(
+            label=f"⬇️ ดาวน์โหลดผลลัพธ์ ({export_format})",
+            data=build,
+            file_name=f"results_seed{seed}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+            mime=mime,
+            use_container_width=True
+        )
+
+    # ===================== Click latency / dirty tracking =====================
+    # วัดเวลาตั้งแต่ callback ของการคลิก (บันทึกไม้ / แก้ประวัติ / Undo / Redo) จนวาด fragment เสร็จ
+    @staticmethod
+    def mark_click():
+        st.session_state.click_started = time.perf_counter()
+
+    @staticmethod
+    def report_latency():
+        started = st.session_state.pop("click_started", None)
+        if started is not None:
+            st.session_state.click_latencies = (st.session_state.click_latencies + [(time.perf_counter() - started) * 1000])[-50:]
+        latencies = st.session_state.click_latencies
+        runs = st.session_state.run_counts
+        if latencies:
+            st.caption(
+                f"⏱️ คลิกล่าสุด {latencies[-1]:.1f} ms | มัธยฐาน {statistics.median(latencies):.1f} ms ({len(latencies)} ครั้ง)"
+                f" | รันทั้งหน้า {runs['app']} ครั้ง, เฉพาะส่วนบันทึกผล {runs['trade_panel']} ครั้ง"
+            )
+
+    @staticmethod
+    def memo(name, version, build):
+        # คำนวณใหม่เฉพาะเมื่อ version ของสิ่งที่ component นี้ใช้เปลี่ยน (เช่นเปลี่ยนหน้า / จำนวน undo ไม่ต้องวาดกราฟใหม่)
+        cached = st.session_state.component_cache.get(name)
+        if cached is None or cached[0] != version:
+            cached = st.session_state.component_cache[name] = (version, build())
+        return cached[1]
+
+    # ===================== Results Input =====================
+    # แสดงเฉพาะไม้ที่กำลังจะบันทึก + ประวัติทีละหน้า เวลา render จึงไม่ขึ้นกับ num_trades
+    def on_result_selected(self, trade):
+        # บันทึกเมื่อเลือกผลของไม้ถัดไป แล้วล้าง selectbox ให้พร้อมสำหรับไม้ต่อไป
+        self.mark_click()
+        result = st.session_state.pop(f"res_{trade}", "-")
+        if result == "-" or trade != len(st.session_state.results) + 1:
+            return
+        # replay ไม้เดียวต่อจากสถานะปัจจุบันด้วยกติกาเดียวกับ recompute_state_from_results
+        start = (st.session_state.balance, st.session_state.bet_amount, st.session_state.loss_streak_amount)
+        row = {"ไม้": trade, "Pattern": st.session_state.patterns[trade-1], "ผลลัพธ์": result}
+        _, _, _, rows, checkpoints = self.recompute_state_from_results([row], start)
+        record_trade(st.session_state, rows[0], checkpoints[0])
+        self.on_record(rows)
+
+    def on_record(self, rows):
+        """hook: เรียกหลังบันทึกไม้ใหม่ (ทีละไม้หรือทั้งชุด) แอปที่ต้องส่งไม้ต่อไปที่อื่น override ได้"""
+
+    # ===================== Bulk entry =====================
+    # วางผลลัพธ์หลายไม้ (เช่น "WWLLWL" หรือคอลัมน์จากตาราง) แล้ว replay แบบ vectorized ครั้งเดียว
+    # บันทึกทั้งชุดเป็น transition เดียว: rerun ครั้งเดียวไม่ว่าจะกี่ไม้ และ Undo / Redo ได้ทั้งชุด
+    def bulk_rows(self, codes, first):
+        # แถวของไม้ first+1 .. ต่อจากสถานะปัจจุบัน (ผลตรงกับ recompute_state_from_results ทีละไม้)
+        start = (st.session_state.balance, st.session_state.bet_amount, st.session_state.loss_streak_amount)
+        bets, next_bets, balances, loss_sums = replay_outcomes(codes, self.capital, self.first_bet, self.target_profit, self.odds, start)
+        rows = self.new_rows(capacity=len(codes))
+        # extend_columns อ่านเฉพาะคอลัมน์ที่อยู่ใน schema: schema แบบเดิมเก็บเงินเดิมพันไม้ถัดไปใน "เงินเดิมพัน"
+        rows.extend_columns({
+            "ไม้": range(first + 1, first + len(codes) + 1),
+            "Pattern": st.session_state.patterns[first:first + len(codes)],
+            "ผลลัพธ์": codes,
+            "เงินเดิมพัน": next_bets,
+            "เงินเดิมพัน(ปัจจุบัน)": bets,
+            "เงินเดิมพันไม้ถัดไป": next_bets,
+            "พอร์ต": [round(balance, 2) for balance in balances.tolist()],
+        })
+        return rows, list(zip(balances.tolist(), next_bets.tolist(), loss_sums.tolist()))
+
+    def on_bulk_entry(self):
+        self.mark_click()
+        st.session_state.bulk_error = None
+        first = len(st.session_state.results)
+        try:
+            codes = parse_outcomes(st.session_state.bulk_text)
+            if first + len(codes) > self.num_trades:
+                raise ValueError(f"วาง {len(codes):,} ไม้ เกินจำนวนไม้ที่ตั้งไว้ (เหลือ {self.num_trades - first:,} จาก {self.num_trades:,} ไม้)")
+        except ValueError as e:
+            st.session_state.bulk_error = str(e)
+            return
+        with self.prof.stage("bulk_entry"):
+            rows, checkpoints = self.bulk_rows(codes, first)
+            record_trades(st.session_state, rows, checkpoints)
+        self.on_record(rows)
+        st.session_state.bulk_text = ""
+
+    # ประวัติทีละหน้า: แก้ผลย้อนหลังได้ใน data_editor ตัวเดียว แล้ว replay เฉพาะตั้งแต่แถวที่แก้
+    def on_history_edit(self, start, key):
+        self.mark_click()
+        edits = st.session_state[key]["edited_rows"]
+        changed = {start + int(pos): change["ผลลัพธ์"] for pos, change in edits.items() if "ผลลัพธ์" in change}
+        if changed:
+            first = min(changed)
+            source = [{**row, "ผลลัพธ์": changed.get(i, row["ผลลัพธ์"])} for i, row in enumerate(st.session_state.results[first:], first)]
+            start_checkpoint = st.session_state.checkpoints[first - 1] if first else self.initial
+            _, _, _, recomputed, checkpoints = self.recompute_state_from_results(source, start_checkpoint)
+            rewrite_history(st.session_state, first, recomputed, checkpoints, self.initial)
+        st.session_state.history_editor_nonce += 1
+
+    # ===================== Undo / Redo =====================
+    # ย้อน/ทำซ้ำด้วย checkpoint ของแต่ละแถว ไม่ต้องคำนวณประวัติใหม่ทั้งหมด
+    def on_undo(self):
+        self.mark_click()
+        undo_trades(st.session_state, self.initial, st.session_state.undo_steps)
+
+    def on_redo(self):
+        self.mark_click()
+        redo_trades(st.session_state, st.session_state.undo_steps)
+
+    def on_undo_batch(self):
+        self.mark_click()
+        undo_batch(st.session_state, self.initial)
+
+    def on_redo_batch(self):
+        self.mark_click()
+        redo_batch(st.session_state)
+
+    # ===================== Trade panel (fragment) =====================
+    # ทุกส่วนที่ขึ้นกับประวัติ (ช่องบันทึกผล / ประวัติ / Undo / ตาราง / กราฟ) อยู่ใน fragment เดียว:
+    # คลิกในส่วนนี้ rerun เฉพาะ fragment ไม่รันอินพุต, max trades, ruin DP, pattern bootstrap, replay และนำเข้า/ส่งออกซ้ำ
+    # (Streamlit สั่ง rerun fragment อื่นข้าม fragment ไม่ได้ ส่วนที่ต้องเห็นประวัติใหม่ทันทีจึงต้องอยู่ด้วยกัน)
+    def trade_row(self, trade):
+        """แถวบันทึกผลของไม้ถัดไป (แอปที่แสดงข้อมูลเพิ่มในแถวนี้ override ได้)"""
+        col1, col2, col3, col4 = st.columns([1, 1, 1, 1.2])
+        col1.write(f"ไม้ {trade}")
+        col2.write(f"({st.session_state.patterns[trade-1]})")
+        col3.selectbox("ผลลัพธ์", ["-", "ชนะ", "แพ้"], key=f"res_{trade}", on_change=self.on_result_selected, args=(trade,))
+
+    @st.fragment
+    def trade_panel(self):
+        with fragment_scope(self.prof, "trade_panel"):
+            self._trade_panel()
+
+    def _trade_panel(self):
+        prof, num_trades, page_size = self.prof, self.num_trades, self.page_size
+        # ปุ่มดาวน์โหลดอยู่นอก fragment นี้: ประวัติเปลี่ยนระหว่างว่าง / มีแถว (บันทึกไม้แรก, Undo จนหมด, นำเข้า)
+        # ต้อง rerun ทั้งหน้าให้ export_panel แสดงหรือซ่อนปุ่ม (เกิดเฉพาะตอนเปลี่ยนสถานะ ไม่ใช่ทุกคลิก)
+        if bool(st.session_state.results) != st.session_state.export_has_rows:
+            st.rerun()
+        st.session_state.run_counts["trade_panel"] += 1
+        st.subheader("🧮 กรอกผลลัพธ์ทีละไม้")
+        trade = len(st.session_state.results) + 1
+        if trade <= num_trades:
+            self.trade_row(trade)
+        else:
+            st.caption(f"บันทึกครบ {num_trades} ไม้แล้ว (เพิ่มจำนวนไม้เพื่อบันทึกต่อ)")
+
+        with st.expander("⚡ กรอกหลายไม้พร้อมกัน", expanded=bool(st.session_state.bulk_error)):
+            st.text_area(
+                "ผลลัพธ์ต่อจากไม้ล่าสุด (W/L, ชนะ/แพ้, 1/0) เช่น WWLLWL หรือวางคอลัมน์จากตาราง",
+                key="bulk_text", height=100,
+            )
+            st.button("⚡ บันทึกทั้งชุด", on_click=self.on_bulk_entry, disabled=trade > num_trades, use_container_width=True)
+            if st.session_state.bulk_error:
+                st.error(st.session_state.bulk_error)
+
+        if st.session_state.results:
+            total = len(st.session_state.results)
+            pages = math.ceil(total / page_size)
+            page = st.number_input(f"📄 หน้าประวัติ (1 = ล่าสุด, ทั้งหมด {pages} หน้า)", min_value=1, max_value=pages, value=1, step=1)
+            end = total - (page - 1) * page_size
+            start = max(0, end - page_size)
+            editor_key = f"history_editor_{st.session_state.history_editor_nonce}"
+            st.data_editor(
+                st.session_state.results.frame(start, end),
+                key=editor_key,
+                on_change=self.on_history_edit,
+                args=(start, editor_key),
+                column_config={"ผลลัพธ์": st.column_config.SelectboxColumn("ผลลัพธ์", options=["-", "ชนะ", "แพ้"], required=True)},
+                disabled=[c for c in st.session_state.results.columns if c != "ผลลัพธ์"],
+                hide_index=True,
+                use_container_width=True,
+            )
+
+        st.subheader("↩️ ย้อนกลับ (Undo / Redo)")
+        undo_col, redo_col, steps_col = st.columns(3)
+        steps_col.number_input("จำนวนไม้", min_value=1, value=1, step=1, key="undo_steps", label_visibility="collapsed")
+        undo_col.button("↩️ ย้อนกลับ", on_click=self.on_undo, disabled=not st.session_state.results, use_container_width=True)
+        redo_col.button("↪️ ทำซ้ำ (Redo)", on_click=self.on_redo, disabled=not st.session_state.redo_stack, use_container_width=True)
+        batch, redo_size = last_batch(st.session_state), redo_batch_size(st.session_state)
+        if batch or redo_size:
+            batch_undo_col, batch_redo_col = st.columns(2)
+            batch_undo_col.button(
+                f"↩️ ย้อนทั้งชุด ({batch[1] - batch[0]:,} ไม้)" if batch else "↩️ ย้อนทั้งชุด",
+                on_click=self.on_undo_batch, disabled=batch is None, use_container_width=True,
+            )
+            batch_redo_col.button(
+                f"↪️ ทำซ้ำทั้งชุด ({redo_size:,} ไม้)" if redo_size else "↪️ ทำซ้ำทั้งชุด",
+                on_click=self.on_redo_batch, disabled=not redo_size, use_container_width=True,
+            )
+        st.caption(f"ย้อนกลับได้ {len(st.session_state.results)} ไม้ | ทำซ้ำได้ {len(st.session_state.redo_stack)} ไม้")
+
+        if st.session_state.results:
+            with prof.stage("results_frame"):
+                df = st.session_state.results.frame()
+            st.subheader("📊 ตารางการเดินเงิน")
+            st.dataframe(df, use_container_width=True, hide_index=True)
+
+            st.subheader("📈 Equity Curve")
+            history_version = (st.session_state.replay_params, len(st.session_state.results), last_hash(st.session_state))
+            with prof.stage("equity_chart"):
+                chart = self.memo("equity_chart", history_version, lambda: equity_chart(history_version, st.session_state.results))
+            st.image(chart, use_container_width=True)
+
+            total_profit = st.session_state.balance - self.capital
+            st.success(f"✅ กำไรรวมประมาณ: {total_profit:,.2f} บาท")
+        else:
+            st.caption("ยังไม่มีผลลัพธ์ - เลือกผลลัพธ์ของไม้แรกเพื่อเริ่มบันทึก")
+
+        self.report_latency()
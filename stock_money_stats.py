@@ -0,0 +1,101 @@
+import math
+from dataclasses import asdict, dataclass
+
+# ===================== Running portfolio statistics =====================
+# อัปเดตทีละเทรดแบบ O(1) ไม่ต้องสแกนประวัติทั้งหมดทุก rerun
+# ค่าเฉลี่ย/ความแปรปรวนของผลตอบแทนต่อเทรดใช้วิธีของ Welford (เสถียรเชิงตัวเลข)
+# เทรดที่ผลลัพธ์เป็น "-" นับเป็นแถวในประวัติ แต่ไม่นับเป็นชนะ/แพ้และไม่ตัด streak
+
+
+@dataclass
+class RunningStats:
+    rows: int = 0
+    wins: int = 0
+    losses: int = 0
+    total_pnl: float = 0.0
+    decided_pnl: float = 0.0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0
+    # Welford ของผลตอบแทนต่อเทรด (กำไร/ขาดทุน ÷ ทุนก่อนหน้า) เฉพาะเทรดที่ชนะ/แพ้
+    return_mean: float = 0.0
+    return_m2: float = 0.0
+    # drawdown จากจุดสูงสุดของทุน
+    peak_equity: float = 0.0
+    max_drawdown: float = 0.0
+    max_drawdown_pct: float = 0.0
+    # streak: บวก = ชนะติดกัน, ลบ = แพ้ติดกัน
+    streak: int = 0
+    longest_win_streak: int = 0
+    longest_loss_streak: int = 0
+
+    def update(self, result, profit_loss, capital_before, capital_after):
+        self.rows += 1
+        self.total_pnl += profit_loss
+        if self.rows == 1:
+            self.peak_equity = capital_before
+        self.peak_equity = max(self.peak_equity, capital_before, capital_after)
+        drawdown = self.peak_equity - capital_after
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+            self.max_drawdown_pct = drawdown / self.peak_equity * 100 if self.peak_equity else 0.0
+
+        if result not in ("ชนะ", "แพ้"):
+            return
+        if result == "ชนะ":
+            self.wins += 1
+            self.streak = self.streak + 1 if self.streak > 0 else 1
+            self.longest_win_streak = max(self.longest_win_streak, self.streak)
+        else:
+            self.losses += 1
+            self.streak = self.streak - 1 if self.streak < 0 else -1
+            self.longest_loss_streak = max(self.longest_loss_streak, -self.streak)
+
+        self.decided_pnl += profit_loss
+        if profit_loss > 0:
+            self.gross_profit += profit_loss
+        else:
+            self.gross_loss -= profit_loss
+
+        ret = profit_loss / capital_before if capital_before else 0.0
+        delta = ret - self.return_mean
+        self.return_mean += delta / self.total_trades
+        self.return_m2 += delta * (ret - self.return_mean)
+
+    @property
+    def total_trades(self):
+        return self.wins + self.losses
+
+    @property
+    def win_rate(self):
+        return self.wins / self.total_trades * 100 if self.total_trades else 0.0
+
+    @property
+    def avg_return(self):
+        """กำไร/ขาดทุนเฉลี่ยต่อแถว (รวมแถว "-" เหมือนสถิติเดิมของแอป)"""
+        return self.total_pnl / self.rows if self.total_trades else 0.0
+
+    @property
+    def expectancy(self):
+        """กำไรคาดหวังต่อเทรดที่มีผลชนะ/แพ้ (บาท)"""
+        return self.decided_pnl / self.total_trades if self.total_trades else 0.0
+
+    @property
+    def profit_factor(self):
+        if self.gross_loss == 0:
+            return math.inf if self.gross_profit > 0 else 0.0
+        return self.gross_profit / self.gross_loss
+
+    @property
+    def sharpe_per_trade(self):
+        """ผลตอบแทนเฉลี่ยต่อเทรด ÷ ส่วนเบี่ยงเบนมาตรฐาน (ไม่ annualize)"""
+        if self.total_trades < 2:
+            return 0.0
+        std = math.sqrt(self.return_m2 / (self.total_trades - 1))
+        return self.return_mean / std if std > 0 else 0.0
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
@@ -0,0 +1,146 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from stock_money_ladder import bet_ladder
+
+# ===================== Loss-streak probabilities (closed form) =====================
+# P(มีแพ้ติดกัน >= k ไม้ อย่างน้อยหนึ่งครั้งใน n ไม้) เมื่อแพ้ไม้ละ p (ชนะ q = 1 - p) แบบไม่ต้องจำลอง
+# - n < k: 0
+# - k <= n <= 2k: มีช่วงแพ้ยาวได้แค่ช่วงเดียว -> p^k (1 + (n - k) q) (ค่าแม่นยำ)
+# - 2k < n < 16(k+1): recurrence แบบแม่นยำ P_m = P_(m-1) + q p^k (1 - P_(m-k-1)) คำนวณทีละ block ยาว k+1
+#   (ภายใน block ขึ้นกับ block ก่อนหน้าเท่านั้น จึงเป็น cumsum เดียว) ไม่เกิน 16 block ต่อ k
+# - n >= 16(k+1): สูตร asymptotic ของ Feller  P(ไม่มี) ≈ (1 - p x) / ((k + 1 - k x) q) * x^-(n+1)
+#   x = รากบวกของ 1 - x + q p^k x^(k+1) = 0 ที่ไม่ใช่ 1/p (หาด้วย Newton พร้อมกันทุก k แบบ vectorized)
+#   ช่วงนี้คลาดเคลื่อนจาก recurrence แบบแม่นยำน้อยกว่า 1e-9
+# คำนวณในรูป log / expm1 ความน่าจะเป็นเล็กมาก (1e-15) จึงไม่หายเป็น 0 และ n ถึง 1e6 ใช้เวลาคงที่
+
+NEWTON_STEPS = 100
+EXACT_BLOCKS = 16
+MAX_DEPTH = 5_000  # ความลึกสูงสุดที่ค้นหาเมื่อกำหนดระดับความมั่นใจ
+
+
+def _newton(d, k, log_c, steps=NEWTON_STEPS):
+    # หา d = x - 1 แทน x ตรง ๆ: เมื่อ p^k เล็กมาก x - 1 ≈ q p^k จะหายไปถ้าเก็บเป็น 1 + d
+    # f = 1 - x + c x^(k+1) เป็นฟังก์ชัน convex: Newton จากฝั่งที่ f > 0 ลู่เข้ารากที่ใกล้ที่สุดแบบทางเดียว
+    for _ in range(steps):
+        power = np.exp(log_c + (k + 1) * np.log1p(d))
+        f = power - d
+        slope = (k + 1) * power / (1 + d) - 1
+        step = np.where(slope != 0, f / np.where(slope != 0, slope, 1), 0)
+        d = d - step
+        if np.all(np.abs(step) <= 1e-15 * np.maximum(np.abs(d), 1e-300)):
+            break
+    return d
+
+
+def _feller_root(k, loss_prob):
+    """d = x - 1 ของรากที่ใช้ในสูตร Feller"""
+    q = 1 - loss_prob
+    log_c = np.log(q) + k * np.log(loss_prob)
+    d = _newton(np.zeros_like(k), k, log_c)  # รากที่เล็กกว่า
+    # ถ้ารากที่เล็กกว่าคือ 1/p (ราก "ปลอม") ใช้รากที่ใหญ่กว่า: เริ่มจากจุดที่ f > 0 ทางขวาของทั้งสองราก
+    spurious = np.isclose((1 + d) * loss_prob, 1, rtol=1e-9, atol=0)
+    if spurious.any():
+        upper = np.expm1((np.log(2) - log_c[spurious]) / k[spurious])
+        d[spurious] = _newton(upper, k[spurious], log_c[spurious])
+    return d
+
+
+def _exact_probability(k, n, p):
+    k, n = int(k), int(n)
+    prob = np.zeros(n + 1)
+    prob[k] = p ** k
+    c = (1 - p) * p ** k
+    for start in range(k + 1, n + 1, k + 1):
+        end = min(n + 1, start + k + 1)
+        prob[start:end] = prob[start - 1] + c * np.cumsum(1 - prob[start - k - 1:end - k - 1])
+    return prob[n]
+
+
+def streak_probability(depths, num_trades, loss_prob):
+    """P(แพ้ติดกัน >= depth ไม้อย่างน้อยหนึ่งครั้งภายใน num_trades ไม้) ของทุก depth (array)"""
+    k = np.atleast_1d(np.asarray(depths, dtype=float))
+    n = float(num_trades)
+    p = float(loss_prob)
+    if p <= 0:
+        return np.where(k <= 0, 1.0, 0.0)
+    if p >= 1:
+        return np.where(k <= n, 1.0, 0.0)
+    q = 1 - p
+    prob = np.zeros_like(k)
+    prob[k <= 0] = 1.0
+
+    short = (k > 0) & (k <= n) & (n <= 2 * k)
+    prob[short] = np.exp(k[short] * np.log(p)) * (1 + (n - k[short]) * q)
+
+    middle = (k > 0) & (n > 2 * k) & (n < EXACT_BLOCKS * (k + 1))
+    for i in np.flatnonzero(middle):
+        prob[i] = _exact_probability(k[i], n, p)
+
+    long = (k > 0) & (n >= EXACT_BLOCKS * (k + 1))
+    if long.any():
+        kl = k[long]
+        d = _feller_root(kl, p)
+        log_none = np.log((q - p * d) / ((1 - kl * d) * q)) - (n + 1) * np.log1p(d)
+        prob[long] = 0.0 - np.expm1(np.minimum(log_none, 0))
+    return np.clip(prob, 0.0, 1.0)
+
+
+def streak_for_confidence(confidence, num_trades, loss_prob, max_depth=MAX_DEPTH):
+    """จำนวนไม้แพ้ติดที่น้อยที่สุดที่ต้องรับได้ เพื่อให้โอกาสเจอแพ้ติดยาวกว่านั้นภายใน num_trades ไม้ <= 1 - confidence"""
+    def beyond(depth):  # รับได้ depth ไม้ = ไม่เจอแพ้ติด >= depth + 1
+        return streak_probability(depth + 1, num_trades, loss_prob)[0]
+
+    if beyond(max_depth) > 1 - confidence:
+        raise ValueError(f"ต้องรับแพ้ติดได้มากกว่า {max_depth:,} ไม้ ที่ระดับความมั่นใจนี้")
+    # beyond ลดลงตาม depth: binary search แทนการคำนวณทุกความลึก
+    low, high = 0, max_depth
+    while low < high:
+        mid = (low + high) // 2
+        if beyond(mid) <= 1 - confidence:
+            high = mid
+        else:
+            low = mid + 1
+    return low
+
+
+def streak_curve(num_trades, loss_prob, max_depth, points=200):
+    """(depths, P(แพ้ติด >= depth)) ไม่เกิน points จุด สำหรับวาดกราฟการกระจายของแพ้ติดยาวสุด"""
+    depths = np.unique(np.linspace(1, max(1, max_depth), points).round().astype(int))
+    return depths, streak_probability(depths, num_trades, loss_prob)
+
+
+# ===================== Capital planner =====================
+@dataclass(frozen=True)
+class StreakPlan:
+    depth: int                # จำนวนไม้แพ้ติดที่ต้องรับได้
+    capital: float            # ทุนที่ต้องมี (= ขาดทุนสะสมเมื่อแพ้ครบ depth ไม้)
+    bets: np.ndarray          # เดิมพันของไม้ที่ 1..depth ระหว่างแพ้ติด
+    losses: np.ndarray        # ขาดทุนสะสมหลังแพ้ 0..depth ไม้
+    hit_probability: float    # โอกาสเจอแพ้ติด > depth ไม้ภายใน num_trades ไม้ (= ทุนหมด)
+
+
+def required_capital(depth, first_bet, target_profit, odds):
+    """ทุนที่ต้องมีเพื่อแพ้ติดกัน depth ไม้ได้ คืน (ทุน, BetLadder ที่ครอบคลุมความลึกนั้น)"""
+    # สร้าง ladder ถึงระดับ depth ครั้งเดียวแล้วอ่านขาดทุนสะสม แทนการเดาทุนแล้วสร้าง ladder ใหม่ซ้ำ ๆ
+    ladder = bet_ladder(math.inf, first_bet, target_profit, odds, max_depth=int(depth))
+    try:
+        capital = float(ladder.capital_needed(depth))
+    except OverflowError:  # ขาดทุนสะสมเป็น int ใหญ่เกิน float
+        capital = math.inf
+    if not math.isfinite(capital):
+        raise ValueError(f"ทุนที่ต้องใช้เพื่อแพ้ติด {depth:,} ไม้ เกินขอบเขตที่คำนวณได้")
+    return capital, ladder
+
+
+def plan_streak(depth, first_bet, target_profit, odds, num_trades, win_prob):
+    """แผนทุนสำหรับรับแพ้ติด depth ไม้ พร้อม ladder และโอกาสที่ทุนนี้จะหมดภายใน num_trades ไม้
+
+    ถือว่าทุนเท่าเดิมตลอด (ไม่นับกำไรที่สะสมระหว่างทาง) ผลจึงเป็นค่าแบบระมัดระวัง
+    """
+    capital, ladder = required_capital(depth, first_bet, target_profit, odds)
+    bets, losses = (np.asarray(a, dtype=float) for a in ladder.arrays(depth))
+    hit = float(streak_probability(depth + 1, num_trades, 1 - win_prob)[0])
+    return StreakPlan(depth, capital, bets, losses, hit)
@@ -0,0 +1,145 @@
+import itertools
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from stock_money_engine import max_losing_streak
+from stock_money_montecarlo import simulate_recovery_paths
+from stock_money_ruin_dp import FALLBACK_SEED, fallback_paths, ruin_estimate
+
+# ===================== Parameter sweep =====================
+# ประเมินทุกชุด (capital, first_bet, target_profit, odds) ในกริดด้วยกติกาเดิมพันเดียวกับแอป
+# - ไม้น้อย (<= EXACT_MAX_TRADES) ใช้ DP แบบแม่นยำ (stock_money_ruin_dp.py) ไม้มากใช้ Monte Carlo ที่ seed ตายตัว (SWEEP_SEED)
+# - ช่องที่ยังไม่เคยคำนวณกระจายไปทุกคอร์ด้วย ProcessPoolExecutor
+# - ผลแต่ละช่องเก็บลง SQLite (sweep_cache.sqlite3) ขยายกริดแล้วคำนวณเฉพาะช่องใหม่
+# - ทุกช่องติด tag วิธีที่ใช้จริง: "exact" เฉพาะช่องที่ DP ทำได้ในงบ ช่องที่ DP เกินงบติด tag ของ Monte Carlo สำรอง
+
+DEFAULT_CACHE_PATH = "sweep_cache.sqlite3"
+EXACT_MAX_TRADES = 100
+MC_PATHS = 4_000
+SWEEP_SEED = 20240101  # ทุกช่องใช้ค่าสุ่มชุดเดียวกัน (common random numbers) เทียบกันได้ตรง ๆ
+PARALLEL_MIN_CELLS = 64  # ช่องน้อยกว่านี้คำนวณใน process เดียว (เปิด pool ไม่คุ้ม)
+METRICS = ["expected_profit", "ruin_probability", "max_streak"]
+KEY_COLUMNS = ["capital", "first_bet", "target_profit", "odds", "num_trades", "win_prob", "method"]
+
+
+def _mc_method(num_paths, seed):
+    return f"mc{num_paths}-{seed}"
+
+
+def _methods(num_trades):
+    """tag ที่ช่องของ sweep นี้อาจมีใน cache (ช่อง exact ที่ DP เกินงบได้ tag ของ Monte Carlo สำรอง)"""
+    if num_trades <= EXACT_MAX_TRADES:
+        return ["exact", _mc_method(fallback_paths(num_trades), FALLBACK_SEED)]
+    return [_mc_method(MC_PATHS, SWEEP_SEED)]
+
+
+def evaluate_cell(cell):
+    """cell = (capital, first_bet, target_profit, odds, num_trades, win_prob) -> (expected_profit, ruin_probability, max_streak, method)"""
+    capital, first_bet, target_profit, odds, num_trades, win_prob = cell
+    if num_trades <= EXACT_MAX_TRADES:
+        # DP เกินงบในช่องที่เศษเงินละเอียด -> ruin_estimate ใช้ Monte Carlo ที่ seed ตายตัว (ผลเดิมทุกครั้ง cache ได้)
+        dist = ruin_estimate(capital, first_bet, target_profit, odds, num_trades, win_prob)
+        expected, ruin = dist.expected_final_balance, dist.ruin_probability
+        method = "exact" if dist.exact else _mc_method(dist.num_paths, FALLBACK_SEED)
+    else:
+        mc = simulate_recovery_paths(
+            capital, first_bet, target_profit, odds, num_trades,
+            num_paths=MC_PATHS, win_prob=win_prob, max_band_points=2, seed=SWEEP_SEED,
+        )
+        expected, ruin = mc.mean_final_balance, mc.ruin_probability
+        method = _mc_method(MC_PATHS, SWEEP_SEED)
+    return expected - capital, ruin, max_losing_streak(capital, first_bet, target_profit, odds), method
+
+
+class SweepCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cells ("
+            "capital REAL, first_bet REAL, target_profit REAL, odds REAL, num_trades INTEGER, win_prob REAL, method TEXT, "
+            "expected_profit REAL, ruin_probability REAL, max_streak INTEGER, "
+            "PRIMARY KEY (capital, first_bet, target_profit, odds, num_trades, win_prob, method))"
+        )
+        self._conn.commit()
+
+    def lookup(self, cells, methods):
+        """คืน dict cell -> (metrics..., method) ของช่องที่มีใน cache แล้วด้วยวิธีใดวิธีหนึ่งใน methods"""
+        with self._lock:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (capital, first_bet, target_profit, odds, num_trades, win_prob)")
+            self._conn.execute("DELETE FROM wanted")
+            self._conn.executemany("INSERT INTO wanted VALUES (?, ?, ?, ?, ?, ?)", cells)
+            rows = self._conn.execute(
+                "SELECT c.capital, c.first_bet, c.target_profit, c.odds, c.num_trades, c.win_prob, "
+                "c.expected_profit, c.ruin_probability, c.max_streak, c.method FROM wanted w JOIN cells c USING "
+                f"(capital, first_bet, target_profit, odds, num_trades, win_prob) WHERE c.method IN ({', '.join('?' for _ in methods)})",
+                list(methods),
+            ).fetchall()
+        return {tuple(row[:6]): tuple(row[6:]) for row in rows}
+
+    def store(self, values):
+        """values = dict cell -> (metrics..., method) แบบที่ evaluate_cell คืน"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*cell, metrics[-1], *metrics[:-1]) for cell, metrics in values.items()],
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+def grid_values(low, high, steps):
+    """ค่าในแกนกริดแบบเว้นเท่ากัน ปัดเศษให้ key ใน cache ตรงกันทุกครั้ง"""
+    return sorted({round(float(v), 6) for v in np.linspace(low, high, max(1, int(steps)))})
+
+
+def _collect(cells, results, progress):
+    computed = {}
+    every = max(1, len(cells) // 100)
+    for i, (cell, metrics) in enumerate(zip(cells, results), 1):
+        computed[cell] = metrics
+        if progress is not None and (i % every == 0 or i == len(cells)):
+            progress(i, len(cells))
+    return computed
+
+
+def run_sweep(capitals, first_bets, target_profits, odds_values, num_trades, win_prob=0.5,
+              cache=None, max_workers=None, progress=None):
+    """คำนวณทุกช่องของกริด คืน DataFrame (หนึ่งแถวต่อช่อง มีคอลัมน์ method) พร้อมจำนวนช่องที่คำนวณใหม่
+
+    progress(done, total) ถูกเรียกระหว่างคำนวณช่องใหม่ (ใช้กับ st.progress)
+    """
+    num_trades, win_prob = int(num_trades), round(float(win_prob), 6)
+    cells = [
+        (round(float(c), 6), round(float(f), 6), round(float(t), 6), round(float(o), 6), num_trades, win_prob)
+        for c, f, t, o in itertools.product(capitals, first_bets, target_profits, odds_values)
+    ]
+    known = cache.lookup(cells, _methods(num_trades)) if cache is not None else {}
+    missing = [cell for cell in cells if cell not in known]
+
+    computed = {}
+    if missing:
+        workers = max_workers or os.cpu_count() or 1
+        if len(missing) < PARALLEL_MIN_CELLS or workers == 1:
+            computed = _collect(missing, map(evaluate_cell, missing), progress)
+        else:
+            # spawn แทน fork: process ของ Streamlit มีหลาย thread การ fork อาจติด lock ค้างได้
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                chunksize = max(1, len(missing) // (workers * 8))
+                computed = _collect(missing, pool.map(evaluate_cell, missing, chunksize=chunksize), progress)
+        if cache is not None:
+            cache.store(computed)
+
+    known.update(computed)
+    import pandas as pd  # worker ที่ spawn ขึ้นมาไม่ต้องโหลด pandas
+
+    frame = pd.DataFrame([cell[:4] + known[cell] for cell in cells], columns=KEY_COLUMNS[:4] + METRICS + ["method"])
+    return frame, len(missing)
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import numpy as np
+
+# โมดูลของแอปอยู่ที่ root ของ repo (ไม่มี package) ให้ import ได้ไม่ว่าจะรัน pytest จากที่ไหน
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def random_results(count, seed, blank=0.1):
+    """ประวัติผลลัพธ์สุ่ม (list ของ dict แบบเดียวกับที่แอปเก็บ) มีไม้ "-" ปนบ้าง"""
+    rng = np.random.default_rng(seed)
+    draws = rng.random(count)
+    results = np.where(draws < blank, "-", np.where(draws < (1 + blank) / 2, "ชนะ", "แพ้"))
+    patterns = np.where(rng.random(count) < 0.5, "พุธ", "คอ")
+    return [{"ไม้": i + 1, "Pattern": str(p), "ผลลัพธ์": str(r)} for i, (p, r) in enumerate(zip(patterns, results))]
+
+
+def random_trades(count, seed, capital=100_000.0):
+    """เทรดสุ่มแบบเดียวกับที่ stock_money_management.py บันทึก (ทุนต่อเนื่องกัน มีผล "-" ปนบ้าง)"""
+    rng = np.random.default_rng(seed)
+    trades = []
+    for i in range(count):
+        result = rng.choice(["ชนะ", "แพ้", "-"], p=[0.45, 0.45, 0.1])
+        pnl = float(round(rng.uniform(100, 3000), 2)) * {"ชนะ": 1, "แพ้": -1, "-": 0}[result]
+        trades.append({
+            "วันที่-เวลา": f"2026-01-01 09:{i // 60:02d}:{i % 60:02d}", "ทุนก่อนหน้า": capital,
+            "Entry": 10.0, "Stop Loss": 9.5, "Target": 11.0, "ขนาดซื้อ": 200.0, "R:R": 2.0,
+            "ผลลัพธ์": str(result), "กำไร/ขาดทุน": pnl, "ทุนหลังเทรด": capital + pnl, "หมายเหตุ": "",
+        })
+        capital += pnl
+    return trades
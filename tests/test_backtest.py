@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import stock_money_backtest
+from stock_money_backtest import Bars, backtest, first_hit, load_bars
+from stock_money_journal import COLUMNS
+
+START = pd.Timestamp("2026-01-05 09:00")
+
+
+def minute(i):
+    return START + pd.Timedelta(minutes=i)
+
+
+def make_bars(high, low, close=None):
+    high, low = np.asarray(high, dtype=float), np.asarray(low, dtype=float)
+    close = (high + low) / 2 if close is None else np.asarray(close, dtype=float)
+    ts = np.array([minute(i).value for i in range(len(high))], dtype=np.int64)
+    return Bars(ts, close.copy(), high, low, close)
+
+
+def signals(*rows):
+    return pd.DataFrame(
+        [(symbol, minute(at), entry, stop_loss, target) for symbol, at, entry, stop_loss, target in rows],
+        columns=["Symbol", "เวลาเข้า", "Entry", "Stop Loss", "Target"],
+    )
+
+
+def test_bar_touching_stop_and_target_counts_as_loss():
+    bars = make_bars(high=[10.5, 11.0, 12.5], low=[9.8, 9.5, 8.5])
+    assert first_hit(bars, 0, 9.0, 12.0) == (2, "แพ้")
+    trades = backtest(signals(("A", 0, 10.0, 9.0, 12.0)), lambda _: bars, 10_000, 1.0)
+    trade = trades.iloc[0]
+    assert trade["ผลลัพธ์"] == "แพ้"
+    assert trade["ขนาดซื้อ"] == 100  # 1% ของ 10,000 / ความเสี่ยง 1 บาทต่อหุ้น
+    assert trade["กำไร/ขาดทุน"] == pytest.approx(-100.0)
+    assert trade["วันที่-เวลา"] == minute(2).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def test_short_is_stopped_out_above_entry():
+    bars = make_bars(high=[10.2, 10.6, 11.3, 11.0], low=[9.9, 9.7, 10.4, 7.0])
+    # stop > target = short: แตะ stop 11 ที่แท่ง 2 ก่อนแท่งที่ลงถึงเป้า
+    trades = backtest(signals(("A", 0, 10.0, 11.0, 8.0)), lambda _: bars, 10_000, 2.0)
+    trade = trades.iloc[0]
+    assert (trade["ผลลัพธ์"], trade["ขนาดซื้อ"]) == ("แพ้", 200)
+    assert trade["กำไร/ขาดทุน"] == pytest.approx(-200.0)
+    assert trade["R:R"] == pytest.approx(2.0)
+
+    win = backtest(signals(("A", 0, 10.0, 12.0, 8.0)), lambda _: bars, 10_000, 2.0).iloc[0]
+    assert win["ผลลัพธ์"] == "ชนะ"
+    assert win["กำไร/ขาดทุน"] == pytest.approx(100 * 2.0)  # 2% ของ 10,000 / 2 บาท = 100 หุ้น x กำไร 2 บาท
+
+
+def test_sizing_uses_realized_capital_while_trades_are_open():
+    # A: ถึงเป้าที่นาที 5 | B: เข้านาที 2 ขณะ A ยังถืออยู่ | C: เข้านาที 6 หลัง A ปิดแล้ว
+    rising = make_bars(high=[10.2, 10.4, 10.6, 10.8, 11.0, 12.0, 12.2, 12.4, 12.6, 14.0],
+                       low=[9.9, 10.0, 10.2, 10.4, 10.6, 11.0, 11.8, 12.0, 12.2, 12.5])
+    trades = backtest(
+        signals(("A", 0, 10.0, 9.0, 12.0), ("B", 2, 10.5, 9.5, 14.0), ("C", 6, 12.0, 11.0, 14.0)),
+        lambda _: rising, 10_000, 1.0,
+    )
+    by_symbol = {row["หมายเหตุ"].split()[0]: row for _, row in trades.iterrows()}
+    assert by_symbol["A"]["ขนาดซื้อ"] == pytest.approx(100)  # ทุนตั้งต้น
+    assert by_symbol["B"]["ขนาดซื้อ"] == pytest.approx(100)  # A ยังไม่ปิด: ยังไม่นับกำไรของ A
+    assert by_symbol["C"]["ขนาดซื้อ"] == pytest.approx(102)  # ทุน 10,200 หลัง A ปิด
+
+    # เรียงตามเวลาออก ทุนต่อเนื่องกันทุกแถว
+    assert list(trades.columns) == [name for name, _, _ in COLUMNS]
+    assert trades["วันที่-เวลา"].is_monotonic_increasing
+    np.testing.assert_allclose(trades["ทุนก่อนหน้า"].iloc[1:], trades["ทุนหลังเทรด"].iloc[:-1])
+    assert trades["ทุนหลังเทรด"].iloc[-1] == pytest.approx(10_000 + trades["กำไร/ขาดทุน"].sum())
+
+
+def test_board_lot_and_open_trade_at_end_of_data():
+    bars = make_bars(high=[10.2, 10.4, 10.3], low=[9.9, 9.8, 9.9], close=[10.0, 10.1, 10.25])
+    trade = backtest(signals(("A", 0, 10.0, 9.3, 12.0)), lambda _: bars, 10_000, 1.0, board_lot=100).iloc[0]
+    assert trade["ขนาดซื้อ"] == 100  # 142.8 หุ้น ปัดลงเป็น lot
+    assert trade["ผลลัพธ์"] == "-"
+    assert trade["กำไร/ขาดทุน"] == pytest.approx(25.0)  # ปิดที่ราคาสุดท้าย 10.25
+
+
+def test_first_hit_searches_past_first_block(monkeypatch):
+    monkeypatch.setattr(stock_money_backtest, "FIRST_BLOCK", 4)
+    high = np.full(100, 10.5)
+    high[70] = 12.0
+    bars = make_bars(high=high, low=np.full(100, 9.5))
+    assert first_hit(bars, 3, 9.0, 12.0) == (70, "ชนะ")
+    assert first_hit(bars, 71, 9.0, 12.0) == (99, "-")
+
+
+def test_csv_bars_are_memory_mapped(tmp_path):
+    path = tmp_path / "A.csv"
+    frame = pd.DataFrame({"Time": [minute(i) for i in range(5)], "Open": 10.0, "High": [10, 11, 12, 13, 14],
+                          "Low": [9, 10, 11, 12, 13], "Close": 10.5})
+    frame.to_csv(path, index=False)
+    bars = load_bars(str(path))
+    assert isinstance(bars.high, np.memmap)
+    assert bars.high.tolist() == [10, 11, 12, 13, 14]
+    assert bars.ts.tolist() == [minute(i).value for i in range(5)]
+
+    frame.iloc[::-1].to_csv(tmp_path / "B.csv", index=False)
+    with pytest.raises(ValueError, match="เรียงตามเวลา"):
+        load_bars(str(tmp_path / "B.csv"))
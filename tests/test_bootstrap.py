@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import stock_money_bootstrap
+from stock_money_bootstrap import bootstrap_paths
+
+SAMPLES = np.random.default_rng(3).normal(0.002, 0.02, 150)
+
+
+def assert_same_bootstrap(a, b):
+    for name in ("final_balances", "max_drawdowns", "underwater", "recovered", "floor_at", "bands"):
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name))
+
+
+@pytest.mark.parametrize("mode", ["return", "pnl"])
+def test_parallel_matches_serial(mode):
+    samples = SAMPLES if mode == "return" else SAMPLES * 1000
+    serial = bootstrap_paths(samples, 10_000, 120, num_paths=5_000, mode=mode, seed=7, max_workers=1)
+    parallel = bootstrap_paths(samples, 10_000, 120, num_paths=5_000, mode=mode, seed=7, max_workers=4)
+    assert_same_bootstrap(serial, parallel)
+
+
+def test_chunk_size_does_not_change_paths(monkeypatch):
+    reference = bootstrap_paths(SAMPLES, 10_000, 80, num_paths=3_000, seed=11, max_workers=1)
+    for chunk in (1, 7, 999, 10_000):
+        monkeypatch.setattr(stock_money_bootstrap, "CHUNK_PATHS", chunk)
+        assert_same_bootstrap(reference, bootstrap_paths(SAMPLES, 10_000, 80, num_paths=3_000, seed=11, max_workers=3))
+
+
+def test_seed_and_validation():
+    a = bootstrap_paths(SAMPLES, 10_000, 50, num_paths=500, seed=1)
+    b = bootstrap_paths(SAMPLES, 10_000, 50, num_paths=500, seed=2)
+    assert not np.array_equal(a.final_balances, b.final_balances)
+    assert a.seed == 1
+    with pytest.raises(ValueError):
+        bootstrap_paths(SAMPLES[:3], 10_000, 50)
+    with pytest.raises(ValueError):
+        bootstrap_paths(SAMPLES, 0, 50)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from stock_money_charts import equity_curve_png, minmax_downsample
+
+
+@pytest.mark.parametrize("n, max_points", [(10_000, 2_000), (100_001, 500), (2_003, 2_000), (50, 7)])
+def test_downsample_keeps_every_bucket_extreme(n, max_points):
+    rng = np.random.default_rng(n)
+    x = np.arange(1, n + 1)
+    y = 1000 + np.cumsum(rng.normal(0, 10, n))
+    dx, dy = minmax_downsample(x, y, max_points)
+
+    assert len(dy) <= max_points
+    assert (dx[0], dx[-1]) == (x[0], x[-1])
+    assert np.all(np.diff(dx) > 0)  # เรียงตามเวลา ไม่มีจุดซ้ำ
+    np.testing.assert_array_equal(dy, y[dx - 1])  # ทุกจุดเป็นจุดจริงของเส้นเดิม
+    assert (dy.min(), dy.max()) == (y.min(), y.max())
+
+    # จุดต่ำสุด / สูงสุดของแต่ละ bucket ต้องยังอยู่
+    inner = y[1:-1]
+    size = -(-len(inner) // ((max_points - 2) // 2))
+    kept = set(dx.tolist())
+    for start in range(0, len(inner), size):
+        bucket = inner[start:start + size]
+        assert start + 2 + int(bucket.argmin()) in kept
+        assert start + 2 + int(bucket.argmax()) in kept
+
+
+def test_short_lines_are_unchanged():
+    x, y = [1, 2, 3], [5.0, 4.0, 6.0]
+    dx, dy = minmax_downsample(x, y, max_points=3)
+    assert dx.tolist() == x and dy.tolist() == y
+    dx, dy = minmax_downsample([1, 2], [1.0, 2.0], max_points=1)
+    assert dy.tolist() == [1.0, 2.0]
+
+
+@pytest.mark.filterwarnings("ignore:Glyph")  # เครื่องที่ไม่มีฟอนต์ไทย
+def test_equity_curve_renders_png():
+    pytest.importorskip("matplotlib")
+    png = equity_curve_png(np.arange(5_000), np.linspace(1000, 2000, 5_000))
+    assert png.startswith(b"\x89PNG")
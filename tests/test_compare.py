@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from stock_money_compare import (
+    compare_policies,
+    compare_simulated,
+    fixed_fractional_policy,
+    kelly_policy,
+    outcome_matrix,
+    recovery_policy,
+)
+from stock_money_import import parse_outcome_sequences
+from stock_money_montecarlo import simulate_recovery_paths
+
+
+@pytest.mark.parametrize("params", [(1000, 30, 1, 1), (1000, 7.3, 0.7, 1.7), (500, 10, 5, 0.8)])
+def test_recovery_row_matches_simulate_recovery_paths(params):
+    capital, first_bet, target_profit, odds = params
+    policies = [fixed_fractional_policy(2), recovery_policy(first_bet, target_profit), kelly_policy(0.55, odds)]
+    result = compare_simulated(policies, capital, odds, 300, num_paths=2_000, win_prob=0.55, seed=9)
+    mc = simulate_recovery_paths(capital, first_bet, target_profit, odds, 300, num_paths=2_000, win_prob=0.55, seed=9)
+
+    np.testing.assert_array_equal(result.ruined_at[1], mc.ruined_at)
+    np.testing.assert_allclose(result.final_balances[1], mc.final_balances, rtol=0, atol=1e-9)
+    assert result.names == tuple(policy.name for policy in policies)
+
+
+def test_compare_real_sequences_with_blank_trades():
+    sequences = parse_outcome_sequences("W L - L W\n\nLLL\n\n-")
+    result = compare_policies([recovery_policy(10, 1)], 100, 1.0, outcome_matrix(sequences))
+    # ไม้ "-" ไม่เปลี่ยนพอร์ต, ชุดที่สั้นกว่าถูกเติมด้วย "-"
+    assert result.final_balances[0].tolist() == [111.0, 57.0, 100.0]
+    assert result.ruined_at[0].tolist() == [-1, -1, -1]
+
+
+def test_sequence_errors_name_the_block():
+    with pytest.raises(ValueError, match="ชุดที่ 2"):
+        parse_outcome_sequences("WL\n\nWX")
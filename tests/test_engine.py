@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from conftest import random_results
+from stock_money_engine import RESULT_CODES, replay_outcomes, replay_results
+
+PARAMS = [
+    (1000, 30, 1, 1),
+    (1000, 7.3, 0.7, 1.7),
+    (5000, 10, 5, 0.8),
+    (250, 1, 2, 3),
+]
+
+
+# ===================== replay_outcomes vs replay_results =====================
+@pytest.mark.parametrize("params", PARAMS)
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_replay_outcomes_matches_replay_results(params, seed):
+    results = random_results(400, seed)
+    bal, bet, loss_sum, rows, checkpoints = replay_results(results, *params, with_current_bet=True)
+    codes = [RESULT_CODES[row["ผลลัพธ์"]] for row in results]
+    bets, next_bets, balances, loss_sums = replay_outcomes(codes, *params)
+
+    assert bets.tolist() == [row["เงินเดิมพัน(ปัจจุบัน)"] for row in rows]
+    assert next_bets.tolist() == [row["เงินเดิมพันไม้ถัดไป"] for row in rows]
+    assert loss_sums.tolist() == [c[2] for c in checkpoints]
+    np.testing.assert_allclose(balances, [c[0] for c in checkpoints], rtol=0, atol=1e-9)
+    assert (next_bets[-1], loss_sums[-1]) == (bet, loss_sum)
+
+
+@pytest.mark.parametrize("params", PARAMS)
+def test_replay_outcomes_continues_from_checkpoint(params):
+    results = random_results(300, 7)
+    # เริ่มต่อจากกลางช่วงแพ้ติด: checkpoint หลังไม้ที่แพ้
+    split = next(i for i, row in enumerate(results) if i > 50 and row["ผลลัพธ์"] == "แพ้") + 1
+    *_, checkpoints = replay_results(results[:split], *params)
+    _, _, _, rows, expected = replay_results(results[split:], *params, start=checkpoints[-1], with_current_bet=True)
+    codes = [RESULT_CODES[row["ผลลัพธ์"]] for row in results[split:]]
+    bets, next_bets, balances, loss_sums = replay_outcomes(codes, *params, start=checkpoints[-1])
+
+    assert bets.tolist() == [row["เงินเดิมพัน(ปัจจุบัน)"] for row in rows]
+    assert next_bets.tolist() == [c[1] for c in expected]
+    assert loss_sums.tolist() == [c[2] for c in expected]
+    np.testing.assert_allclose(balances, [c[0] for c in expected], rtol=0, atol=1e-9)
+
+
+def test_replay_outcomes_without_wins_or_results():
+    labels = {code: label for label, code in RESULT_CODES.items()}
+    for codes in ([2] * 12, [0] * 5, [0, 2, 0, 2], []):
+        results = [{"ไม้": i + 1, "ผลลัพธ์": labels[c]} for i, c in enumerate(codes)]
+        _, _, _, _, checkpoints = replay_results(results, 1000, 30, 1, 1)
+        bets, next_bets, balances, loss_sums = replay_outcomes(codes, 1000, 30, 1, 1)
+        assert len(bets) == len(codes)
+        assert next_bets.tolist() == [c[1] for c in checkpoints]
+        assert balances.tolist() == [c[0] for c in checkpoints]
+
@@ -0,0 +1,146 @@
+import pytest
+
+from conftest import random_results
+from stock_money_engine import replay_results
+from stock_money_history import (
+    chain_hashes,
+    record_trade,
+    record_trades,
+    redo_batch,
+    redo_batch_size,
+    redo_trades,
+    reset_history,
+    rewrite_history,
+    undo_batch,
+    undo_trades,
+)
+from stock_money_results import CheckpointStore, ResultsStore
+
+PARAMS = (1000, 30, 1, 1)
+INITIAL = (1000, 30, 0)
+
+
+def containers(kind):
+    return ([], []) if kind == "list" else (ResultsStore(), CheckpointStore())
+
+
+def new_state(results, checkpoints):
+    return {
+        "results": results,
+        "checkpoints": checkpoints,
+        "hashes": [],
+        "redo_stack": [],
+        "redo_batches": [],
+        "batches": [],
+        "balance": INITIAL[0],
+        "bet_amount": INITIAL[1],
+        "loss_streak_amount": INITIAL[2],
+    }
+
+
+def replayed(results, start=None):
+    _, _, _, rows, checkpoints = replay_results(results, *PARAMS, start)
+    return rows, checkpoints
+
+
+def assert_matches_replay(state, results):
+    """state ต้องเหมือนการ replay ประวัติ results ใหม่ทั้งหมด"""
+    rows, checkpoints = replayed(results)
+    assert list(state["results"]) == rows
+    assert list(state["checkpoints"]) == checkpoints
+    assert state["hashes"] == chain_hashes(rows)
+    expected = checkpoints[-1] if checkpoints else INITIAL
+    assert (state["balance"], state["bet_amount"], state["loss_streak_amount"]) == expected
+
+
+@pytest.mark.parametrize("kind", ["list", "store"])
+def test_undo_redo_single_trades(kind):
+    state = new_state(*containers(kind))
+    results = random_results(40, 11)
+    rows, checkpoints = replayed(results)
+    for row, checkpoint in zip(rows, checkpoints):
+        record_trade(state, row, checkpoint)
+    assert_matches_replay(state, results)
+
+    popped = undo_trades(state, INITIAL, 15)
+    assert popped == rows[:-16:-1]
+    assert_matches_replay(state, results[:25])
+    assert redo_trades(state, 5) == rows[25:30]
+    assert_matches_replay(state, results[:30])
+
+    # บันทึกไม้ใหม่หลัง undo: redo ถูกล้าง
+    undo_trades(state, INITIAL, 2)
+    new = {"ไม้": 29, "Pattern": "คอ", "ผลลัพธ์": "ชนะ"}
+    (row,), (checkpoint,) = replayed([new], state["checkpoints"][-1])
+    record_trade(state, row, checkpoint)
+    assert state["redo_stack"] == []
+    assert redo_trades(state) == []
+    assert_matches_replay(state, results[:28] + [new])
+
+    undo_trades(state, INITIAL, 100)
+    assert_matches_replay(state, [])
+    assert redo_trades(state, 100) == rows[:28] + [row]
+
+
+@pytest.mark.parametrize("kind", ["list", "store"])
+def test_undo_redo_batches(kind):
+    state = new_state(*containers(kind))
+    results = random_results(30, 5)
+    rows, checkpoints = replayed(results)
+    record_trades(state, rows[:10], checkpoints[:10])
+    record_trades(state, rows[10:25], checkpoints[10:25])
+    record_trade(state, rows[25], checkpoints[25])
+
+    # ไม้เดี่ยวล่าสุดไม่ใช่ชุด -> undo_batch ไม่ทำอะไร
+    assert undo_batch(state, INITIAL) == []
+    undo_trades(state, INITIAL)
+    assert undo_batch(state, INITIAL) == rows[24:9:-1]
+    assert_matches_replay(state, results[:10])
+    assert redo_batch_size(state) == 15
+    assert undo_batch(state, INITIAL) == rows[9::-1]
+    assert_matches_replay(state, [])
+
+    assert redo_batch(state) == rows[:10]
+    assert redo_batch(state) == rows[10:25]
+    assert_matches_replay(state, results[:25])
+    # redo ชุดแล้ว undo ชุดเดิมได้อีก
+    assert len(undo_batch(state, INITIAL)) == 15
+    redo_trades(state, 3)  # redo บางส่วน -> ที่เหลือไม่ใช่ชุดแล้ว
+    assert redo_batch_size(state) == 0
+    assert_matches_replay(state, results[:13])
+
+
+
+@pytest.mark.parametrize("kind", ["list", "store"])
+def test_reset_keeps_container_type(kind):
+    state = new_state(*containers(kind))
+    results = random_results(20, 3)
+    rows, checkpoints = replayed(results)
+    for row, checkpoint in zip(rows, checkpoints):
+        record_trade(state, row, checkpoint)
+
+    results_type, checkpoints_type = type(state["results"]), type(state["checkpoints"])
+    reset_history(state, INITIAL, rows[:5], checkpoints[:5])
+    assert (type(state["results"]), type(state["checkpoints"])) == (results_type, checkpoints_type)
+    assert_matches_replay(state, results[:5])
+    reset_history(state, INITIAL)
+    assert_matches_replay(state, [])
+
+
+@pytest.mark.parametrize("kind", ["list", "store"])
+def test_rewrite_replays_from_edited_row(kind):
+    state = new_state(*containers(kind))
+    results = random_results(20, 3)
+    rows, checkpoints = replayed(results)
+    for row, checkpoint in zip(rows, checkpoints):
+        record_trade(state, row, checkpoint)
+    undo_trades(state, INITIAL, 2)
+
+    edited = results[:8] + [dict(results[8], ผลลัพธ์="ชนะ" if results[8]["ผลลัพธ์"] != "ชนะ" else "แพ้")] + results[9:18]
+    tail_rows, tail_checkpoints = replayed(edited[8:], checkpoints[7])
+    rewrite_history(state, 8, tail_rows, tail_checkpoints, INITIAL)
+    assert_matches_replay(state, edited)
+    assert redo_trades(state) == []  # redo คำนวณจากประวัติเก่า จึงถูกล้าง
+
+    rewrite_history(state, 0, [], [], INITIAL)
+    assert_matches_replay(state, [])
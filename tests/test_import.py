@@ -0,0 +1,123 @@
+import io
+
+import pytest
+
+from conftest import random_results
+from stock_money_engine import replay_results
+from stock_money_import import PARQUET_AVAILABLE, export_results, import_results, import_results_csv, parse_outcomes
+from stock_money_results import CheckpointStore, ResultsStore
+
+PARAMS = (1000, 7.3, 0.7, 1.7)
+INITIAL = (1000, 7.3, 0)
+HEADER = "ไม้,Pattern,ผลลัพธ์,เงินเดิมพัน,พอร์ต\n"
+
+
+def recompute(results, start=None):
+    return replay_results(results, *PARAMS, start)
+
+
+def csv_file(rows, header=HEADER):
+    """CSV แบบที่แอป export (มีคอลัมน์เงินเดิมพัน / พอร์ตที่ import ไม่ได้ใช้)"""
+    lines = "".join(f"{r['ไม้']},{r['Pattern']},{r['ผลลัพธ์']},{r.get('เงินเดิมพัน', 0)},{r.get('พอร์ต', 0)}\n" for r in rows)
+    return io.BytesIO((header + lines).encode("utf-8-sig"))
+
+
+def exported(results, fmt="CSV"):
+    """ไฟล์ที่ export_results สร้างจากตารางของแอป (มีคอลัมน์ Seed ต่อท้ายแบบปุ่มดาวน์โหลด)"""
+    _, _, _, rows, checkpoints = recompute(results)
+    store = ResultsStore()
+    store.extend(rows)
+    frame = store.frame()
+    frame["Seed"] = 123
+    return io.BytesIO(export_results(frame, fmt)), rows, checkpoints
+
+
+@pytest.mark.parametrize("chunksize", [1, 37, 50_000])
+def test_csv_round_trip(chunksize):
+    _, _, _, rows, checkpoints = recompute(random_results(500, 21))
+    got_rows, got_checkpoints = import_results_csv(csv_file(rows), recompute, INITIAL, chunksize=chunksize)
+    assert got_rows == rows
+    assert got_checkpoints == checkpoints
+
+
+def test_round_trip_into_columnar_stores():
+    _, _, _, rows, checkpoints = recompute(random_results(500, 22))
+    got_rows, got_checkpoints = import_results(
+        csv_file(rows), "results.csv", recompute, INITIAL, chunksize=37, rows=ResultsStore(), checkpoints=CheckpointStore(),
+    )
+    assert isinstance(got_rows, ResultsStore) and isinstance(got_checkpoints, CheckpointStore)
+    assert list(got_rows) == rows
+    assert list(got_checkpoints) == checkpoints
+
+
+@pytest.mark.parametrize("fmt, name", [
+    ("CSV", "results.csv"),
+    pytest.param("Parquet", "results.parquet", marks=pytest.mark.skipif(not PARQUET_AVAILABLE, reason="ต้องมี pyarrow")),
+])
+def test_export_round_trip(fmt, name):
+    source, rows, checkpoints = exported(random_results(300, 23), fmt)
+    got_rows, got_checkpoints = import_results(
+        source, name, recompute, INITIAL, chunksize=64, rows=ResultsStore(), checkpoints=CheckpointStore(),
+    )
+    assert list(got_rows) == rows
+    assert list(got_checkpoints) == checkpoints
+
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="ต้องมี pyarrow")
+def test_parquet_is_smaller_than_csv():
+    results = random_results(5_000, 25)
+    csv_size = len(exported(results, "CSV")[0].getvalue())
+    assert len(exported(results, "Parquet")[0].getvalue()) < csv_size / 2
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_unsorted_file_is_sorted_before_replay(columnar):
+    results = random_results(200, 24)
+    containers = {"rows": ResultsStore(), "checkpoints": CheckpointStore()} if columnar else {}
+    rows, checkpoints = import_results_csv(csv_file(results[100:] + results[:100]), recompute, INITIAL,
+                                           chunksize=30, **containers)
+    expected_rows, expected_checkpoints = recompute(results)[3:]
+    # chunk แรก ๆ ถูก replay ไปแล้วก่อนเจอไม้ที่ไม่เรียง ต้องถูกทิ้งไม่ให้ซ้ำ
+    assert list(rows) == expected_rows
+    assert list(checkpoints) == expected_checkpoints
+
+
+def test_missing_values_use_defaults():
+    source = io.BytesIO("ไม้,Pattern,ผลลัพธ์\n1,,ชนะ\n2,คอ,\n".encode())
+    rows, _ = import_results_csv(source, recompute, INITIAL)
+    assert [(r["Pattern"], r["ผลลัพธ์"]) for r in rows] == [("พุธ", "ชนะ"), ("คอ", "-")]
+
+
+@pytest.mark.parametrize("header", ["ไม้,Pattern,ผลลัพธ์\n", HEADER])
+def test_header_only_file_imports_nothing(header):
+    rows, checkpoints = import_results_csv(csv_file([], header), recompute, INITIAL)
+    assert rows == [] and checkpoints == []
+    rows, checkpoints = import_results_csv(
+        csv_file([], header), recompute, INITIAL, rows=ResultsStore(), checkpoints=CheckpointStore(),
+    )
+    assert len(rows) == 0 and len(checkpoints) == 0
+
+
+@pytest.mark.parametrize("body, message", [
+    ("1,พุธ,ชนะ\n2,คอ,เสมอ\n", "แถวที่ 3"),
+    ("1,พุธ,ชนะ\n,คอ,แพ้\n", "แถวที่ 3: ไม่มีเลขไม้"),
+    ("1,ซื้อ,ชนะ\n", "แถวที่ 2: Pattern"),
+])
+def test_invalid_rows_report_line_number(body, message):
+    source = io.BytesIO(("ไม้,Pattern,ผลลัพธ์\n" + body).encode())
+    with pytest.raises(ValueError, match=message):
+        import_results_csv(source, recompute, INITIAL, chunksize=1)
+
+
+def test_missing_columns_are_rejected():
+    with pytest.raises(ValueError, match="คอลัมน์"):
+        import_results_csv(io.BytesIO("ไม้,ผลลัพธ์\n1,ชนะ\n".encode()), recompute, INITIAL)
+
+
+def test_parse_outcomes():
+    assert parse_outcomes("WWL-l").tolist() == [1, 1, 2, 0, 2]
+    assert parse_outcomes("ผลลัพธ์\nชนะ\nแพ้\n1\n0").tolist() == [1, 2, 1, 2]
+    with pytest.raises(ValueError):
+        parse_outcomes("WXL")
+    with pytest.raises(ValueError):
+        parse_outcomes("  ")
@@ -0,0 +1,56 @@
+import sqlite3
+
+import pytest
+
+from conftest import random_trades
+from stock_money_journal import COLUMNS, TradeJournal
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal.sqlite3")
+
+
+def test_batches_are_written_and_read_back(path):
+    trades = random_trades(120, 1)
+    journal = TradeJournal(path, batch_size=50)
+    journal.extend(trades)
+    # 2 batch เต็มถูกเขียนไปแล้ว ที่เหลือรอในบัฟเฟอร์ (อ่านเมื่อไรก็ flush ก่อน)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 100
+    assert journal.count() == 120
+    assert journal.last_capital() == trades[-1]["ทุนหลังเทรด"]
+
+    page = journal.page(offset=30, limit=25)
+    assert page["ทุนหลังเทรด"].tolist() == [t["ทุนหลังเทรด"] for t in trades[30:55]]
+    assert list(page.columns) == [name for name, _, _ in COLUMNS]
+    assert journal.column("result") == [t["ผลลัพธ์"] for t in trades]
+    columns = journal.columns(["profit_loss", "capital_before"])
+    assert columns["profit_loss"] == [t["กำไร/ขาดทุน"] for t in trades]
+    with pytest.raises(ValueError):
+        journal.column("id; DROP TABLE trades")
+    with pytest.raises(ValueError):
+        journal.columns(["result", "nope"])
+    journal.close()
+
+
+def test_reopen_restores_history(path):
+    trades = random_trades(80, 2)
+    journal = TradeJournal(path)
+    journal.extend(trades)
+    journal.close()
+
+    reopened = TradeJournal(path)
+    assert reopened.count() == 80
+    assert reopened.column("capital_after") == [t["ทุนหลังเทรด"] for t in trades]
+    reopened.append(trades[0])
+    assert reopened.count() == 81
+    reopened.close()
+
+
+def test_empty_journal(path):
+    journal = TradeJournal(path)
+    assert journal.count() == 0
+    assert journal.last_capital(default=5.0) == 5.0
+    assert journal.page().empty
+    journal.close()
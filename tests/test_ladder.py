@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+import pytest
+
+from stock_money_ladder import bet_ladder
+
+PARAMS = [
+    (1000, 30, 1, 1),
+    (1000, 7.3, 0.7, 1.7),
+    (5000, 10, 5, 0.8),
+    (250, 1, 2, 3),
+]
+
+
+def original_max_trades(capital, first_bet, target_profit, odds, limit=100000):
+    """ลูปคำนวณจำนวนไม้สูงสุดแบบเดิมของแอป (ก่อนมี bet ladder)"""
+    max_bet_amount = first_bet
+    loss_streak_amount_tmp = 0
+    temp_capital = capital
+    max_trades_possible = 0
+    while temp_capital >= max_bet_amount and max_trades_possible < limit:
+        temp_capital -= max_bet_amount
+        loss_streak_amount_tmp += max_bet_amount
+        max_trades_possible += 1
+        max_bet_amount = math.ceil((loss_streak_amount_tmp + target_profit) / odds)
+    return max_trades_possible
+
+
+@pytest.mark.parametrize("params", PARAMS + [(100000, 1, 1, 2), (1000, 0.5, 0.1, 5)])
+def test_max_streak_matches_original_loop(params):
+    for capital in np.linspace(0, params[0], 37):
+        assert bet_ladder(capital, *params[1:]).max_streak() == original_max_trades(capital, *params[1:])
+
+
+@pytest.mark.parametrize("params", PARAMS)
+def test_ladder_levels_match_step_by_step_losses(params):
+    capital, first_bet, target_profit, odds = params
+    ladder = bet_ladder(capital, first_bet, target_profit, odds)
+    depth = ladder.max_streak()
+    bet, loss_sum = first_bet, 0
+    expected_bets, expected_losses = [], [0]
+    for k in range(depth):
+        assert ladder.bet_at(k) == bet
+        assert ladder.capital_needed(k) == loss_sum
+        expected_bets.append(bet)
+        loss_sum += bet
+        expected_losses.append(loss_sum)
+        bet = math.ceil((loss_sum + target_profit) / odds)
+    bets, losses = ladder.arrays(depth)
+    assert bets.tolist() == expected_bets
+    assert losses.tolist() == expected_losses
+
+
+def test_max_streak_within_smaller_capital():
+    ladder = bet_ladder(5000, 30, 1, 1)
+    for capital in (0, 29, 30, 1000, 5000):
+        assert ladder.max_streak(capital) == original_max_trades(capital, 30, 1, 1)
+    with pytest.raises(ValueError):
+        ladder.max_streak(5001)
+
+
+def test_ladder_rejects_non_positive_odds():
+    with pytest.raises(ValueError):
+        bet_ladder(1000, 30, 1, 0)
+
+
+def test_ladder_rejects_overflowing_depth():
+    # เดิมพันโตเร็วจนเกินช่วงของ float ก่อนถึง max_depth
+    with pytest.raises(ValueError):
+        bet_ladder(math.inf, 100.0, 50.0, 0.5, max_depth=1000)
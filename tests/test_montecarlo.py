@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+import pytest
+
+from stock_money_montecarlo import simulate_recovery_paths
+from stock_money_rng import RandomStreams
+
+
+def scalar_paths(capital, first_bet, target_profit, odds, num_trades, num_paths, win_prob, seed):
+    """จำลองทีละเส้นทางทีละไม้ด้วยกติกาเดิมของ stock_money_recovery_target.py (ค่าสุ่มตำแหน่งเดียวกัน)"""
+    streams = RandomStreams(seed)
+    draws = np.array([streams.uniforms("monte_carlo", trade, 0, num_paths) for trade in range(1, num_trades + 1)])
+    finals, ruined = [], []
+    for path in range(num_paths):
+        bal, bet, loss_sum = capital, first_bet, 0
+        ruined_at = 0 if bal < bet else -1
+        for trade in range(1, num_trades + 1):
+            if ruined_at >= 0:
+                break
+            if draws[trade - 1, path] < win_prob:
+                bal += bet * odds
+                bet, loss_sum = first_bet, 0
+            else:
+                bal -= bet
+                loss_sum += bet
+                bet = math.ceil((loss_sum + target_profit) / odds)
+            if bal < bet:
+                ruined_at = trade
+        finals.append(bal)
+        ruined.append(ruined_at)
+    return np.array(finals), np.array(ruined)
+
+
+@pytest.mark.parametrize("params", [
+    (1000, 30, 1, 1, 0.5),
+    (300, 7.3, 0.7, 1.7, 0.45),
+    (500, 10, 5, 0.8, 0.6),
+    (20, 30, 1, 1, 0.5),  # ทุนไม่พอวางไม้แรก
+])
+def test_vectorized_paths_match_scalar_loop(params):
+    capital, first_bet, target_profit, odds, win_prob = params
+    result = simulate_recovery_paths(capital, first_bet, target_profit, odds, 150, num_paths=400,
+                                     win_prob=win_prob, keep_paths=True, seed=3)
+    finals, ruined = scalar_paths(capital, first_bet, target_profit, odds, 150, 400, win_prob, 3)
+
+    np.testing.assert_allclose(result.final_balances, finals, rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(result.ruined_at, ruined)
+    np.testing.assert_allclose(result.paths[-1], finals, rtol=1e-6)
+    assert result.ruin_probability == pytest.approx(np.mean(ruined >= 0))
+
+
+def test_bands_cover_first_and_last_trade():
+    result = simulate_recovery_paths(1000, 30, 1, 1, 500, num_paths=2_000, max_band_points=20, seed=1)
+    assert result.band_trades[0] == 0 and result.band_trades[-1] == 500
+    assert len(result.band_trades) <= 20
+    np.testing.assert_allclose(result.bands[:, -1], np.percentile(result.final_balances, result.percentiles))
+    assert np.all(np.diff(result.bands, axis=0) >= 0)
+
+
+def test_seed_reproduces_paths():
+    a = simulate_recovery_paths(1000, 30, 1, 1, 100, num_paths=500, seed=42)
+    b = simulate_recovery_paths(1000, 30, 1, 1, 100, num_paths=500, seed=a.seed)
+    np.testing.assert_array_equal(a.final_balances, b.final_balances)
+    with pytest.raises(ValueError):
+        simulate_recovery_paths(1000, 30, 1, 0, 10)
@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_money_engine import plan_position, plan_positions
+
+
+def random_watchlist(count, seed):
+    rng = np.random.default_rng(seed)
+    entry = np.round(rng.uniform(1, 200, count), 2)
+    stop_loss = np.round(entry * rng.uniform(0.85, 0.99, count), 2)
+    target = np.round(entry * rng.uniform(1.02, 1.4, count), 2)
+    return pd.DataFrame({"Symbol": [f"S{i}" for i in range(count)], "Entry": entry, "Stop Loss": stop_loss, "Target": target})
+
+
+@pytest.mark.parametrize("lot", [1, 100])
+def test_matches_scalar_plan_position(lot):
+    watchlist = random_watchlist(300, 1)
+    planned = plan_positions(watchlist, 1_000_000, 1.5, board_lot=lot)
+    for row in planned.itertuples(index=False):
+        scalar = plan_position(1_000_000, 1.5, row.Entry, row[2], row.Target)
+        assert row[4] == pytest.approx(scalar.position_size)  # ขนาดซื้อ (ไม่ปัด)
+        assert row[5] == math.floor(scalar.position_size / lot + 1e-9) * lot
+        assert row[6] == pytest.approx(scalar.rr_ratio)
+    assert (planned["ขนาดซื้อ"] % lot == 0).all()
+    assert (planned["ความเสี่ยง (บาท)"] <= 1_000_000 * 0.015 + 1e-6).all()
+
+
+def test_total_risk_cap_scales_every_position():
+    watchlist = random_watchlist(50, 2)
+    uncapped = plan_positions(watchlist, 1_000_000, 1.0, board_lot=1)
+    capped = plan_positions(watchlist, 1_000_000, 1.0, board_lot=1, max_total_risk_percent=10)
+    assert uncapped["ความเสี่ยง (บาท)"].sum() > 100_000
+    assert capped["ความเสี่ยง (บาท)"].sum() <= 100_000
+    assert (capped["ขนาดซื้อ"] <= uncapped["ขนาดซื้อ"]).all()
+    # ลดทุกตำแหน่งสัดส่วนเดียวกัน (ต่างกันแค่การปัดลง)
+    scale = 100_000 / uncapped["ความเสี่ยง (บาท)"].sum()
+    assert np.all(np.abs(capped["ขนาดซื้อ"] - uncapped["ขนาดซื้อ"] * scale) < 1)
+
+    # ความเสี่ยงรวมไม่ถึงเพดาน: ไม่เปลี่ยน
+    loose = plan_positions(watchlist, 1_000_000, 1.0, board_lot=1, max_total_risk_percent=100)
+    pd.testing.assert_frame_equal(loose, uncapped)
+
+
+def test_per_row_capital_and_risk_override_defaults():
+    watchlist = pd.DataFrame({
+        "Entry": [10.0, 10.0, 10.0], "Stop Loss": [9.0, 9.0, 9.0], "Target": [12.0, 12.0, 12.0],
+        "ทุน": [50_000.0, np.nan, 100_000.0], "ความเสี่ยง (%)": [np.nan, 2.0, 0.5],
+    })
+    planned = plan_positions(watchlist, 100_000, 1.0)
+    assert planned["ขนาดซื้อ (ไม่ปัด)"].tolist() == pytest.approx([500.0, 2000.0, 500.0])
+    assert planned["ขนาดซื้อ"].tolist() == [500, 2000, 500]
+
+
+def test_invalid_rows_get_zero_shares():
+    watchlist = pd.DataFrame({"Entry": [10.0, 10.0, np.nan, 10.0], "Stop Loss": [10.0, 9.5, 9.0, 9.0],
+                              "Target": [11.0, np.nan, 12.0, 12.0]})
+    planned = plan_positions(watchlist, 100_000, 1.0)
+    assert planned["ขนาดซื้อ"].tolist() == [0, 0, 0, 1000]
+    assert planned["R:R"].isna().tolist() == [True, True, True, False]
+    assert planned["ความเสี่ยง (บาท)"].tolist()[:3] == [0.0, 0.0, 0.0]
+
+
+def test_lot_rounding_tolerates_float_error():
+    # 1% ของ 3,000 / (10.3 - 10.0) = 100 หุ้นพอดี แต่ทศนิยมได้ 99.9999...
+    planned = plan_positions(pd.DataFrame({"Entry": [10.3], "Stop Loss": [10.0], "Target": [11.0]}), 3_000, 1.0, board_lot=100)
+    assert planned["ขนาดซื้อ"].tolist() == [100]
+
+
+def test_missing_columns_are_rejected():
+    with pytest.raises(ValueError, match="Stop Loss"):
+        plan_positions(pd.DataFrame({"Entry": [1.0], "Target": [2.0]}), 1000, 1.0)
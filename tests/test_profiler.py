@@ -0,0 +1,145 @@
+import json
+import time
+import tracemalloc
+
+import pytest
+
+import stock_money_profiler
+from stock_money_profiler import Profiler
+
+
+@pytest.fixture(autouse=True)
+def no_tracing():
+    assert not tracemalloc.is_tracing()
+    yield
+    stock_money_profiler._memory_users.clear()
+    stock_money_profiler._open_frames.clear()
+    if stock_money_profiler._started_tracing:
+        tracemalloc.stop()
+        stock_money_profiler._started_tracing = False
+
+
+def test_disabled_profiler_records_nothing():
+    prof = Profiler()
+    prof.begin_run()
+    with prof.stage("a"):
+        pass
+    assert prof.end_run() is None
+    assert prof.totals == {} and prof.runs == [] and prof.summary() == []
+
+
+def test_stages_nest_and_accumulate():
+    prof = Profiler()
+    prof.configure(True)
+    for _ in range(2):
+        prof.begin_run("app")
+        with prof.stage("outer"):
+            with prof.stage("inner"):
+                time.sleep(0.002)
+            with prof.stage("inner"):
+                pass
+        run = prof.end_run()
+    assert [(event["name"], event["depth"]) for event in run["stages"]] == [("inner", 1), ("inner", 1), ("outer", 0)]
+    outer = run["stages"][-1]
+    assert outer["elapsed"] >= run["stages"][0]["elapsed"] >= 2
+    assert run["elapsed"] >= outer["elapsed"]
+    assert prof.totals["inner"][1] == 4 and prof.totals["outer"][1] == 2
+    assert prof.run_counts == {"app": 2}
+
+    rows = {row["ขั้น"]: row for row in prof.summary()}
+    assert rows["inner"]["ครั้ง (รอบล่าสุด)"] == 2 and rows["inner"]["ครั้ง (รวม)"] == 4
+    assert rows["outer"]["peak (KB)"] is None  # ไม่ได้เปิดวัดหน่วยความจำ
+
+
+def test_stages_outside_a_run_go_to_the_next_run():
+    prof = Profiler()
+    prof.configure(True)
+    with prof.stage("callback"):
+        pass
+    prof.begin_run("app")
+    with prof.stage("script"):
+        pass
+    run = prof.end_run()
+    assert [event["name"] for event in run["stages"]] == ["callback", "script"]
+
+    # รอบที่ถูกขัดจังหวะถูกทิ้ง
+    prof.begin_run("app")
+    prof.begin_run("app")
+    prof.end_run()
+    assert len(prof.runs) == 2 and prof.run_counts == {"app": 3}
+
+
+def test_timed_decorator_keeps_the_return_value():
+    prof = Profiler()
+    prof.configure(True)
+
+    @prof.timed()
+    def double(x):
+        return 2 * x
+
+    assert double(4) == 8
+    assert prof.totals["double"][1] == 1
+
+
+def test_memory_peak_covers_nested_and_released_allocations():
+    prof = Profiler()
+    prof.configure(True, track_memory=True)
+    assert tracemalloc.is_tracing()
+    prof.begin_run("app")
+    with prof.stage("outer"):
+        with prof.stage("inner"):
+            block = bytearray(2 * 2**20)
+            del block
+    run = prof.end_run()
+    inner, outer = run["stages"]
+    assert inner["peak"] >= 2 * 2**20
+    assert outer["peak"] >= inner["peak"]
+    assert run["peak"] >= outer["peak"]
+    assert stock_money_profiler._open_frames == {}
+
+
+def test_tracemalloc_is_shared_between_profilers():
+    first, second = Profiler(), Profiler()
+    first.configure(True, track_memory=True)
+    second.configure(True, track_memory=True)
+    first.begin_run("app")
+    with first.stage("waiting"):
+        second.begin_run("app")
+        with second.stage("alloc"):
+            block = bytearray(2 * 2**20)
+            del block
+        second.end_run()
+    first.end_run()
+    # reset_peak ของอีกเซสชันไม่ทำให้ peak ของขั้นที่เปิดอยู่หาย
+    assert first.last_run["stages"][0]["peak"] >= 2 * 2**20
+
+    first.configure(False)
+    assert tracemalloc.is_tracing()  # second ยังใช้อยู่
+    second.configure(True, track_memory=False)
+    assert not tracemalloc.is_tracing()
+
+
+def test_trace_and_dump(tmp_path):
+    prof = Profiler(history=2)
+    prof.configure(True, use_cprofile=True)
+    for scope in ("app", "trade_panel", "app"):
+        prof.begin_run(scope)
+        with prof.stage("work"):
+            sum(range(1000))
+        prof.end_run()
+    assert [run["scope"] for run in prof.runs] == ["trade_panel", "app"]
+
+    trace = prof.trace()
+    assert [event["cat"] for event in trace] == ["run", "run", "stage", "stage"]
+    assert min(event["ts"] for event in trace) == 0
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in trace)
+
+    paths = prof.dump(directory=str(tmp_path), prefix="test")
+    assert [path.rsplit(".", 1)[1] for path in paths] == ["json", "prof"]
+    with open(paths[0], encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["traceEvents"] == json.loads(json.dumps(trace))
+    assert data["otherData"]["run_counts"] == {"app": 2, "trade_panel": 1}
+
+    prof.reset()
+    assert prof.runs == [] and prof.summary() == [] and prof.dump(directory=str(tmp_path), prefix="empty")[1:] == []
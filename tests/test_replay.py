@@ -0,0 +1,84 @@
+import pytest
+
+from conftest import random_results
+from stock_money_engine import replay_results
+from stock_money_history import chain_hashes, record_trade
+from stock_money_replay import ReplayCache, common_prefix, switch_params
+
+PARAMS_A = (1000, 30, 1, 1)
+PARAMS_B = (1000, 7.3, 0.7, 1.7)
+
+
+def new_state(params, results):
+    _, _, _, rows, checkpoints = replay_results(results, *params)
+    return {
+        "results": rows,
+        "checkpoints": checkpoints,
+        "hashes": chain_hashes(rows),
+        "redo_stack": [],
+        "redo_batches": [],
+        "batches": [],
+        "balance": 0, "bet_amount": 0, "loss_streak_amount": 0,
+        "replay_params": params,
+        "replay_cache": ReplayCache(),
+    }
+
+
+def switch(state, params):
+    """สลับพารามิเตอร์ (เหมือน rerun ของแอป) คืนจำนวนไม้ที่ต้อง replay"""
+    def recompute(results, start=None):
+        return replay_results(results, *params, start)
+    return switch_params(state, params, recompute, (params[0], params[1], 0))
+
+
+def assert_replayed(state, params):
+    _, bet, loss_sum, rows, checkpoints = replay_results(list(state["results"]), *params)
+    assert list(state["results"]) == rows
+    assert list(state["checkpoints"]) == checkpoints
+    assert (state["bet_amount"], state["loss_streak_amount"]) == (bet, loss_sum)
+
+
+def test_common_prefix_matches_linear_scan():
+    a = chain_hashes(random_results(100, 1))
+    for b in (a, a[:40], a[:60] + chain_hashes(random_results(10, 2), a[59]), [], chain_hashes(random_results(100, 3))):
+        linear = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+        assert common_prefix(a, b) == common_prefix(b, a) == linear
+
+
+def test_switching_back_replays_only_new_trades():
+    results = random_results(200, 5)
+    state = new_state(PARAMS_A, results)
+    assert switch(state, PARAMS_A) == 0
+
+    assert switch(state, PARAMS_B) == 200
+    assert_replayed(state, PARAMS_B)
+    assert switch(state, PARAMS_A) == 0  # ชุด A อยู่ใน cache ครบแล้ว
+    assert_replayed(state, PARAMS_A)
+
+    # บันทึกไม้ใหม่ภายใต้ A แล้วสลับไป B: replay เฉพาะไม้ใหม่
+    extra = random_results(30, 6)
+    for row in extra:
+        _, _, _, (new_row,), (checkpoint,) = replay_results([dict(row, ไม้=len(state["results"]) + 1)], *PARAMS_A,
+                                                            start=state["checkpoints"][-1])
+        record_trade(state, new_row, checkpoint)
+    assert switch(state, PARAMS_B) == 30
+    assert_replayed(state, PARAMS_B)
+    assert state["redo_stack"] == []
+
+
+def test_cache_evicts_least_recently_used_params():
+    cache = ReplayCache(max_entries=2)
+    state = new_state(PARAMS_A, random_results(50, 7))
+    state["replay_cache"] = cache
+    params_c = (1000, 10, 5, 0.8)
+    switch(state, PARAMS_B)
+    switch(state, params_c)
+    assert list(cache.entries) == [PARAMS_B, params_c]
+    assert switch(state, PARAMS_A) == 50  # A ถูกทิ้งไปแล้ว ต้อง replay ใหม่ทั้งหมด
+    assert_replayed(state, PARAMS_A)
+
+
+@pytest.mark.parametrize("params", [PARAMS_A, PARAMS_B])
+def test_empty_history_needs_no_replay(params):
+    state = new_state(params, [])
+    assert switch(state, PARAMS_B if params == PARAMS_A else PARAMS_A) == 0
@@ -0,0 +1,51 @@
+import pytest
+
+from conftest import random_results
+from stock_money_engine import replay_results
+from stock_money_results import CheckpointStore, ResultsStore
+
+
+def stores(count=50):
+    _, _, _, rows, checkpoints = replay_results(random_results(count, 4), 1000, 30, 1, 1)
+    results, saved = ResultsStore(), CheckpointStore()
+    results.extend(rows)
+    saved.extend(checkpoints)
+    return rows, checkpoints, results, saved
+
+
+def test_store_behaves_like_list_of_rows():
+    rows, checkpoints, results, saved = stores()
+    assert len(results) == len(rows) and list(results) == rows
+    assert results[3] == rows[3] and results[-1] == rows[-1]
+    assert list(results[10:20]) == rows[10:20]
+    assert list(saved) == checkpoints and saved[-1] == checkpoints[-1]
+    assert results.values("Pattern") == [row["Pattern"] for row in rows]
+
+    assert results.pop() == rows[-1] and saved.pop() == checkpoints[-1]
+    del results[30:], saved[30:]
+    assert list(results) == rows[:30] and list(saved) == checkpoints[:30]
+    with pytest.raises(ValueError):
+        del results[5:10]
+    with pytest.raises(IndexError):
+        ResultsStore().pop()
+
+
+def test_frame_is_a_copy():
+    rows, _, results, _ = stores()
+    frame = results.frame()
+    before = frame["พอร์ต"].tolist()
+    # pop แล้ว append แถวใหม่ เขียนทับตำแหน่งเดิมในอาร์เรย์ภายใน
+    results.pop()
+    results.append(dict(rows[-1], พอร์ต=-1.0, ผลลัพธ์="-"))
+    assert frame["พอร์ต"].tolist() == before
+    assert frame["ผลลัพธ์"].tolist() == [row["ผลลัพธ์"] for row in rows]
+    assert results.frame(10, 20)["ไม้"].tolist() == list(range(11, 21))
+
+
+def test_copy_is_independent():
+    rows, checkpoints, _, saved = stores()
+    copy = saved.copy()
+    assert isinstance(copy, CheckpointStore)
+    saved.pop()
+    saved.append((0.0, 0.0, 0.0))
+    assert list(copy) == checkpoints
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from stock_money_montecarlo import simulate_recovery_paths
+from stock_money_rng import PATTERNS, STREAMS, RandomStreams
+
+
+@pytest.mark.parametrize("start, count", [(0, 1), (1, 3), (3, 10), (4, 4), (5, 1), (997, 50)])
+def test_any_slice_matches_one_long_run(start, count):
+    streams = RandomStreams(42)
+    whole = streams.uniforms("outcome", 0, 0, 1_100)
+    np.testing.assert_array_equal(streams.uniforms("outcome", 0, start, count), whole[start:start + count])
+    assert streams.uniform("outcome", 0, start) == whole[start]
+
+
+def test_patterns_and_outcomes_in_pieces_match_one_run():
+    streams = RandomStreams(7)
+    whole = streams.patterns(300)
+    assert streams.patterns(100) + streams.patterns(150, start=100) + streams.patterns(50, start=250) == whole
+    assert set(whole) == set(PATTERNS.tolist())
+    wins = streams.outcomes(300, win_prob=0.3)
+    np.testing.assert_array_equal(np.concatenate([streams.outcomes(7, 0.3), streams.outcomes(293, 0.3, start=7)]), wins)
+    assert 0.2 < wins.mean() < 0.4
+
+
+def test_streams_and_indexes_are_independent():
+    streams = RandomStreams(2024)
+    draws = {(name, index): streams.uniforms(name, index, 0, 2_000) for name in STREAMS for index in (0, 1, 2)}
+    keys = list(draws)
+    for i, a in enumerate(keys):
+        for b in keys[i + 1:]:
+            assert not np.array_equal(draws[a], draws[b]), (a, b)
+            assert abs(np.corrcoef(draws[a], draws[b])[0, 1]) < 0.1, (a, b)
+    # สร้าง stream อื่นก่อนไม่ทำให้ stream นี้เปลี่ยน
+    np.testing.assert_array_equal(RandomStreams(2024).uniforms("pattern", 1, 0, 2_000), draws["pattern", 1])
+
+
+def test_seed_reproduces_and_differs():
+    assert RandomStreams(5).patterns(50) == RandomStreams(5).patterns(50)
+    assert RandomStreams(5).patterns(50) != RandomStreams(6).patterns(50)
+    assert 0 <= RandomStreams().seed < 2**32
+
+
+def test_monte_carlo_chunks_match_single_run():
+    whole = simulate_recovery_paths(1000, 30, 1, 1, 200, num_paths=3_000, seed=5)
+    parts = [simulate_recovery_paths(1000, 30, 1, 1, 200, num_paths=1_000, seed=5, first_path=start)
+             for start in (0, 1_000, 2_000)]
+    np.testing.assert_array_equal(whole.final_balances, np.concatenate([p.final_balances for p in parts]))
+    np.testing.assert_array_equal(whole.ruined_at, np.concatenate([p.ruined_at for p in parts]))
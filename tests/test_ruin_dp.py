@@ -0,0 +1,85 @@
+import itertools
+import math
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+import stock_money_ruin_dp
+from stock_money_ruin_dp import BudgetExceeded, ruin_distribution, ruin_estimate
+
+
+def brute_force(capital, first_bet, target_profit, odds, num_trades, win_prob):
+    """ไล่ทุกลำดับชนะ/แพ้ 2^n แบบ ด้วยกติกาเดียวกับแอป คืน (โอกาสทุนหมดภายในไม้ที่ t, {พอร์ตสุดท้าย: โอกาส})"""
+    ruin_by_trade = np.zeros(num_trades + 1)
+    finals = defaultdict(float)
+    for path in itertools.product((True, False), repeat=num_trades):
+        prob = math.prod(win_prob if win else 1 - win_prob for win in path)
+        bal, bet, loss_sum = capital, first_bet, 0
+        ruined = 0 if bal < bet else None
+        for trade, win in enumerate(path, 1):
+            if ruined is not None:
+                break
+            if win:
+                bal += bet * odds
+                bet, loss_sum = first_bet, 0
+            else:
+                bal -= bet
+                loss_sum += bet
+                bet = math.ceil((loss_sum + target_profit) / odds)
+            if bal < bet:
+                ruined = trade
+        if ruined is not None:
+            ruin_by_trade[ruined:] += prob
+        finals[round(bal, 4)] += prob
+    return ruin_by_trade, finals
+
+
+@pytest.mark.parametrize("params", [
+    (100, 10, 1, 1, 10, 0.5),
+    (100, 7.3, 0.7, 1.7, 9, 0.45),
+    (60, 5, 2, 0.8, 10, 0.6),
+    (5, 10, 1, 1, 4, 0.5),  # ทุนไม่พอวางไม้แรก
+])
+@pytest.mark.parametrize("sparse", [False, True])
+def test_ruin_distribution_matches_brute_force(params, sparse):
+    # dense_work_limit=0 บังคับใช้แบบ sparse
+    dist = ruin_distribution(*params, dense_work_limit=0 if sparse else None)
+    ruin_by_trade, finals = brute_force(*params)
+
+    assert dist.exact
+    np.testing.assert_allclose(dist.ruin_by_trade, ruin_by_trade, atol=1e-12)
+    got = defaultdict(float)
+    for value, prob in zip(dist.final_values, dist.final_probs):
+        got[round(float(value), 4)] += prob
+    assert got.keys() == finals.keys()
+    for value, prob in finals.items():
+        assert got[value] == pytest.approx(prob, abs=1e-12)
+    assert dist.final_probs.sum() == pytest.approx(1.0)
+
+
+def test_sparse_state_budget_raises():
+    with pytest.raises(BudgetExceeded):
+        ruin_distribution(1000, 7.3, 0.7, 1.7, 200, dense_work_limit=0, sparse_state_limit=1_000)
+
+
+def test_ruin_estimate_is_exact_within_budget():
+    assert ruin_estimate(1000, 30, 1, 1, 200).exact
+
+
+def test_ruin_estimate_falls_back_to_labelled_monte_carlo(monkeypatch):
+    monkeypatch.setattr(stock_money_ruin_dp, "DENSE_WORK_LIMIT", 0)
+    monkeypatch.setattr(stock_money_ruin_dp, "SPARSE_STATE_LIMIT", 1_000)
+    params = (1000, 30, 1, 1, 300)
+    estimate = ruin_estimate(*params)
+    exact = ruin_distribution(*params)
+
+    assert not estimate.exact
+    assert estimate.num_paths >= stock_money_ruin_dp.FALLBACK_MIN_PATHS
+    assert len(estimate.ruin_by_trade) == params[-1] + 1
+    assert np.all(np.diff(estimate.ruin_by_trade) >= 0)
+    assert estimate.final_probs.sum() == pytest.approx(1.0)
+    # seed ตายตัว: เรียกซ้ำได้ผลเดิม และใกล้ค่าแม่นยำ
+    again = ruin_estimate(*params)
+    np.testing.assert_array_equal(estimate.ruin_by_trade, again.ruin_by_trade)
+    assert estimate.ruin_probability == pytest.approx(exact.ruin_probability, abs=0.03)
@@ -0,0 +1,112 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from stock_money_service import JournalService
+
+
+def entry(trade, balance):
+    return {"ไม้": trade, "Pattern": "พุธ", "ผลลัพธ์": "ชนะ", "เงินเดิมพัน(ปัจจุบัน)": 30.0,
+            "เงินเดิมพันไม้ถัดไป": 30.0, "พอร์ต": balance}
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = JournalService(str(tmp_path / "journal.sqlite3"), flush_interval=0.01).start()
+    yield service
+    service.close()
+
+
+def stored(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT account, seq FROM entries ORDER BY account, seq").fetchall()
+
+
+def test_entries_are_written_and_reloaded(service):
+    service.extend("a", [entry(i, 1000 + i) for i in range(1, 4)], session="s1")
+    service.append("b", entry(1, 970))
+    service.flush()
+    assert stored(service.path) == [("a", 1), ("a", 2), ("a", 3), ("b", 1)]
+
+    version, entries, summary = service.delta("a", since=1)
+    assert version == 3 and [e["ไม้"] for e in entries] == [2, 3]
+    assert summary["sessions"]["s1"]["balance"] == 1003
+
+    service.close()
+    reopened = JournalService(service.path).start()
+    try:
+        assert reopened.delta("a")[0] == 3
+        assert reopened.delta("a")[2] == summary
+    finally:
+        reopened.close()
+
+
+def test_summary_is_kept_per_session(service):
+    # สองเซสชันเดินเงินแยกกันในบัญชีเดียว: ไม้ล่าสุดของอีกเซสชันต้องไม่ทับสรุปของเซสชันนี้
+    service.extend("a", [entry(1, 1030), entry(2, 1060)], session="s1")
+    service.append("a", dict(entry(1, 970), เงินเดิมพันไม้ถัดไป=61.0), session="s2")
+    sessions = service.delta("a")[2]["sessions"]
+    assert sessions["s1"] == {"trades": 2, "balance": 1060, "next_bet": 30.0, "updated": sessions["s1"]["updated"]}
+    assert (sessions["s2"]["trades"], sessions["s2"]["balance"], sessions["s2"]["next_bet"]) == (1, 970, 61.0)
+    assert service.summaries()["a"]["version"] == 3
+
+
+def test_subscribers_and_waiters_are_pushed_new_entries(service):
+    async def scenario():
+        queue = service.subscribe("a")
+        waiter = asyncio.ensure_future(service.wait_delta("a", since=0, timeout=5))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await service.append_async("a", entry(1, 1030), session="s1")
+        version, entries, _ = await waiter
+        seq, pushed = await asyncio.wait_for(queue.get(), 5)
+        service.unsubscribe("a", queue)
+        # ไม่มี entry ใหม่: wait_delta คืนเมื่อหมดเวลา
+        empty = await service.wait_delta("a", since=1, timeout=0.01)
+        return version, entries, seq, pushed, empty
+
+    version, entries, seq, pushed, empty = asyncio.run_coroutine_threadsafe(scenario(), service._loop).result(10)
+    assert (version, seq) == (1, 1)
+    assert entries == [pushed] and pushed["พอร์ต"] == 1030
+    assert empty[:2] == (1, [])
+
+
+def fail_first_insert(service, monkeypatch, message):
+    insert = service._insert
+    calls = []
+
+    def failing_once(sql, batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError(message)
+        insert(sql, batch)
+
+    monkeypatch.setattr(service, "_insert", failing_once)
+
+
+def test_insert_failure_is_reported_and_writer_keeps_running(service, monkeypatch):
+    fail_first_insert(service, monkeypatch, "disk I/O error")
+    service.append("a", entry(1, 1030))
+    with pytest.raises(RuntimeError, match="disk I/O error"):
+        service.flush()
+    assert "disk I/O error" in service.write_error  # สถานะยังแสดงจนกว่าจะมี batch ที่เขียนสำเร็จ
+
+    # writer ยังทำงานต่อ: entry ถัดไปถูกเขียนได้ และ entry ที่เขียนไม่สำเร็จยังอยู่ในหน่วยความจำ
+    service.append("a", entry(2, 1060))
+    service.flush()  # flush แจ้ง error ครั้งเดียว
+    assert service.write_error is None
+    assert stored(service.path) == [("a", 2)]
+    assert service.delta("a")[0] == 2
+
+
+def test_failure_is_reported_by_flush_even_after_a_later_success(service, monkeypatch):
+    fail_first_insert(service, monkeypatch, "database is locked")
+    service.append("a", entry(1, 1030))
+    service._call(service._queue.join())
+    assert service.write_error == "database is locked"
+    service.append("a", entry(2, 1060))
+    service._call(service._queue.join())
+    assert service.write_error is None
+    with pytest.raises(RuntimeError, match="database is locked"):
+        service.flush()
@@ -0,0 +1,120 @@
+import itertools
+import json
+import math
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import random_trades
+from stock_money_journal import COLUMNS, TradeJournal
+from stock_money_stats import RunningStats
+
+
+def running(trades):
+    stats = RunningStats()
+    for t in trades:
+        stats.update(t["ผลลัพธ์"], t["กำไร/ขาดทุน"], t["ทุนก่อนหน้า"], t["ทุนหลังเทรด"])
+    return stats
+
+
+def recomputed(trades):
+    """สถิติเดียวกันคำนวณใหม่จากทั้งตารางด้วย pandas (แบบที่แอปเคยทำทุก rerun)"""
+    df = pd.DataFrame(trades)
+    decided = df[df["ผลลัพธ์"].isin(["ชนะ", "แพ้"])]
+    pnl = decided["กำไร/ขาดทุน"]
+    returns = pnl / decided["ทุนก่อนหน้า"]
+
+    # จุดสูงสุดนับทั้งทุนก่อนและหลังของทุกแถว
+    equity = np.column_stack([df["ทุนก่อนหน้า"], df["ทุนหลังเทรด"]]).ravel()
+    peak = np.maximum.accumulate(equity)[1::2]
+    drawdown = peak - df["ทุนหลังเทรด"].to_numpy()
+    worst = int(drawdown.argmax())
+
+    runs = [(result, len(list(group))) for result, group in itertools.groupby(decided["ผลลัพธ์"])]
+    return {
+        "win_rate": (decided["ผลลัพธ์"] == "ชนะ").mean() * 100,
+        "avg_return": df["กำไร/ขาดทุน"].mean(),
+        "expectancy": pnl.mean(),
+        "profit_factor": pnl[pnl > 0].sum() / -pnl[pnl <= 0].sum(),
+        "max_drawdown": max(drawdown.max(), 0.0),
+        "max_drawdown_pct": drawdown[worst] / peak[worst] * 100 if drawdown.max() > 0 else 0.0,
+        "longest_win_streak": max((n for r, n in runs if r == "ชนะ"), default=0),
+        "longest_loss_streak": max((n for r, n in runs if r == "แพ้"), default=0),
+        "sharpe_per_trade": returns.mean() / returns.std(ddof=1),
+        "return_mean": returns.mean(),
+    }
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("count", [2, 25, 500])
+def test_running_stats_match_pandas_recompute(seed, count):
+    trades = random_trades(count, seed)
+    if not any(t["ผลลัพธ์"] == "แพ้" for t in trades) or sum(t["ผลลัพธ์"] != "-" for t in trades) < 2:
+        pytest.skip("ต้องมีเทรดชนะ/แพ้อย่างน้อย 2 ไม้และมีไม้แพ้")
+    stats, expected = running(trades), recomputed(trades)
+    assert stats.rows == count
+    for name, value in expected.items():
+        assert getattr(stats, name) == pytest.approx(value, rel=1e-9, abs=1e-12), name
+
+
+def test_streaks_skip_blank_trades():
+    stats = RunningStats()
+    for result in ["ชนะ", "-", "ชนะ", "แพ้", "-", "แพ้", "-", "แพ้", "ชนะ"]:
+        pnl = {"ชนะ": 10.0, "แพ้": -10.0, "-": 0.0}[result]
+        stats.update(result, pnl, 100.0, 100.0 + pnl)
+    assert (stats.longest_win_streak, stats.longest_loss_streak, stats.streak) == (2, 3, 1)
+    assert (stats.rows, stats.total_trades) == (9, 6)
+
+
+def test_empty_and_degenerate_stats():
+    stats = RunningStats()
+    assert (stats.win_rate, stats.avg_return, stats.expectancy, stats.sharpe_per_trade) == (0.0, 0.0, 0.0, 0.0)
+    assert stats.profit_factor == 0.0
+    stats.update("ชนะ", 50.0, 1000.0, 1050.0)
+    assert stats.profit_factor == math.inf
+    assert stats.sharpe_per_trade == 0.0  # ยังมีเทรดเดียว
+
+
+def test_dict_round_trip():
+    stats = running(random_trades(200, 4))
+    restored = RunningStats.from_dict(json.loads(json.dumps(stats.to_dict())))
+    assert restored == stats
+    # อัปเดตต่อจาก snapshot ได้ผลเดียวกับไม่เคยหยุด
+    more = random_trades(50, 5, capital=random_trades(200, 4)[-1]["ทุนหลังเทรด"])
+    for t in more:
+        for target in (stats, restored):
+            target.update(t["ผลลัพธ์"], t["กำไร/ขาดทุน"], t["ทุนก่อนหน้า"], t["ทุนหลังเทรด"])
+    assert restored == stats
+
+
+# ===================== snapshot ใน journal =====================
+def test_journal_reopen_restores_stats(tmp_path):
+    path = str(tmp_path / "journal.sqlite3")
+    trades = random_trades(80, 2)
+    journal = TradeJournal(path)
+    journal.extend(trades)
+    journal.close()
+
+    reopened = TradeJournal(path)
+    assert reopened.stats == running(trades)
+    reopened.close()
+
+
+def test_journal_replays_rows_missing_from_snapshot(tmp_path):
+    path = str(tmp_path / "journal.sqlite3")
+    trades = random_trades(60, 3)
+    journal = TradeJournal(path)
+    journal.extend(trades[:40])
+    journal.close()
+    # เขียนแถวเพิ่มตรง ๆ โดยไม่ได้อัปเดต snapshot (เช่นโปรแกรมหยุดกลางคัน)
+    names = ", ".join(sql for _, sql, _ in COLUMNS)
+    marks = ", ".join("?" for _ in COLUMNS)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(f"INSERT INTO trades ({names}) VALUES ({marks})",
+                         [tuple(t[name] for name, _, _ in COLUMNS) for t in trades[40:]])
+
+    reopened = TradeJournal(path)
+    assert reopened.stats.to_dict() == pytest.approx(running(trades).to_dict())
+    reopened.close()
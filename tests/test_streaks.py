@@ -0,0 +1,74 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from stock_money_streaks import plan_streak, required_capital, streak_for_confidence, streak_probability
+
+
+def markov_probability(k, n, p):
+    """P(แพ้ติด >= k ไม้ภายใน n ไม้) จาก chain ของความยาวช่วงแพ้ปัจจุบัน (ค่าอ้างอิงแบบตรงไปตรงมา)"""
+    run = np.zeros(k)  # run[j] = โอกาสที่ยังไม่เคยถึง k และกำลังแพ้ติด j ไม้
+    run[0] = 1.0
+    hit = 0.0
+    for _ in range(n):
+        hit += run[k - 1] * p
+        run = np.concatenate(([run.sum() * (1 - p)], run[:-1] * p))
+    return hit
+
+
+@pytest.mark.parametrize("n", [1, 5, 9, 12])
+@pytest.mark.parametrize("p", [0.3, 0.5, 0.62])
+def test_streak_probability_matches_brute_force(n, p):
+    depths = np.arange(0, n + 2)
+    expected = np.zeros(len(depths))
+    for path in itertools.product((True, False), repeat=n):  # True = แพ้
+        prob = math.prod(p if loss else 1 - p for loss in path)
+        longest = max((len(list(g)) for loss, g in itertools.groupby(path) if loss), default=0)
+        expected[depths <= longest] += prob
+    np.testing.assert_allclose(streak_probability(depths, n, p), expected, atol=1e-12)
+
+
+@pytest.mark.parametrize("k", [3, 8, 20, 60, 150])
+@pytest.mark.parametrize("n", [200, 3000])
+def test_streak_probability_matches_markov_chain(k, n):
+    # ครอบคลุมทั้งช่วงแม่นยำ (n <= 2k), recurrence และสูตร Feller
+    for p in (0.4, 0.5, 0.7):
+        assert streak_probability(k, n, p)[0] == pytest.approx(markov_probability(k, n, p), rel=1e-7, abs=1e-15)
+
+
+def test_streak_probability_edge_cases():
+    assert streak_probability([0, 1, 5], 10, 0.0).tolist() == [1.0, 0.0, 0.0]
+    assert streak_probability([5, 10, 11], 10, 1.0).tolist() == [1.0, 1.0, 0.0]
+    assert streak_probability(11, 10, 0.5)[0] == 0.0
+    # ความน่าจะเป็นเล็กมากไม่หายเป็น 0
+    tiny = streak_probability(60, 1_000_000, 0.5)[0]
+    assert 0 < tiny < 1e-10
+
+
+def test_streak_for_confidence_is_smallest_depth():
+    depth = streak_for_confidence(0.99, 1000, 0.5)
+    assert streak_probability(depth + 1, 1000, 0.5)[0] <= 0.01
+    assert streak_probability(depth, 1000, 0.5)[0] > 0.01
+
+
+def test_required_capital_matches_loss_sum():
+    capital, _ = required_capital(6, 30, 1, 1)
+    bet, loss_sum = 30, 0
+    for _ in range(6):
+        loss_sum += bet
+        bet = math.ceil((loss_sum + 1) / 1)
+    assert capital == loss_sum
+
+    plan = plan_streak(6, 30, 1, 1, 500, 0.5)
+    assert plan.capital == capital
+    assert len(plan.bets) == 6 and plan.losses[-1] == capital
+    assert plan.hit_probability == pytest.approx(streak_probability(7, 500, 0.5)[0])
+
+
+def test_overflowing_depth_raises_value_error():
+    with pytest.raises(ValueError):
+        plan_streak(1000, 100.0, 50.0, 0.5, 1000, 0.5)
+    with pytest.raises(ValueError):
+        required_capital(1_000_000, 10, 1, 0.9)
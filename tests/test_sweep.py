@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+import stock_money_ruin_dp
+import stock_money_sweep
+from stock_money_ruin_dp import fallback_paths
+from stock_money_sweep import SweepCache, evaluate_cell, grid_values, run_sweep
+
+GRID = ([1000.0, 2000.0], [10.0, 30.0], [1.0, 5.0], [0.8, 1.0, 1.5])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SweepCache(str(tmp_path / "sweep.sqlite3"))
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize("num_trades", [20, 150])  # DP แม่นยำ / Monte Carlo
+def test_parallel_matches_serial(monkeypatch, num_trades):
+    serial, computed = run_sweep(*GRID, num_trades, max_workers=1)
+    assert computed == len(serial) == 24
+    monkeypatch.setattr(stock_money_sweep, "PARALLEL_MIN_CELLS", 1)
+    parallel, _ = run_sweep(*GRID, num_trades, max_workers=2)
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def test_cache_computes_only_new_cells(cache):
+    first, computed = run_sweep(*GRID, 20, cache=cache, max_workers=1)
+    assert computed == len(first)
+    again, computed = run_sweep(*GRID, 20, cache=cache, max_workers=1)
+    assert computed == 0
+    pd.testing.assert_frame_equal(again, first)
+
+    # ขยายกริด: คำนวณเฉพาะช่องของค่า odds ใหม่
+    capitals, first_bets, targets, odds = GRID
+    wider, computed = run_sweep(capitals, first_bets, targets, odds + [2.0], 20, cache=cache, max_workers=1)
+    assert computed == len(capitals) * len(first_bets) * len(targets)
+    pd.testing.assert_frame_equal(wider[wider["odds"] != 2.0].reset_index(drop=True), first)
+
+    # พารามิเตอร์อื่นของ sweep (จำนวนไม้ / โอกาสชนะ) เป็นคนละช่อง
+    _, computed = run_sweep(*GRID, 21, cache=cache, max_workers=1)
+    assert computed == len(first)
+
+
+def test_over_budget_cells_are_tagged_as_estimates(monkeypatch, cache):
+    cell = (1000.0, 30.0, 1.0, 1.0, 80, 0.5)
+    assert evaluate_cell(cell)[-1] == "exact"
+
+    monkeypatch.setattr(stock_money_ruin_dp, "DENSE_WORK_LIMIT", 0)
+    monkeypatch.setattr(stock_money_ruin_dp, "SPARSE_STATE_LIMIT", 100)
+    assert evaluate_cell(cell)[-1] == f"mc{fallback_paths(80)}-{stock_money_ruin_dp.FALLBACK_SEED}"
+
+    frame, computed = run_sweep(*GRID, 80, cache=cache, max_workers=1)
+    assert (frame["method"] != "exact").all()
+    # ค่าประมาณที่เก็บไว้ถูกดึงกลับจาก cache ได้ ไม่ต้องคำนวณซ้ำ
+    again, computed = run_sweep(*GRID, 80, cache=cache, max_workers=1)
+    assert computed == 0
+    pd.testing.assert_frame_equal(again, frame)
+
+
+def test_monte_carlo_cells_use_sweep_tag():
+    metrics = evaluate_cell((1000.0, 30.0, 1.0, 1.0, stock_money_sweep.EXACT_MAX_TRADES + 1, 0.5))
+    assert metrics[-1] == f"mc{stock_money_sweep.MC_PATHS}-{stock_money_sweep.SWEEP_SEED}"
+
+
+def test_grid_values_are_rounded_and_unique():
+    assert grid_values(0.1, 0.3, 3) == [0.1, 0.2, 0.3]
+    assert grid_values(5.0, 5.0, 4) == [5.0]